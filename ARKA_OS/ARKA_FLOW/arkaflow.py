@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-import os, re, json, time, argparse
+import os, re, sys, json, time, heapq, secrets, argparse
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Any
 import yaml
 
 def _load_yaml(p: Path) -> dict:
@@ -66,9 +66,723 @@ def load_flow(flow_ref: str, flow_root: Path) -> dict:
     if export not in flows: raise SystemExit(f"[ERR] export '{export}' absent dans {file_p.name}")
     return {"id":doc["id"],"export":export,"file":str(file_p),"sequence":flows[export].get("sequence",[]),"common":doc.get("common",{})}
 
+# ── Simulation (dimensionnement) ────────────────────────────────────────────
+# Modèle : arrivées de Poisson par intent ; chaque step est servi par un agent d'un rôle candidat
+# (CAPAMAP : rôles couvrant toutes les required_caps, ou l'une des required_caps_any ; gate_select :
+# acteur choisi par tags) ; un pool de N agents par rôle ; file FIFO par rôle (une tâche attend dans
+# la file de chacun de ses rôles candidats, le premier agent libéré la prend).
+# single_thread / require_result_to_advance / chain_locks.single_active_step => steps strictement
+# séquentiels ; sinon un step démarre dès que ses `requires.prev_step` ont rendu leur RESULT.
+UNASSIGNED = "(unassigned)"
+
+def _dist(spec: str):
+    # "exp:MOY" | "const:V" | "lognormal:MOY:ET" | "uniform:A:B" — minutes
+    kind, _, rest = str(spec).partition(":")
+    try:
+        a = [float(x) for x in rest.split(":")] if rest else []
+        if kind=="exp" and len(a)==1: return lambda rng: rng.expovariate(1.0/a[0])
+        if kind=="const" and len(a)==1: return lambda rng: a[0]
+        if kind=="uniform" and len(a)==2: return lambda rng: rng.uniform(a[0], a[1])
+        if kind=="lognormal" and len(a)==2:
+            import math
+            s2 = math.log(1 + (a[1]/a[0])**2); mu = math.log(a[0]) - s2/2; sg = math.sqrt(s2)
+            return lambda rng: rng.lognormvariate(mu, sg)
+    except (ValueError, ZeroDivisionError):
+        pass
+    raise SystemExit(f"[ERR] distribution invalide '{spec}' (exp:MOY | const:V | lognormal:MOY:ET | uniform:A:B, minutes)")
+
+def _step_roles(st: dict, capamap: dict, tags: set) -> Tuple[str, ...]:
+    gate = st.get("gate_select")
+    if isinstance(gate, dict):
+        for ch in gate.get("choose") or []:
+            if "when" in ch and tags.intersection((ch.get("when") or {}).get("any_tag") or []): return (ch["actor"],)
+            if "default" in ch: return (ch["default"],)
+    sel = st.get("select_actor") or {}
+    need = list(dict.fromkeys((st.get("requires_caps") or []) + (sel.get("required_caps") or [])))
+    anyc = list(dict.fromkeys((st.get("requires_caps_any") or []) + (sel.get("required_caps_any") or [])))
+    roles: List[str] = []
+    if need:
+        pools = [capamap.get(c) or [] for c in need]
+        roles = [r for r in pools[0] if all(r in p for p in pools[1:])] or list(dict.fromkeys(r for p in pools for r in p))
+    for c in anyc:
+        roles += [r for r in capamap.get(c) or [] if r not in roles]
+    return tuple(roles) or (UNASSIGNED,)
+
+def compile_sim_flow(flow_ref: str, flow_root: Path, capamap: dict, chain_lock: bool, tags: set, _seen=()) -> dict:
+    # -> {"steps": [(nom, rôles, indices des prérequis)], "timeout_min", "sequential"} ; use_chain déplié
+    if flow_ref in _seen: raise SystemExit(f"[ERR] use_chain cyclique : {' -> '.join(_seen + (flow_ref,))}")
+    data = load_flow(flow_ref, flow_root)
+    pol = (data["common"] or {}).get("policy") or {}
+    seq_mode = chain_lock or bool(pol.get("single_thread")) or bool(pol.get("require_result_to_advance"))
+    # last_of : step -> indices de ses puits (un use_chain parallèle peut finir sur plusieurs branches)
+    steps: List[Tuple[str, tuple, tuple]] = []; last_of: dict = {}; prev: tuple = ()
+    for st in data["sequence"]:
+        if not isinstance(st, dict): continue
+        if seq_mode:
+            deps = prev
+        else:
+            deps = tuple(dict.fromkeys(i for r in (st.get("requires") or []) if r.get("prev_step") in last_of for i in last_of[r["prev_step"]]))
+        if st.get("use_chain"):
+            sub = compile_sim_flow(f"{data['id']}:{st['use_chain']}", flow_root, capamap, chain_lock, tags, _seen + (flow_ref,))
+            base = len(steps)
+            for name, roles, sdeps in sub["steps"]:
+                steps.append((f"{st.get('step')}/{name}", roles, tuple(base+d for d in sdeps) if sdeps else deps))
+            used = {d for _, _, sdeps in sub["steps"] for d in sdeps}
+            prev = tuple(base+i for i in range(len(sub["steps"])) if i not in used) or deps
+        else:
+            steps.append((st.get("step"), _step_roles(st, capamap, tags), deps))
+            prev = (len(steps)-1,)
+        last_of[st.get("step")] = prev
+    return {"steps": steps, "timeout_min": float(pol.get("timeout_sec") or 0)/60, "sequential": seq_mode}
+
+def _pct(xs: List[float], q: float) -> Optional[float]:
+    if not xs: return None
+    return round(xs[min(len(xs)-1, int(q*len(xs)))], 2)
+
+def _summary(xs: List[float]) -> dict:
+    xs = sorted(xs)
+    return {"n": len(xs), "mean": round(sum(xs)/len(xs), 2) if xs else None, "p50": _pct(xs, .5), "p90": _pct(xs, .9), "p99": _pct(xs, .99), "max": round(xs[-1], 2) if xs else None}
+
+def simulate(flow_root: Path, sc: dict) -> dict:
+    import random
+    from collections import deque
+    t_start = time.perf_counter()
+    rng = random.Random(sc.get("seed", 1))
+    mix = {k: (v if isinstance(v, dict) else {"rate": v}) for k, v in (sc.get("arrivals") or {}).items()}
+    if not mix: raise SystemExit("[ERR] mix d'arrivées vide (--mix INTENT=TAUX/h ou scenario.arrivals)")
+    capamap = (_load_yaml(flow_root/"bricks"/"ARKFLOW-CAPAMAP01-CAPABILITY-MATRIX.yaml").get("capabilities") or {})
+    locks = _load_yaml(flow_root/"bricks"/"ARKFLOW-17-ORCHESTRATION-RULES.yaml").get("chain_locks") or {}
+    chain_lock = bool(locks.get("single_active_step"))
+    router = {s["match"].get("value"): s["route"]["flow"] for s in _load_yaml(flow_root/"router"/"routing.yaml").get("strategies", [])
+              if (s.get("match") or {}).get("by")=="intent" and (s.get("route") or {}).get("flow")}
+    plans = {}
+    for it, m in mix.items():
+        ref = router.get(it) or next((e.get("flow_ref") for e in load_manifest(flow_root) if e.get("intent")==it), None)
+        if not ref: raise SystemExit(f"[ERR] intent sans flow : {it}")
+        plans[it] = compile_sim_flow(ref, flow_root, capamap, chain_lock, set(m.get("tags") or []))
+        plans[it]["flow_ref"] = ref
+        succ: List[List[int]] = [[] for _ in plans[it]["steps"]]
+        for i, (_, _, deps) in enumerate(plans[it]["steps"]):
+            for d in deps: succ[d].append(i)
+        plans[it]["succ"] = succ
+    roles = sorted({r for p in plans.values() for _, rs, _ in p["steps"] for r in rs})
+    staff = sc.get("staff") or {}; service = sc.get("service") or {}
+    servers = {r: int(staff.get(r, staff.get("default", 1))) for r in roles}
+    default_svc = _dist(service.get("default", "exp:30"))
+    svc = {r: (_dist(service[r]) if r in service else default_svc) for r in roles}
+    intents = list(mix); weights = [float(mix[i]["rate"]) for i in intents]; total_rate = sum(weights)/60.0  # /min
+    n_inst = int(sc.get("instances", 1000))
+
+    free = dict(servers); queues = {r: deque() for r in roles}; waiting = dict.fromkeys(roles, 0)
+    busy = dict.fromkeys(roles, 0.0); waits = {r: [] for r in roles}; maxq = dict.fromkeys(roles, 0)
+    timeouts = dict.fromkeys(roles, 0); cycle = {i: [] for i in intents}
+    ev: list = []; seq = 0; now = 0.0; done = 0; last_done = 0.0
+
+    def dispatch(task, r, t):
+        nonlocal seq
+        inst, i, ready = task[0], task[1], task[2]
+        task[3] = True
+        if task[4]:
+            for q in inst["plan"]["steps"][i][1]: waiting[q] -= 1
+        free[r] -= 1
+        d = svc[r](rng); busy[r] += d; waits[r].append(t - ready)
+        if inst["plan"]["timeout_min"] and (t - ready + d) > inst["plan"]["timeout_min"]: timeouts[r] += 1
+        seq += 1; heapq.heappush(ev, (t + d, seq, 1, (task, r)))
+
+    def start(inst, i, t):
+        rs = inst["plan"]["steps"][i][1]
+        task = [inst, i, t, False, False]
+        best = max(rs, key=lambda r: free[r])
+        if free[best] > 0: dispatch(task, best, t); return
+        task[4] = True
+        for r in rs:
+            queues[r].append(task); waiting[r] += 1
+            if waiting[r] > maxq[r]: maxq[r] = waiting[r]
+
+    t = 0.0
+    for k in range(n_inst):
+        t += rng.expovariate(total_rate)
+        seq += 1; heapq.heappush(ev, (t, seq, 0, rng.choices(intents, weights)[0]))
+    while ev:
+        now, _, kind, data = heapq.heappop(ev)
+        if kind==0:
+            plan = plans[data]
+            inst = {"intent": data, "plan": plan, "t0": now, "left": len(plan["steps"]),
+                    "pending": [len(d) for _, _, d in plan["steps"]]}
+            for i, (_, _, deps) in enumerate(plan["steps"]):
+                if not deps: start(inst, i, now)
+            continue
+        task, r = data; inst, i = task[0], task[1]
+        free[r] += 1
+        q = queues[r]
+        while q:
+            nxt = q.popleft()
+            if not nxt[3]: dispatch(nxt, r, now); break
+        inst["left"] -= 1
+        for j in inst["plan"]["succ"][i]:
+            inst["pending"][j] -= 1
+            if inst["pending"][j]==0: start(inst, j, now)
+        if not inst["left"]:
+            done += 1; last_done = now; cycle[inst["intent"]].append(now - inst["t0"])
+
+    span = last_done or 1.0
+    role_rep = {}
+    for r in roles:
+        ws = waits[r]
+        role_rep[r] = {"servers": servers[r], "tasks": len(ws), "utilization": round(busy[r]/(servers[r]*span), 4) if servers[r] else None,
+                       "wait_min": _summary(ws), "max_queue": maxq[r], "timeouts": timeouts[r]}
+    ranked = sorted((r for r in roles if role_rep[r]["tasks"]), key=lambda r: (role_rep[r]["wait_min"]["mean"] or 0, role_rep[r]["utilization"] or 0), reverse=True)
+    all_cycles = [c for cs in cycle.values() for c in cs]
+    return {
+        "instances": n_inst, "completed": done, "sim_hours": round(span/60, 2),
+        "throughput_per_h": round(done/(span/60), 3),
+        "offered_per_h": round(total_rate*60, 3),
+        "cycle_time_min": _summary(all_cycles),
+        "per_intent": {i: {"flow_ref": plans[i]["flow_ref"], "steps": len(plans[i]["steps"]), "cycle_time_min": _summary(cycle[i])} for i in intents},
+        "roles": role_rep,
+        "bottlenecks": [{"role": r, "utilization": role_rep[r]["utilization"], "mean_wait_min": role_rep[r]["wait_min"]["mean"]} for r in ranked[:5]],
+        "elapsed_ms": round((time.perf_counter()-t_start)*1000, 1),
+    }
+
+# ── Préconditions (requires + ARKFLOW-19) ───────────────────────────────────
+# Chaque export est compilé une fois en DAG : steps indexés, et par step une liste de masques de bits
+# (une entrée `requires` ou une précondition ARKFLOW-19 de son action_key ; "A|B|C" = un masque
+# couvrant les steps A, B, C du flow). Un step est débloqué quand chacun de ses masques intersecte les
+# steps ayant rendu leur RESULT ; évaluer un état = quelques & sur des entiers.
+DONE_STATES = frozenset(("RESULT", "DONE"))
+ACTIVE_STATES = frozenset(("RUNNING", "ACTIVE", "IN_PROGRESS"))
+
+def _precond_sources(flow_root: Path) -> Tuple[dict, dict, bool, List[Path]]:
+    # -> (registry de l'index, préconditions ARKFLOW-19, chain_locks.single_active_step, fichiers lus)
+    idx_p = flow_root/"ARKFLOW00-INDEX.yaml"
+    reg = _load_yaml(idx_p).get("registry") or {}
+    deps = [idx_p]
+    def brick(bid: str, default: str) -> dict:
+        p = flow_root/((reg.get(bid) or {}).get("file") or default); deps.append(p)
+        return _load_yaml(p) if p.exists() else {}
+    pre = brick("ARKFLOW-19-PRECONDITIONS-DEFS", "bricks/ARKFLOW-19-PRECONDITIONS-DEFS.yaml").get("preconditions") or {}
+    locks = brick("ARKFLOW-17-ORCHESTRATION-RULES", "bricks/ARKFLOW-17-ORCHESTRATION-RULES.yaml").get("chain_locks") or {}
+    return reg, pre, bool(locks.get("single_active_step")), deps
+
+def _compile_dag(flow_ref: str, seq: list, policy: dict, pre: dict, chain_lock: bool) -> dict:
+    steps = [st.get("step") for st in seq]
+    pos = {s: i for i, s in enumerate(steps)}
+    def mask(expr: str) -> Tuple[int, List[str]]:
+        m = 0; missing = []
+        for alt in str(expr).split("|"):
+            if alt in pos: m |= 1 << pos[alt]
+            else: missing.append(alt)
+        return m, missing
+    needs: List[List[Tuple[int, str, str]]] = []  # par step : (masque, source, expression)
+    issues: List[dict] = []
+    for i, st in enumerate(seq):
+        req = []
+        for r in st.get("requires") or []:
+            m, missing = mask(r.get("prev_step"))
+            if missing: issues.append({"level": "error", "flow": flow_ref, "step": steps[i], "error": f"prev_step inconnu : {'|'.join(missing)}"})
+            req.append((m, "requires", r.get("prev_step")))  # masque nul si inconnu : jamais satisfait
+        for r in pre.get(st.get("action_key")) or []:
+            m, _ = mask(r.get("prev_step"))
+            m &= ~(1 << i)
+            # précondition générique : ne s'applique que si l'une des alternatives existe dans ce flow
+            if m: req.append((m, "ARKFLOW-19:" + st.get("action_key"), r.get("prev_step")))
+        needs.append(req)
+    return {"flow": flow_ref, "steps": steps, "pos": pos, "needs": needs,
+            "sub": {i: st["use_chain"] for i, st in enumerate(seq) if st.get("use_chain")},
+            "single_active": chain_lock or bool(policy.get("single_thread")),
+            "all": (1 << len(steps)) - 1, "issues": issues}
+
+def compile_preconditions(flow_root: Path) -> Tuple[Dict[str, dict], List[Path]]:
+    # -> ({flow_ref: dag}, fichiers sources) pour toutes les briques de l'index qui exportent des flows
+    reg, pre, chain_lock, deps = _precond_sources(flow_root)
+    dags: Dict[str, dict] = {}
+    for bid, meta in reg.items():
+        p = flow_root/((meta or {}).get("file") or "MISSING")
+        if p in deps or not p.exists(): continue
+        doc = _load_yaml(p); deps.append(p)
+        policy = ((doc.get("common") or {}).get("policy") or {})
+        for export, fl in (doc.get("flows") or {}).items():
+            seq = [st for st in ((fl or {}).get("sequence") or []) if isinstance(st, dict)]
+            dags[f"{doc.get('id', bid)}:{export}"] = _compile_dag(f"{doc.get('id', bid)}:{export}", seq, policy, pre, chain_lock)
+    return dags, deps
+
+def _state_masks(dag: dict, state: Any) -> Tuple[int, int, List[str]]:
+    # état : {"Step": "RESULT"|"RUNNING"|...} | ["Step", ...] (RESULT) | {"results": [...], "active": [...]}
+    pos = dag["pos"]; done = active = 0; unknown = []
+    if isinstance(state, dict) and ("results" in state or "active" in state):
+        pairs = [(s, "RESULT") for s in state.get("results") or []] + [(s, "RUNNING") for s in state.get("active") or []]
+    elif isinstance(state, dict):
+        pairs = state.items()
+    elif isinstance(state, list):
+        pairs = [(s, "RESULT") for s in state]
+    else:
+        raise ValueError("état attendu : objet {step: statut} ou liste de steps terminés")
+    for s, v in pairs:
+        i = pos.get(s)
+        if i is None: unknown.append(s); continue
+        v = str(v).upper()
+        if v in DONE_STATES: done |= 1 << i
+        elif v in ACTIVE_STATES: active |= 1 << i
+    return done, active & ~done, unknown
+
+def can_advance(dag: dict, state: Any) -> dict:
+    done, active, unknown = _state_masks(dag, state)
+    steps = dag["steps"]; unblocked = []; blocked = {}
+    for i, req in enumerate(dag["needs"]):
+        bit = 1 << i
+        if (done | active) & bit: continue
+        miss = [f"{src} {expr}" for m, src, expr in req if not m & done]
+        if miss: blocked[steps[i]] = miss
+        else: unblocked.append(steps[i])
+    out = {"flow": dag["flow"], "unblocked": unblocked, "blocked": blocked,
+           "done": [s for i, s in enumerate(steps) if done >> i & 1],
+           "active": [s for i, s in enumerate(steps) if active >> i & 1],
+           "complete": done == dag["all"]}
+    if dag["single_active"] and active and unblocked:
+        out["locked_by"] = out["active"]; out["unblocked"] = []  # chain_locks.single_active_step
+    subs = {steps[i]: c for i, c in dag["sub"].items() if steps[i] in unblocked}
+    if subs: out["use_chain"] = subs
+    if unknown: out["unknown_steps"] = unknown
+    return out
+
+def validate_preconditions(dags: Dict[str, dict], pre: dict, action_keys: Optional[set]=None) -> List[dict]:
+    # Statique, toutes briques : prev_step inconnus, steps jamais débloquables (cycle ou dépendance
+    # impossible), use_chain vers un export absent, préconditions ARKFLOW-19 sans action_key connue.
+    issues: List[dict] = []
+    for ref, dag in dags.items():
+        issues += dag["issues"]
+        done = 0; grew = True
+        while grew:  # point fixe : steps atteignables depuis l'état vide
+            grew = False
+            for i, req in enumerate(dag["needs"]):
+                if not done >> i & 1 and all(m & done for m, _, _ in req):
+                    done |= 1 << i; grew = True
+        stuck = [i for i in range(len(dag["steps"])) if not done >> i & 1]
+        in_cycle: set = set()
+        for cyc in _cycles(dag, stuck):
+            in_cycle.update(cyc)
+            issues.append({"level": "error", "flow": ref, "step": dag["steps"][cyc[0]], "error": "cycle : " + " -> ".join(dag["steps"][i] for i in cyc + [cyc[0]])})
+        for i in stuck:
+            if i in in_cycle: continue
+            issues.append({"level": "error", "flow": ref, "step": dag["steps"][i], "error": "step inatteignable",
+                           "needs": [f"{src} {expr}" for m, src, expr in dag["needs"][i] if not m & done]})
+        bid = ref.split(":", 1)[0]
+        for i, sub in dag["sub"].items():
+            if f"{bid}:{sub}" not in dags:
+                issues.append({"level": "error", "flow": ref, "step": dag["steps"][i], "error": f"use_chain inconnu : {sub}"})
+    if action_keys is not None:
+        for k in pre:
+            if k not in action_keys: issues.append({"level": "warning", "flow": None, "step": None, "error": f"ARKFLOW-19 : action_key inconnue {k}"})
+    return issues
+
+def _cycles(dag: dict, nodes: List[int]) -> List[List[int]]:
+    # Cycles élémentaires parmi les steps bloqués (arêtes : alternative -> step), un par composante
+    inside = set(nodes); seen: set = set(); out = []
+    preds = {i: [j for m, _, _ in dag["needs"][i] for j in inside if m >> j & 1] for i in inside}
+    for start in nodes:
+        if start in seen: continue
+        path: List[int] = []; onpath: Dict[int, int] = {}
+        def dfs(n: int) -> Optional[List[int]]:
+            onpath[n] = len(path); path.append(n); seen.add(n)
+            for p in preds[n]:
+                if p in onpath: return path[onpath[p]:][::-1]
+                if p not in seen:
+                    c = dfs(p)
+                    if c: return c
+            path.pop(); del onpath[n]
+            return None
+        c = dfs(start)
+        if c: out.append(c)
+    return out
+
+# ── Exécution (run) ─────────────────────────────────────────────────────────
+# Moteur asyncio mono-process : chaque instance de flow est une machine à états (état {step: statut} évalué
+# par can_advance) ; un step prêt est dispatché en insérant une notify v1 dans notify_events (livrée aux agents
+# par le daemon push_notify). Un agent rend son RESULT par `arkaflow complete` : écriture en base puis datagramme
+# sur le socket de réveil du runner (aucune attente active ; filet : PRAGMA data_version toutes les --poll s).
+# Politiques : single_thread / chain_locks.single_active_step = un step actif à la fois ;
+# require_result_to_advance / chain_locks.result_required_to_advance = ordre déclaré strict ;
+# timeout_sec (ou chain_locks.timeout.sec) = escalade on_timeout (mission_owner -> PMO -> Owner), un niveau par
+# échéance ; write_guard.enforce_selected_actor_only = seul l'agent sélectionné peut rendre le step.
+# Checkpoint : état des instances et steps dans la même base, écrit dans la transaction qui dispatche ou applique
+# un résultat (un lot par tour de boucle) : un redémarrage reprend sans rejouer de step.
+RUN_DDL = """
+CREATE TABLE IF NOT EXISTS flow_instances (
+  instance_id TEXT PRIMARY KEY,
+  flow_ref    TEXT NOT NULL,
+  status      TEXT NOT NULL,
+  parent_id   TEXT,
+  parent_step TEXT,
+  params_json TEXT,
+  state_json  TEXT NOT NULL DEFAULT '{}',
+  error       TEXT,
+  created_at  INTEGER NOT NULL,
+  updated_at  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_flow_instances_status ON flow_instances(status);
+CREATE TABLE IF NOT EXISTS flow_steps (
+  instance_id   TEXT NOT NULL,
+  step          TEXT NOT NULL,
+  message_id    TEXT,
+  to_agent      TEXT,
+  state         TEXT NOT NULL,
+  applied       INTEGER NOT NULL DEFAULT 0,
+  escalations   INTEGER NOT NULL DEFAULT 0,
+  result_json   TEXT,
+  dispatched_at INTEGER,
+  deadline_at   INTEGER,
+  completed_at  INTEGER,
+  PRIMARY KEY (instance_id, step)
+);
+CREATE INDEX IF NOT EXISTS idx_flow_steps_state ON flow_steps(state, applied);
+CREATE INDEX IF NOT EXISTS idx_flow_steps_message ON flow_steps(message_id);
+"""
+RUN_LEASE = "arkaflow-run"
+LEASE_TTL_MS = 10_000
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+def _role_slug(role: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', role.lower()).strip('-')
+
+def notify_db_path(flow_root: Path, db: Optional[str]=None) -> Path:
+    # Base push_notify : --db, $ARKA_NOTIFY_DB, sinon <repo>/ARKA_META/.system/notify/notify.db
+    if db or os.environ.get("ARKA_NOTIFY_DB"): return Path(db or os.environ["ARKA_NOTIFY_DB"]).resolve()
+    return flow_root.parent.parent / "ARKA_META" / ".system" / "notify" / "notify.db"
+
+def open_notify_db(path: Path):
+    import sqlite3
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(path), isolation_level=None, timeout=5.0)
+    con.execute("PRAGMA journal_mode=WAL"); con.execute("PRAGMA synchronous=NORMAL"); con.execute("PRAGMA busy_timeout=5000")
+    if not con.execute("SELECT 1 FROM sqlite_master WHERE name='notify_events'").fetchone():
+        schema = path.parent / "schema.sql"
+        if not schema.exists(): raise SystemExit(f"[ERR] notify_events absent et schema.sql introuvable : {schema}")
+        con.executescript(schema.read_text(encoding="utf-8"))
+    con.executescript(RUN_DDL)
+    return con
+
+def _wake_path(db_path: Path) -> Path:
+    return db_path.with_name("arkaflow-run.sock")
+
+def _poke(db_path: Path) -> None:
+    import socket
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        s.sendto(b"!", str(_wake_path(db_path)))
+    except OSError:
+        pass  # runner arrêté : il reprendra à son démarrage
+    finally:
+        s.close()
+
+def _escalation_chain(locks: dict) -> List[str]:
+    # "escalate_to: mission_owner -> PMO -> Owner"
+    raw = str(((locks.get("timeout") or {}).get("on_timeout")) or "")
+    _, _, chain = raw.partition("escalate_to:")
+    return [x.strip() for x in chain.split("->") if x.strip()]
+
+def _chain_locks(flow_root: Path, reg: Optional[dict]=None) -> dict:
+    reg = reg if reg is not None else (_load_yaml(flow_root/"ARKFLOW00-INDEX.yaml").get("registry") or {})
+    lp = flow_root/((reg.get("ARKFLOW-17-ORCHESTRATION-RULES") or {}).get("file") or "bricks/ARKFLOW-17-ORCHESTRATION-RULES.yaml")
+    return (_load_yaml(lp).get("chain_locks") or {}) if lp.exists() else {}
+
+def compile_run_flows(flow_root: Path) -> Tuple[Dict[str, dict], dict]:
+    # -> ({flow_ref: {dag, steps: {step: {action_key, roles, use_chain}}, single, strict, timeout_ms}}, chain_locks)
+    dags, _ = compile_preconditions(flow_root)
+    reg = _load_yaml(flow_root/"ARKFLOW00-INDEX.yaml").get("registry") or {}
+    locks = _chain_locks(flow_root, reg)
+    cp = flow_root/"bricks"/"ARKFLOW-CAPAMAP01-CAPABILITY-MATRIX.yaml"
+    capamap = ((_load_yaml(cp).get("capabilities") or {}) if cp.exists() else {})
+    out: Dict[str, dict] = {}; docs: Dict[str, dict] = {}
+    for ref, dag in dags.items():
+        bid, export = ref.split(":", 1)
+        if bid not in docs:
+            p = flow_root/((reg.get(bid) or {}).get("file") or "MISSING")
+            docs[bid] = _load_yaml(p) if p.exists() else {}
+        doc = docs[bid]
+        pol = (doc.get("common") or {}).get("policy") or {}
+        seq = [st for st in (((doc.get("flows") or {}).get(export) or {}).get("sequence") or []) if isinstance(st, dict)]
+        timeout = float(pol.get("timeout_sec") or (locks.get("timeout") or {}).get("sec") or 0)
+        out[ref] = {"dag": dag, "bid": bid,
+                    "steps": {st.get("step"): {"action_key": st.get("action_key"), "use_chain": st.get("use_chain"),
+                                               "roles": [r for r in _step_roles(st, capamap, set()) if r != UNASSIGNED]} for st in seq},
+                    "single": dag["single_active"],
+                    "strict": bool(pol.get("require_result_to_advance") or locks.get("result_required_to_advance")),
+                    "timeout_ms": int(timeout * 1000)}
+    return out, locks
+
+class FlowRunner:
+    def __init__(self, flow_root: Path, db_path: Path, project: str="arka", provider: str="codex",
+                 session_prefix: str="arka", poll: float=2.0):
+        self.flow_root = flow_root; self.db_path = db_path
+        self.project, self.provider, self.session_prefix, self.poll = project, provider, session_prefix, poll
+        self.flows, self.locks = compile_run_flows(flow_root)
+        self.escalate_to = _escalation_chain(self.locks)
+        self.db = open_notify_db(db_path)
+        self.live: Dict[str, dict] = {}      # instance_id -> {id, flow, state, params, parent, parent_step, status, error}
+        self.deadlines: List[tuple] = []     # tas (échéance ms, instance, step, niveau)
+        self._writes: List[tuple] = []       # (sql, params) du tour courant
+        self._dirty: Dict[str, dict] = {}
+        self._data_version = None
+        self.stats = {"dispatched": 0, "completed": 0, "failed_steps": 0, "escalations": 0, "done": 0, "failed": 0, "resumed": 0}
+
+    # -- base --
+    def _w(self, sql: str, *params) -> None:
+        self._writes.append((sql, params))
+
+    def _commit(self) -> None:
+        now = _now_ms()
+        for inst in self._dirty.values():
+            self._w("UPDATE flow_instances SET status=?, state_json=?, error=?, updated_at=? WHERE instance_id=?",
+                    inst["status"], json.dumps(inst["state"], ensure_ascii=False), inst.get("error"), now, inst["id"])
+        self._dirty.clear()
+        self._w("UPDATE notify_leases SET heartbeat_at=? WHERE lease_id=? AND holder_pid=?", now, RUN_LEASE, os.getpid())
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in self._writes: self.db.execute(sql, params)
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK"); raise
+        finally:
+            self._writes = []
+
+    def _lease(self) -> None:
+        # Un seul runner par base (bail notify_leases, battement à chaque tour)
+        import socket
+        now = _now_ms()
+        self.db.execute("BEGIN IMMEDIATE")
+        row = self.db.execute("SELECT holder_pid, heartbeat_at FROM notify_leases WHERE lease_id=?", (RUN_LEASE,)).fetchone()
+        if row and row[0] != os.getpid() and row[1] and now - row[1] < LEASE_TTL_MS:
+            self.db.execute("ROLLBACK")
+            raise SystemExit(f"[ERR] runner déjà actif sur {self.db_path} (pid {row[0]})")
+        self.db.execute("INSERT INTO notify_leases (lease_id, holder_pid, holder_host, heartbeat_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(lease_id) DO UPDATE SET holder_pid=excluded.holder_pid, holder_host=excluded.holder_host, heartbeat_at=excluded.heartbeat_at",
+                        (RUN_LEASE, os.getpid(), socket.gethostname(), now))
+        self.db.execute("COMMIT")
+
+    # -- instances --
+    def _touch(self, inst: dict) -> None:
+        self._dirty[inst["id"]] = inst
+
+    def _finish(self, inst: dict, status: str, error: Optional[str]=None) -> None:
+        inst["status"] = status; inst["error"] = error; self._touch(inst)
+        self.live.pop(inst["id"], None); self.stats[status] += 1
+        parent = self.live.get(inst.get("parent") or "")
+        if parent:
+            if status == "done":
+                parent["state"][inst["parent_step"]] = "RESULT"; self._touch(parent); self._advance(parent)
+            else:
+                self._finish(parent, "failed", f"{inst['parent_step']} : sous-chaîne {inst['flow']} en échec ({error})")
+
+    def _advance(self, inst: dict) -> None:
+        fl = self.flows[inst["flow"]]; dag = fl["dag"]
+        adv = can_advance(dag, inst["state"])
+        if adv["complete"]: return self._finish(inst, "done")
+        picks = adv["unblocked"]
+        if fl["strict"] and picks:
+            i = dag["pos"][picks[0]]
+            picks = picks[:1] if all(inst["state"].get(s) == "RESULT" for s in dag["steps"][:i]) else []
+        if fl["single"]: picks = picks[:1]
+        for step in picks:
+            if inst["status"] != "running": return
+            self._dispatch(inst, step)
+        if not picks and not adv["active"] and inst["status"] == "running":
+            self._finish(inst, "failed", "bloqué : " + "; ".join(f"{k} ({', '.join(v)})" for k, v in adv["blocked"].items()))
+
+    def _new_instance(self, iid: str, flow_ref: str, params: dict, parent: Optional[str]=None, parent_step: Optional[str]=None) -> dict:
+        now = _now_ms()
+        self._w("INSERT INTO flow_instances (instance_id, flow_ref, status, parent_id, parent_step, params_json, state_json, created_at, updated_at) "
+                "VALUES (?, ?, 'running', ?, ?, ?, '{}', ?, ?)", iid, flow_ref, parent, parent_step, json.dumps(params, ensure_ascii=False), now, now)
+        inst = {"id": iid, "flow": flow_ref, "state": {}, "params": params, "parent": parent, "parent_step": parent_step, "status": "running"}
+        self.live[iid] = inst
+        return inst
+
+    def _dispatch(self, inst: dict, step: str) -> None:
+        fl = self.flows[inst["flow"]]; meta = fl["steps"].get(step) or {}
+        inst["state"][step] = "RUNNING"; self._touch(inst)
+        if meta.get("use_chain"):
+            sub = f"{fl['bid']}:{meta['use_chain']}"
+            if sub not in self.flows: return self._finish(inst, "failed", f"{step} : use_chain inconnu {sub}")
+            self._advance(self._new_instance(f"{inst['id']}/{step}", sub, inst["params"], inst["id"], step))
+            return
+        roles = meta.get("roles") or []
+        if not roles: return self._finish(inst, "failed", f"{step} : aucun rôle (CAPAMAP / gate_select)")
+        agent = _role_slug(inst["params"].get("agents", {}).get(roles[0]) or roles[0])
+        now = _now_ms(); deadline = now + fl["timeout_ms"] if fl["timeout_ms"] else None
+        mid = self._notify(inst, agent, f"arkaflow://{inst['id']}/{step}",
+                           {"flow_ref": inst["flow"], "step": step, "instance": inst["id"], "action_key": meta.get("action_key"), "roles": roles})
+        self._w("INSERT INTO flow_steps (instance_id, step, message_id, to_agent, state, applied, dispatched_at, deadline_at) VALUES (?, ?, ?, ?, 'dispatched', 0, ?, ?) "
+                "ON CONFLICT(instance_id, step) DO UPDATE SET message_id=excluded.message_id, to_agent=excluded.to_agent, state='dispatched', "
+                "applied=0, escalations=0, result_json=NULL, dispatched_at=excluded.dispatched_at, deadline_at=excluded.deadline_at, completed_at=NULL",
+                inst["id"], step, mid, agent, now, deadline)
+        if deadline: heapq.heappush(self.deadlines, (deadline, inst["id"], step, 0))
+        self.stats["dispatched"] += 1
+
+    def _notify(self, inst: dict, agent: str, pointer: str, metadata: dict) -> str:
+        now = _now_ms(); mid = f"msg-{now}-{secrets.token_hex(4)}"
+        self._w("INSERT INTO notify_events (message_id, type, v, ts, project, to_agent, session, provider, session_prefix, resource_pointer, "
+                "constraints_json, metadata_json, state, attempts, created_at, updated_at) VALUES (?, 'notify', 1, ?, ?, ?, NULL, ?, ?, ?, NULL, ?, 'queued', 0, ?, ?)",
+                mid, now, inst["params"].get("project") or self.project, agent, self.provider, self.session_prefix, pointer,
+                json.dumps(metadata, ensure_ascii=False), now, now)
+        return mid
+
+    # -- boucle --
+    def adopt(self) -> int:
+        # Instances pending (start) et running (reprise après arrêt) pas encore suivies par ce process
+        rows = self.db.execute("SELECT instance_id, flow_ref, status, parent_id, parent_step, params_json, state_json FROM flow_instances "
+                               "WHERE status IN ('pending', 'running') ORDER BY created_at").fetchall()
+        new = []
+        for iid, ref, status, parent, pstep, params, state in rows:
+            if iid in self.live: continue
+            inst = {"id": iid, "flow": ref, "state": json.loads(state or "{}"), "params": json.loads(params or "{}"),
+                    "parent": parent, "parent_step": pstep, "status": "running"}
+            self.live[iid] = inst; new.append(inst)
+            if status == "running": self.stats["resumed"] += 1
+        for inst in new:
+            if inst["flow"] not in self.flows: self._finish(inst, "failed", f"flow inconnu : {inst['flow']}"); continue
+            self._touch(inst)
+        ids = {i["id"] for i in new}
+        for iid, step, deadline, esc in self.db.execute("SELECT instance_id, step, deadline_at, escalations FROM flow_steps "
+                                                        "WHERE state IN ('dispatched', 'timeout') AND deadline_at IS NOT NULL"):
+            if iid in ids: heapq.heappush(self.deadlines, (deadline, iid, step, esc))
+        for inst in new:
+            if inst["status"] == "running": self._advance(inst)
+        return len(new)
+
+    def collect(self) -> None:
+        # Résultats rendus (complete) et notify en échec définitif (dead / failed côté daemon)
+        done = self.db.execute("SELECT instance_id, step, state, result_json FROM flow_steps "
+                               "WHERE state IN ('result', 'failed') AND applied=0").fetchall()
+        lost = self.db.execute("SELECT fs.instance_id, fs.step, ne.state, ne.error_last FROM flow_steps fs JOIN notify_events ne "
+                               "ON ne.message_id=fs.message_id WHERE fs.state IN ('dispatched', 'timeout') AND ne.state IN ('dead', 'failed')").fetchall()
+        touched: Dict[str, dict] = {}
+        for iid, step, state, res in done:
+            self._w("UPDATE flow_steps SET applied=1 WHERE instance_id=? AND step=? AND state=?", iid, step, state)
+            inst = self.live.get(iid)
+            if not inst or inst["state"].get(step) != "RUNNING": continue
+            if state == "result":
+                inst["state"][step] = "RESULT"; self._touch(inst); touched[iid] = inst; self.stats["completed"] += 1
+            else:
+                self.stats["failed_steps"] += 1; inst["state"][step] = "FAILED"
+                self._finish(inst, "failed", f"{step} : échec rendu par l'agent ({res or 'sans détail'})")
+        for iid, step, nstate, err in lost:
+            self._w("UPDATE flow_steps SET state='failed', applied=1 WHERE instance_id=? AND step=?", iid, step)
+            inst = self.live.get(iid)
+            if inst and inst["state"].get(step) == "RUNNING":
+                self.stats["failed_steps"] += 1; inst["state"][step] = "FAILED"
+                self._finish(inst, "failed", f"{step} : notify {nstate} ({err or 'sans détail'})")
+        for inst in touched.values():
+            if inst["status"] == "running": self._advance(inst)
+
+    def expire(self, now: int) -> None:
+        # Échéance timeout_sec dépassée : escalade au niveau suivant (on_timeout), le step reste en attente
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, iid, step, level = heapq.heappop(self.deadlines)
+            inst = self.live.get(iid)
+            if not inst or inst["state"].get(step) != "RUNNING": continue
+            chain = [x for x in ((inst["params"].get("mission_owner") if x == "mission_owner" else x) for x in self.escalate_to) if x]
+            fl = self.flows[inst["flow"]]
+            if level >= len(chain):
+                self._w("UPDATE flow_steps SET state='timeout', deadline_at=NULL WHERE instance_id=? AND step=?", iid, step); continue
+            self._notify(inst, _role_slug(chain[level]), f"arkaflow://{iid}/{step}",
+                         {"flow_ref": inst["flow"], "step": step, "instance": iid, "escalation": level + 1, "reason": "timeout"})
+            nxt = now + fl["timeout_ms"] if level + 1 < len(chain) else None
+            self._w("UPDATE flow_steps SET state='timeout', escalations=?, deadline_at=? WHERE instance_id=? AND step=?", level + 1, nxt, iid, step)
+            if nxt: heapq.heappush(self.deadlines, (nxt, iid, step, level + 1))
+            self.stats["escalations"] += 1
+
+    def _changed(self) -> bool:
+        v = self.db.execute("PRAGMA data_version").fetchone()[0]
+        if v == self._data_version: return False
+        self._data_version = v; return True
+
+    async def run(self, follow: bool=False) -> dict:
+        import asyncio, signal, socket
+        loop = asyncio.get_running_loop(); wake = asyncio.Event(); stop = asyncio.Event()
+        class Wake(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr): wake.set()
+        self._lease()
+        sock_p = _wake_path(self.db_path); sock_p.unlink(missing_ok=True)
+        ws = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM); ws.bind(str(sock_p))
+        transport, _ = await loop.create_datagram_endpoint(Wake, sock=ws)
+        for sig in (signal.SIGINT, signal.SIGTERM): loop.add_signal_handler(sig, lambda: (stop.set(), wake.set()))
+        t0 = time.monotonic()
+        try:
+            self._changed(); self.adopt(); self.collect(); self._commit()
+            while not stop.is_set() and (self.live or follow):
+                now = _now_ms()
+                timeout = self.poll if not self.deadlines else max(0.0, min(self.poll, (self.deadlines[0][0] - now) / 1000))
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+                if self._changed():
+                    if follow: self.adopt()
+                    self.collect()
+                self.expire(_now_ms())
+                self._commit()
+        finally:
+            transport.close(); sock_p.unlink(missing_ok=True)
+            self.db.execute("DELETE FROM notify_leases WHERE lease_id=? AND holder_pid=?", (RUN_LEASE, os.getpid()))
+        return {**self.stats, "in_flight": len(self.live), "elapsed_s": round(time.monotonic() - t0, 3), "db": str(self.db_path)}
+
+def start_instances(con, flows: Dict[str, dict], flow_ref: str, count: int, params: dict, prefix: Optional[str]=None) -> List[str]:
+    if flow_ref not in flows: raise SystemExit(f"[ERR] flow inconnu : {flow_ref}")
+    now = _now_ms(); base = prefix or f"run-{now}-{secrets.token_hex(3)}"
+    ids = [f"{base}-{i}" if count > 1 else base for i in range(count)]
+    con.execute("BEGIN IMMEDIATE")
+    con.executemany("INSERT INTO flow_instances (instance_id, flow_ref, status, params_json, state_json, created_at, updated_at) "
+                    "VALUES (?, ?, 'pending', ?, '{}', ?, ?)", [(i, flow_ref, json.dumps(params, ensure_ascii=False), now, now) for i in ids])
+    con.execute("COMMIT")
+    return ids
+
+def complete_step(con, locks: dict, message_id: Optional[str]=None, instance: Optional[str]=None, step: Optional[str]=None,
+                  ok: bool=True, output: Any=None, agent: Optional[str]=None) -> dict:
+    if message_id: where, key = "message_id=?", (message_id,)
+    elif instance and step: where, key = "instance_id=? AND step=?", (instance, step)
+    else: raise SystemExit("[ERR] --message ou --instance + --step requis")
+    row = con.execute(f"SELECT instance_id, step, to_agent, state FROM flow_steps WHERE {where}", key).fetchone()
+    if not row: raise SystemExit("[ERR] step dispatché introuvable")
+    if row[3] not in ("dispatched", "timeout"): raise SystemExit(f"[ERR] step déjà rendu ({row[3]})")
+    if (locks.get("write_guard") or {}).get("enforce_selected_actor_only") and _role_slug(agent or "") != row[2]:
+        raise SystemExit(f"[ERR] write_guard : seul l'agent sélectionné ({row[2]}) peut rendre ce step (--agent)")
+    con.execute("BEGIN IMMEDIATE")
+    cur = con.execute(f"UPDATE flow_steps SET state=?, result_json=?, completed_at=?, applied=0 WHERE {where} AND state IN ('dispatched', 'timeout')",
+                      ("result" if ok else "failed", json.dumps(output, ensure_ascii=False) if output is not None else None, _now_ms(), *key))
+    con.execute("COMMIT")
+    return {"instance": row[0], "step": row[1], "state": "result" if ok else "failed", "updated": cur.rowcount}
+
+def _kv(items: List[str]) -> dict:
+    # ["A=1,B=2", "C=3"] -> {"A": "1", "B": "2", "C": "3"}
+    out = {}
+    for it in items or []:
+        for part in it.split(","):
+            if not part.strip(): continue
+            k, eq, v = part.partition("=")
+            if not eq: raise SystemExit(f"[ERR] CLE=VALEUR attendu : {part}")
+            out[k.strip()] = v.strip()
+    return out
+
+# ── Profilage (--profile[=FICHIER]) ─────────────────────────────────────────
+# Même profileur que arkarouting (_profile_arg, _profiled : cProfile -> FICHIER + Sampler -> FICHIER.collapsed) ;
+# le module voisin n'est importé que si --profile est demandé.
+def _arkarouting():
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "ARKA_ROUTING"))
+    import arkarouting
+    return arkarouting
+
 def main():
+    if any(a=="--profile" or a.startswith("--profile=") for a in sys.argv[1:]):
+        ar = _arkarouting()
+        return ar._profiled(_main, ar._profile_arg(sys.argv), "arkaflow")
+    _main()
+
+def _main():
     ap = argparse.ArgumentParser(prog="arkaflow", description="Résolveur & CLI ARKA_FLOW")
     ap.add_argument("--flow-dir", default=None)
+    # --profile[=FICHIER] : retiré d'argv avant argparse (voir main, profileur d'arkarouting)
     sp = ap.add_subparsers(dest="cmd")
 
     sp_cat = sp.add_parser("catalog", help="Lister les workflows (manifest)")
@@ -84,9 +798,80 @@ def main():
     sp_load = sp.add_parser("load", help="Charger un flow export")
     sp_load.add_argument("--flow", required=True)
 
+    sp_adv = sp.add_parser("can-advance", help="Steps débloqués d'un flow pour un état donné (préconditions compilées)")
+    sp_adv.add_argument("--flow", required=True)
+    sp_adv.add_argument("--state", default="{}", help='JSON {"Step":"RESULT"|"RUNNING"} ou ["Step",...] ; @fichier ; - = stdin')
+
+    sp.add_parser("check-preconditions", help="Validation statique : cycles, steps inatteignables, prev_step/use_chain inconnus")
+
+    sp_sim = sp.add_parser("simulate", help="Simulation à événements discrets (dimensionnement des rôles)")
+    sp_sim.add_argument("--scenario", default=None, help="YAML/JSON {arrivals, staff, service, instances, seed}")
+    sp_sim.add_argument("--mix", action="append", default=[], help="INTENT=TAUX/h[,INTENT=TAUX/h]")
+    sp_sim.add_argument("--staff", action="append", default=[], help="ROLE=N (default=N)")
+    sp_sim.add_argument("--service", action="append", default=[], help="ROLE=exp:30 | const:V | lognormal:M:ET | uniform:A:B (minutes, default=...)")
+    sp_sim.add_argument("--tags", nargs="*", default=[], help="Tags appliqués aux gate_select de tous les intents")
+    sp_sim.add_argument("--instances", type=int, default=None)
+    sp_sim.add_argument("--seed", type=int, default=None)
+    sp_sim.add_argument("--sweep", default=None, help="ROLE=1,2,3 : une simulation par effectif")
+
+    def inst_args(sp_):
+        sp_.add_argument("--intent", default=None); sp_.add_argument("--flow", default=None, help="flow_ref ID:EXPORT (sinon résolu depuis --intent)")
+        sp_.add_argument("--count", type=int, default=1, help="Nombre d'instances")
+        sp_.add_argument("--id", default=None, help="Identifiant (préfixe si --count > 1)")
+        sp_.add_argument("--project", default=None); sp_.add_argument("--mission-owner", default=None, help="1er niveau d'escalade on_timeout")
+        sp_.add_argument("--agent", action="append", default=[], help="ROLE=AGENT_ID : agent ciblé pour un rôle (défaut : slug du rôle)")
+        sp_.add_argument("--db", default=None, help="Base notify (défaut : $ARKA_NOTIFY_DB ou ARKA_META/.system/notify/notify.db)")
+    sp_run = sp.add_parser("run", help="Exécuter des instances de flow (asyncio, dispatch via notify_events, reprise sur checkpoint)")
+    inst_args(sp_run)
+    sp_run.add_argument("--follow", action="store_true", help="Rester actif et adopter les instances créées par `start`")
+    sp_run.add_argument("--poll", type=float, default=2.0, help="Filet de sécurité (s) si un réveil est perdu")
+    sp_run.add_argument("--provider", default="codex"); sp_run.add_argument("--session-prefix", default="arka")
+    sp_start = sp.add_parser("start", help="Créer des instances (pending) pour un runner --follow")
+    inst_args(sp_start)
+    sp_done = sp.add_parser("complete", help="Rendre le résultat d'un step dispatché (réveille le runner)")
+    sp_done.add_argument("--message", default=None, help="message_id de la notify"); sp_done.add_argument("--instance", default=None); sp_done.add_argument("--step", default=None)
+    sp_done.add_argument("--fail", action="store_true", help="Step en échec (l'instance échoue)")
+    sp_done.add_argument("--output", default=None, help="Sortie JSON du step")
+    sp_done.add_argument("--agent", default=None, help="Agent qui rend le step (write_guard)")
+    sp_done.add_argument("--db", default=None)
+
     args = ap.parse_args()
     root = _ensure_flow_root(args.flow_dir)
 
+    if args.cmd in ("run", "start"):
+        import asyncio
+        db_p = notify_db_path(root, args.db)
+        flows, _ = compile_run_flows(root)
+        ids = []
+        if args.intent or args.flow:
+            ref = args.flow or resolve_flow(args.intent, [], None, None, root)[0]
+            params = {k: v for k, v in (("project", args.project), ("mission_owner", args.mission_owner), ("intent", args.intent)) if v}
+            if args.agent: params["agents"] = _kv(args.agent)
+            con = open_notify_db(db_p)
+            ids = start_instances(con, flows, ref, max(1, args.count), params, args.id)
+            con.close()
+        if args.cmd == "start":
+            _poke(db_p)
+            print(json.dumps({"instances": ids, "db": str(db_p)}, ensure_ascii=False, indent=2))
+            return
+        runner = FlowRunner(root, db_p, args.project or "arka", args.provider, args.session_prefix, args.poll)
+        res = asyncio.run(runner.run(args.follow))
+        print(json.dumps({"started": len(ids), **res}, ensure_ascii=False, indent=2))
+        if res["failed"]: sys.exit(1)
+        return
+
+    if args.cmd == "complete":
+        db_p = notify_db_path(root, args.db)
+        con = open_notify_db(db_p)
+        try:
+            output = json.loads(args.output) if args.output else None
+        except ValueError:
+            output = args.output
+        res = complete_step(con, _chain_locks(root), args.message, args.instance, args.step, not args.fail, output, args.agent)
+        con.close(); _poke(db_p)
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+        return
+
     if args.cmd == "catalog":
         items = load_manifest(root)
         if args.family: items = [x for x in items if x.get("family")==args.family]
@@ -106,6 +891,61 @@ def main():
         print(json.dumps({"flow":data["id"],"export":data["export"],"file":data["file"],"steps":data["sequence"]}, ensure_ascii=False, indent=2))
         return
 
+    if args.cmd == "can-advance":
+        raw = sys.stdin.read() if args.state=="-" else (Path(args.state[1:]).read_text(encoding="utf-8") if args.state.startswith("@") else args.state)
+        try:
+            state = json.loads(raw or "{}")
+        except ValueError as e:
+            raise SystemExit(f"[ERR] --state JSON invalide : {e}")
+        dags, _ = compile_preconditions(root)
+        if args.flow not in dags: raise SystemExit(f"[ERR] flow inconnu : {args.flow}")
+        try:
+            print(json.dumps(can_advance(dags[args.flow], state), ensure_ascii=False, indent=2))
+        except ValueError as e:
+            raise SystemExit(f"[ERR] {e}")
+        return
+
+    if args.cmd == "check-preconditions":
+        dags, _ = compile_preconditions(root)
+        _, pre, _, _ = _precond_sources(root)
+        keys_p = root/"bricks"/"ARKFLOW-12-ACTION-KEYS.yaml"
+        keys = set((_load_yaml(keys_p).get("keys") or {})) if keys_p.exists() else None
+        issues = validate_preconditions(dags, pre, keys)
+        errors = [x for x in issues if x["level"]=="error"]
+        print(json.dumps({"flows": len(dags), "steps": sum(len(d["steps"]) for d in dags.values()),
+                          "issues": issues, "ok": not errors}, ensure_ascii=False, indent=2))
+        if errors: sys.exit(1)
+        return
+
+    if args.cmd == "simulate":
+        sc = {}
+        if args.scenario:
+            sp_ = Path(args.scenario)
+            if not sp_.exists(): raise SystemExit(f"[ERR] scénario introuvable : {sp_}")
+            sc = _load_yaml(sp_)
+        sc["arrivals"] = dict(sc.get("arrivals") or {})
+        for k, v in _kv(args.mix).items(): sc["arrivals"][k] = {"rate": float(v)}
+        if args.tags:
+            for k, v in sc["arrivals"].items():
+                if not isinstance(v, dict): v = sc["arrivals"][k] = {"rate": v}
+                v["tags"] = list(v.get("tags") or []) + args.tags
+        sc["staff"] = {**(sc.get("staff") or {}), **{k: int(v) for k, v in _kv(args.staff).items()}}
+        sc["service"] = {**(sc.get("service") or {}), **_kv(args.service)}
+        if args.instances is not None: sc["instances"] = args.instances
+        if args.seed is not None: sc["seed"] = args.seed
+        if not args.sweep:
+            print(json.dumps(simulate(root, sc), ensure_ascii=False, indent=2))
+            return
+        role, eq, ns = args.sweep.partition("=")
+        if not eq: raise SystemExit("[ERR] --sweep ROLE=1,2,3")
+        runs = []
+        for n in [int(x) for x in ns.split(",") if x.strip()]:
+            r = simulate(root, {**sc, "staff": {**sc["staff"], role: n}})
+            runs.append({"servers": n, "throughput_per_h": r["throughput_per_h"], "cycle_time_min": r["cycle_time_min"],
+                         "role": r["roles"].get(role), "bottlenecks": r["bottlenecks"][:3]})
+        print(json.dumps({"sweep": role, "runs": runs}, ensure_ascii=False, indent=2))
+        return
+
     ap.print_help()
 
 if __name__ == "__main__":
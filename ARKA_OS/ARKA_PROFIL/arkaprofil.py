@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import os, re, sys, json, time, argparse, posixpath
+from pathlib import Path
+from typing import Optional, List, Tuple, Dict, Any
+import yaml
+
+# Sources de la décision (ARKPR07 : check_action puis check_paths, deny > allow)
+AUTHZ_BRICKS = ("ARKPR03-ACTION-SETS", "ARKPR04-PATH-SETS", "ARKPR05-RIGHTS", "ARKPR07-AUTHZ-POLICY", "ARKPR08-PROFILES-CATALOG")
+PATH_MEMO = 4096  # décisions de chemin mémorisées par bundle de droits (vidé d'un coup quand plein)
+_NEVER = re.compile(r"(?!)").match
+
+def _load_yaml(p: Path) -> dict:
+    return yaml.load(p.read_text(encoding="utf-8"), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+
+def _ensure_profil_root(profil_dir: Optional[str]) -> Path:
+    if profil_dir:
+        base = Path(profil_dir).resolve()
+    elif os.environ.get("ARKA_PROFIL_DIR"):
+        base = Path(os.environ["ARKA_PROFIL_DIR"]).resolve()
+    else:
+        base = Path(__file__).resolve().parent
+    if not base.exists():
+        raise SystemExit(f"[ERR] ARKA_PROFIL introuvable : {base}")
+    return base
+
+def _brick_paths(profil_root: Path) -> Dict[str, Path]:
+    # PROFILES00-INDEX (entrées à la racine) ; bricks/<ID>.yaml à défaut
+    idx_p = profil_root / "PROFILES00-INDEX.yaml"
+    idx = _load_yaml(idx_p) if idx_p.exists() else {}
+    reg = idx.get("registry") if isinstance(idx.get("registry"), dict) else idx
+    return {b: profil_root / ((reg.get(b) or {}).get("file") or f"bricks/{b}.yaml") for b in AUTHZ_BRICKS}
+
+def _exports(p: Path) -> dict:
+    return (_load_yaml(p).get("exports") or {}) if p.exists() else {}
+
+def norm_path(path: str) -> str:
+    # Chemins relatifs à ARKA_META (préfixe ARKA_META/ toléré) ; normpath neutralise "x/../.." avant le match
+    p = posixpath.normpath(str(path).replace("\\", "/"))
+    return p[len("ARKA_META/"):] if p.startswith("ARKA_META/") else p
+
+def glob_rx(g: str) -> str:
+    # ** = zéro ou plusieurs segments, * et ? restent dans un segment ; "dir/**" couvre tout sous dir/
+    g = norm_path(g); out = []; i = 0
+    while i < len(g):
+        if g.startswith("**/", i): out.append("(?:.*/)?"); i += 3
+        elif g.startswith("**", i): out.append(".*"); i += 2
+        elif g[i]=="*": out.append("[^/]*"); i += 1
+        elif g[i]=="?": out.append("[^/]"); i += 1
+        else: out.append(re.escape(g[i])); i += 1
+    return "".join(out)
+
+def _union(globs: List[str]):
+    # Une regex combinée (alternation ancrée) par ensemble de globs
+    return re.compile("(?:" + "|".join(glob_rx(g) for g in globs) + r")\Z").match if globs else _NEVER
+
+class Authz:
+    # Décision compilée : bits d'action_key par bundle de droits, une regex combinée allow/deny par bundle,
+    # rôle (profil ARKPR08 ou id de droits ARKPR05) -> bundle. Lecture seule une fois compilé.
+    def __init__(self):
+        self.bits: Dict[str, int] = {}                 # action_key -> bit
+        self.action_sets: Dict[str, int] = {}          # set -> masque
+        self.path_sets: Dict[str, Any] = {}            # set (allow ou deny) -> match
+        self.bundles: Dict[str, list] = {}             # droits -> [masque, allow, deny, mémo, spec]
+        self.roles: Dict[str, list] = {}               # rôle -> bundle
+        self.role_rights: Dict[str, str] = {}
+        self.issues: List[dict] = []
+
+    def _path_ok(self, b: list, path: str) -> bool:
+        memo = b[3]; r = memo.get(path)
+        if r is None:
+            n = norm_path(path)
+            r = b[1](n) is not None and b[2](n) is None
+            if len(memo) >= PATH_MEMO: memo.clear()
+            memo[path] = r
+        return r
+
+    def check(self, role: str, action: str, path: Any=None) -> bool:
+        # path : chaîne, liste (toutes les sorties doivent passer) ou None (action seule)
+        b = self.roles.get(role)
+        if b is None or not b[0] & self.bits.get(action, 0): return False
+        if path is None: return True
+        if isinstance(path, str): return self._path_ok(b, path)
+        return all(self._path_ok(b, p) for p in path)
+
+    def check_many(self, checks: List[Any]) -> List[bool]:
+        # [{"role","action","path"}] ou [[role, action, path], ...]
+        out = []; ck = self.check
+        for c in checks:
+            if isinstance(c, dict): out.append(ck(c.get("role"), c.get("action"), c.get("path")))
+            else: out.append(ck(*c))
+        return out
+
+    def explain_many(self, checks: List[Any]) -> List[dict]:
+        # mêmes entrées que check_many (clés en plus ignorées)
+        ex = self.explain
+        return [ex(c.get("role"), c.get("action"), c.get("path")) if isinstance(c, dict) else ex(*c) for c in checks]
+
+    def explain(self, role: str, action: str, path: Any=None) -> dict:
+        res: Dict[str, Any] = {"role": role, "action": action, "path": path, "allowed": False}
+        b = self.roles.get(role)
+        if b is None: return {**res, "reason": "rôle inconnu"}
+        spec = b[4]; res["rights"] = self.role_rights[role]
+        bit = self.bits.get(action, 0)
+        if not bit: return {**res, "reason": "action_key inconnue des action_sets"}
+        via = [s for s in spec["action_sets"] if self.action_sets.get(s, 0) & bit]
+        if not b[0] & bit:
+            denied = [s for s in spec["deny_actions"] if self.action_sets.get(s, 0) & bit]
+            return {**res, "reason": f"action refusée (deny_actions: {', '.join(denied)})" if denied else "action hors action_sets"}
+        res["action_sets"] = via
+        for p in ([] if path is None else [path] if isinstance(path, str) else path):
+            n = norm_path(p)
+            deny = [s for s in spec["deny_paths"] if self.path_sets.get(s, _NEVER)(n)]
+            if deny: return {**res, "reason": f"chemin refusé (deny_paths: {', '.join(deny)}) : {p}"}
+            allow = [s for s in spec["allow_paths"] if self.path_sets.get(s, _NEVER)(n)]
+            if not allow: return {**res, "reason": f"chemin hors allow_paths : {p}"}
+            res.setdefault("allow_paths", {})[p] = allow
+        return {**res, "allowed": True, "reason": "ok"}
+
+    def summary(self) -> dict:
+        return {"roles": len(self.roles), "rights": len(self.bundles), "action_keys": len(self.bits),
+                "action_sets": len(self.action_sets), "path_sets": len(self.path_sets), "issues": self.issues}
+
+def compile_authz(profil_root: Path) -> Tuple[Authz, List[Path]]:
+    paths = _brick_paths(profil_root)
+    acts = _exports(paths["ARKPR03-ACTION-SETS"]).get("action_sets") or {}
+    pth = _exports(paths["ARKPR04-PATH-SETS"])
+    rights = _exports(paths["ARKPR05-RIGHTS"]).get("rights") or {}
+    profiles = _exports(paths["ARKPR08-PROFILES-CATALOG"]).get("profiles") or {}
+    az = Authz()
+    for name, keys in acts.items():
+        m = 0
+        for k in keys or []:
+            if k not in az.bits: az.bits[k] = 1 << len(az.bits)
+            m |= az.bits[k]
+        az.action_sets[name] = m
+    globs: Dict[str, List[str]] = {}
+    for kind in ("path_sets", "deny_sets"):
+        for name, gl in (pth.get(kind) or {}).items():
+            globs[name] = [str(g) for g in gl or []]
+            az.path_sets[name] = _union(globs[name])
+    for rid, r in rights.items():
+        r = r or {}
+        spec = {k: [str(x) for x in (r.get(k) or [])] for k in ("action_sets", "deny_actions", "allow_paths", "deny_paths")}
+        for k, known in (("action_sets", az.action_sets), ("deny_actions", az.action_sets), ("allow_paths", globs), ("deny_paths", globs)):
+            for s in spec[k]:
+                if s not in known: az.issues.append({"level": "error", "rights": rid, "msg": f"{k}: set inconnu {s}"})
+        mask = 0
+        for s in spec["action_sets"]: mask |= az.action_sets.get(s, 0)
+        for s in spec["deny_actions"]: mask &= ~az.action_sets.get(s, 0)  # deny_actions > allow_actions
+        allow = [g for s in spec["allow_paths"] for g in globs.get(s, [])]
+        deny = [g for s in spec["deny_paths"] for g in globs.get(s, [])]
+        az.bundles[rid] = [mask, _union(allow), _union(deny), {}, spec]
+        az.roles[rid] = az.bundles[rid]; az.role_rights[rid] = rid
+    for pid, p in profiles.items():
+        p = p or {}
+        rid = p.get("rights") or str(p.get("right_ref") or "").rpartition(":")[2]
+        if rid not in az.bundles:
+            az.issues.append({"level": "error", "profile": pid, "msg": f"droits inconnus {rid or '(aucun)'}"}); continue
+        az.roles[pid] = az.bundles[rid]; az.role_rights[pid] = rid
+    return az, list(paths.values())
+
+def _json_arg(raw: str) -> Any:
+    # JSON inline, @fichier ou - (stdin) ; JSON Lines accepté
+    text = sys.stdin.read() if raw=="-" else (Path(raw[1:]).read_text(encoding="utf-8") if raw.startswith("@") else raw)
+    try:
+        return json.loads(text or "[]")
+    except ValueError:
+        try:
+            return [json.loads(ln) for ln in text.splitlines() if ln.strip()]
+        except ValueError as e:
+            raise SystemExit(f"[ERR] JSON invalide : {e}")
+
+def main():
+    ap = argparse.ArgumentParser(prog="arkaprofil", description="ARKA_PROFIL — décisions d'autorisation compilées (rôle, action_key, chemin)")
+    ap.add_argument("--profil-dir", default=None)
+    sp = ap.add_subparsers(dest="cmd")
+    sp_chk = sp.add_parser("check", help="Une décision expliquée (exit 1 si refusée)")
+    sp_chk.add_argument("--role", required=True, help="Profil ARKPR08 (ex. lead-dev-batisseur) ou droits ARKPR05 (ex. lead_dev_rights)")
+    sp_chk.add_argument("--action", required=True, help="action_key (ex. TICKET_CREATE)")
+    sp_chk.add_argument("--path", action="append", default=None, help="Chemin de sortie (répétable : tous doivent passer)")
+    sp_bulk = sp.add_parser("check-bulk", help="Décisions en masse")
+    sp_bulk.add_argument("--checks", default="-", help='[{"role","action","path"}] ou [[role,action,path]] ; JSON Lines ; @fichier ; - = stdin')
+    sp_bulk.add_argument("--explain", action="store_true", help="Raison de chaque décision (plus lent)")
+    sp.add_parser("roles", help="Rôles compilés (droits, nb d'action_keys) + incohérences des briques")
+    args = ap.parse_args()
+    root = _ensure_profil_root(args.profil_dir)
+    az, _ = compile_authz(root)
+
+    if args.cmd == "check":
+        path = args.path[0] if args.path and len(args.path)==1 else args.path
+        res = az.explain(args.role, args.action, path)
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+        if not res["allowed"]: sys.exit(1)
+        return
+
+    if args.cmd == "check-bulk":
+        checks = _json_arg(args.checks)
+        if not isinstance(checks, list): raise SystemExit("[ERR] liste de décisions attendue")
+        t0 = time.perf_counter()
+        res = az.explain_many(checks) if args.explain else az.check_many(checks)
+        dt = time.perf_counter() - t0
+        n_ok = sum(1 for r in res if (r["allowed"] if args.explain else r))
+        print(json.dumps({"results": res, "allowed": n_ok, "denied": len(res) - n_ok,
+                          "us_per_check": round(dt * 1e6 / len(res), 3) if res else None}, ensure_ascii=False, indent=2))
+        return
+
+    if args.cmd == "roles":
+        mask_n = lambda m: bin(m).count("1")
+        print(json.dumps({**az.summary(), "roles": {r: {"rights": az.role_rights[r], "action_keys": mask_n(b[0])} for r, b in az.roles.items()}},
+                         ensure_ascii=False, indent=2))
+        if any(x["level"]=="error" for x in az.issues): sys.exit(1)
+        return
+
+    ap.print_help()
+
+if __name__ == "__main__":
+    main()
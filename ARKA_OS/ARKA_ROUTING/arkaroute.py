@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Point d'entrée CLI léger d'ARKA_ROUTING : relaie la commande au daemon local (serve --socket) avec
+# json + socket seulement. Sinon importe arkarouting (bytecode .pyc en cache, contrairement à un
+# `python arkarouting.py` compilé à chaque appel) et l'exécute in-process.
+import os, sys, json
+
+SOCKET_ENV = "ARKA_ROUTING_SOCKET"
+# Commandes relayables -> paramètres --clé=valeur acceptés ; positionnels -> paramètre liste
+DAEMON_ARGS = {"ping": (), "catalog": ("facet","grep","client"), "lookup": ("term",), "suggest": ("term","max_distance","limit"), "resolve": ("intent","term","client"), "get": (), "refs": ("uri","impact","dangling"), "stats": (), "tenants": (), "rule": (), "authz": ("role","action","path","checks"), "changes": ("since","wait","epoch")}
+DAEMON_POSITIONAL = {"get": "uri", "rule": "ref"}
+
+def _socket_path(root, explicit=None) -> str:
+    # chemins en str : pathlib n'est pas importé par le relais (coût de démarrage)
+    return explicit or os.environ.get(SOCKET_ENV) or os.path.join(root, ".cache", "arkarouting.sock")
+
+def _daemon_call(sock, method: str, params: dict) -> dict:
+    import socket
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.settimeout(0.2); s.connect(str(sock)); s.settimeout(30)
+        s.sendall(json.dumps({"jsonrpc":"2.0","id":1,"method":method,"params":params}).encode("utf-8") + b"\n")
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(1 << 16)
+            if not chunk: break
+            buf += chunk
+    finally:
+        s.close()
+    return json.loads(buf)
+
+def _print(cmd: str, res, default=None) -> None:
+    print(json.dumps(res, ensure_ascii=False, default=default, **({} if cmd=="ping" else {"indent": 2})))
+
+def _forward(argv) -> bool:
+    # Relais vers le daemon (serve --socket) sans argparse ni yaml ; False => exécution in-process
+    if os.environ.get("ARKA_ROUTING_NO_DAEMON") or "--no-daemon" in argv: return False
+    routing_dir = None; cmd = None; params = {}
+    it = iter(argv)
+    for tok in it:
+        if cmd is None and tok in DAEMON_ARGS: cmd = tok; continue
+        if cmd in DAEMON_POSITIONAL and not tok.startswith("-"):
+            params.setdefault(DAEMON_POSITIONAL[cmd], []).append(tok); continue
+        if not tok.startswith("--"): return False
+        k, eq, v = tok[2:].partition("=")
+        if not eq: v = next(it, None)
+        if v is None or v.startswith("--"): return False  # drapeau booléen : laissé à argparse
+        if k=="routing-dir" and cmd is None: routing_dir = v
+        elif k=="tenant": params["tenant"] = v
+        elif cmd and k in DAEMON_ARGS[cmd]: params[k] = v
+        else: return False
+    if not cmd or (cmd in ("lookup", "suggest") and "term" not in params): return False
+    if cmd in DAEMON_POSITIONAL and DAEMON_POSITIONAL[cmd] not in params: return False
+    sock = _socket_path(os.path.realpath(routing_dir or os.path.dirname(os.path.abspath(__file__))))
+    if not os.path.exists(sock): return False
+    try:
+        resp = _daemon_call(sock, cmd, params)
+    except (OSError, ValueError):
+        return False
+    if "result" not in resp: return False
+    _print(cmd, resp["result"])
+    return True
+
+def main():
+    argv = sys.argv[1:]
+    # --profile : toujours in-process (on profile le registre, pas le relais)
+    if not any(a=="--profile" or a.startswith("--profile=") for a in argv) and _forward(argv): return
+    import arkarouting
+    arkarouting.main(relay=False)
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,110 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-import os, re, json, argparse, sys
-from http.server import BaseHTTPRequestHandler, HTTPServer
+# Imports lourds (yaml, http.server, argparse, socketserver) chargés à la demande. Le relais CLI -> daemon
+# vit dans arkaroute.py (point d'entrée léger) : un appel relayé ne compile ni n'importe ce module.
+import os, json, sys, time, threading
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
-import yaml
+try:
+    import arkaroute as _client
+except ImportError:  # module chargé par chemin (spec_from_file_location) : compagnon du même dossier
+    sys.path.insert(0, str(Path(__file__).resolve().parent)); import arkaroute as _client
+from arkaroute import SOCKET_ENV, DAEMON_ARGS, DAEMON_POSITIONAL, _socket_path, _daemon_call, _forward
 
-def _load_yaml(p: Path) -> dict:
+# Motifs collectés par le parcours unique d'os_root (Registry.tree)
+TREE_PATTERNS = ("*.md", "*.yaml", "*.yml")
+
+class NotFound(LookupError):
+    # Ressource inconnue (tenant, flow) -> 404 ; un KeyError/IndexError interne reste une erreur 500
+    pass
+
+class ProfileDisabled(Exception):
+    # /debug/profile sans serve --debug-profile -> 403
+    pass
+
+class ProfileBusy(Exception):
+    # /debug/profile pendant un autre profil -> 409
+    pass
+
+class Relayed(Exception):
+    # Erreur du registre du superviseur pré-fork, relayée par un worker avec son statut d'origine
+    def __init__(self, msg: str, status: int):
+        super().__init__(msg); self.status = status
+
+# Exceptions -> statut HTTP, partagé par do_GET et do_POST (premier type qui correspond ; sinon 500)
+HTTP_ERRORS = ((NotFound, 404), (ProfileDisabled, 403), (ProfileBusy, 409), (ValueError, 400))
+
+def _http_status(e: Exception) -> int:
+    if isinstance(e, Relayed): return e.status
+    return next((c for t, c in HTTP_ERRORS if isinstance(e, t)), 500)
+
+_STAT_CACHE: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any, Tuple[str, bytes]]] = {}
+# Valeurs parsées internées par contenu (kind, empreinte) : un fichier identique dans plusieurs racines
+# (serve multi-tenant) n'est parsé et gardé qu'une fois. Compteur de chemins par empreinte : une valeur
+# qu'aucun chemin ne référence plus est libérée. Les valeurs parsées sont partagées : lecture seule.
+_BY_DIGEST: Dict[Tuple[str, bytes], List[Any]] = {}  # (kind, empreinte) -> [valeur, nb de chemins]
+_INTERN_STATS = {"parsed": 0, "shared": 0}
+_INTERN_LOCK = threading.Lock()
+_UNPARSED = object()
+
+def _stat_cached(p: Path, kind: str, parse):
+    # Cache par (mtime, taille) : un process long (serve) ne re-parse que les fichiers modifiés
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    key = (kind, str(p)); sig = (st.st_mtime_ns, st.st_size)
+    hit = _STAT_CACHE.get(key)
+    if hit and hit[0]==sig: return hit[1]
+    try:
+        data = p.read_bytes()
+    except OSError:
+        return None
+    import hashlib
+    dk = (kind, hashlib.blake2b(data, digest_size=16).digest())
+    if hit and hit[2]==dk:
+        _STAT_CACHE[key] = (sig, hit[1], dk); return hit[1]  # touché sans changement de contenu
+    # Empreinte, compteurs et _STAT_CACHE mis à jour sous verrou (serve est multi-thread) ; le parse
+    # se fait hors verrou, puis on re-vérifie : un autre thread a pu interner le même contenu entre-temps
+    val = _UNPARSED
+    while True:
+        with _INTERN_LOCK:
+            cur = _STAT_CACHE.get(key)
+            if cur and cur[2]==dk:
+                _STAT_CACHE[key] = (sig, cur[1], dk); return cur[1]
+            ent = _BY_DIGEST.get(dk)
+            if ent:
+                ent[1] += 1; _INTERN_STATS["shared"] += 1
+            elif val is not _UNPARSED:
+                ent = _BY_DIGEST[dk] = [val, 1]; _INTERN_STATS["parsed"] += 1
+            if ent:
+                old = _BY_DIGEST.get(cur[2]) if cur else None
+                if old:
+                    old[1] -= 1
+                    if old[1] <= 0: _BY_DIGEST.pop(cur[2], None)
+                _STAT_CACHE[key] = (sig, ent[0], dk)
+                return ent[0]
+        val = parse(p, data)
+
+def intern_stats() -> dict:
+    return {"files": len(_STAT_CACHE), "unique": len(_BY_DIGEST), **_INTERN_STATS}
+
+def _parse_yaml(p: Path, data: bytes) -> dict:
+    import yaml
     try:
-        return yaml.safe_load(p.read_text(encoding="utf-8")) or {}
+        return yaml.load(data.decode("utf-8"), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
     except Exception:
         return {}
 
+def _load_yaml(p: Path) -> dict:
+    return _stat_cached(p, "yaml", _parse_yaml) or {}
+
+def _cfg_path(root: Path) -> Path:
+    return root / "bricks" / "ARKAROUTING-03-CONFIG.yaml"
+
 def _cfg(root: Path) -> dict:
     # Load config if present; never fail
-    p = root / "bricks" / "ARKAROUTING-03-CONFIG.yaml"
+    p = _cfg_path(root)
     return _load_yaml(p) if p.exists() else {}
 
 def _autodetect_os_root(root: Path) -> Optional[Path]:
@@ -56,9 +146,10 @@ def _paths(root: Path) -> dict:
         paths["agents"] = str(guessed / "ARKA_AGENT")
     return paths
 
-def _frontmatter(md_path: Path) -> dict:
+def _parse_frontmatter(md_path: Path, data: bytes) -> dict:
+    import yaml
     try:
-        txt = md_path.read_text(encoding="utf-8")
+        txt = data.decode("utf-8")
     except Exception:
         return {}
     if not txt.startswith("---"): return {}
@@ -70,6 +161,9 @@ def _frontmatter(md_path: Path) -> dict:
         fm = {}
     return fm
 
+def _frontmatter(md_path: Path) -> dict:
+    return _stat_cached(md_path, "frontmatter", _parse_frontmatter) or {}
+
 # scanners (unchanged)
 def scan_manifest(flow_root: Path) -> List[dict]:
     p = flow_root / "bricks" / "ARKFLOW-00-MANIFEST.yaml"
@@ -101,9 +195,9 @@ def scan_wakeup(os_root: Path) -> Tuple[List[str], Dict[str,List[str]]]:
     aliases = y.get("aliases", {}) if isinstance(y, dict) else {}
     return intents, aliases
 
-def scan_docs(os_root: Path, key: str) -> List[dict]:
+def scan_docs(os_root: Path, key: str, ignore: Optional[Tuple[str, ...]]=None) -> List[dict]:
     docs = []
-    for md in os_root.rglob("*.md"):
+    for md in walk_tree(os_root, ("*.md",), ignore)[0]["*.md"]:
         fm = _frontmatter(md)
         if key in fm and isinstance(fm[key], dict):
             ref = dict(fm[key])
@@ -111,7 +205,7 @@ def scan_docs(os_root: Path, key: str) -> List[dict]:
             docs.append(ref)
     return docs
 
-def scan_agents(agent_root: Path) -> dict:
+def scan_agents(agent_root: Path, ignore: Optional[Tuple[str, ...]]=None) -> dict:
     data = {"experts":{}, "clients":{}}
     exp = agent_root / "experts"
     if exp.exists():
@@ -120,13 +214,12 @@ def scan_agents(agent_root: Path) -> dict:
                 data["experts"][d.name] = {"expert": f"experts/{d.name}/expert.yaml", "wakeup": f"experts/{d.name}/wakeup.yaml"}
     cl = agent_root / "clients"
     if cl.exists():
-        for c in cl.iterdir():
-            if c.is_dir():
-                idx = {}
-                for ob in c.rglob("onboarding.yaml"):
-                    aid = ob.parent.name
-                    idx[aid] = str(ob.relative_to(agent_root).as_posix())
-                data["clients"][c.name] = idx
+        # un seul parcours de clients/ (tous clients), regroupé par premier segment
+        for c in sorted(d.name for d in cl.iterdir() if d.is_dir()):
+            data["clients"][c] = {}
+        for ob in walk_tree(cl, ("onboarding.yaml",), ignore)[0]["onboarding.yaml"]:
+            rel = ob.relative_to(agent_root)
+            if len(rel.parts) >= 3: data["clients"][rel.parts[1]][ob.parent.name] = rel.as_posix()
     return data
 
 def scan_capamap(flow_root: Path) -> dict:
@@ -148,12 +241,12 @@ def _term_catalog(core_root: Path, os_root: Path) -> List[dict]:
     intents, aliases = scan_wakeup(os_root)
     return [{"id": it, "aliases": aliases.get(it, [])} for it in intents]
 
-def _intent_from_term(term: str, core_root: Path, os_root: Path) -> Optional[str]:
+def _intent_from_term(term: str, terms: List[dict]) -> Optional[str]:
     term_l = (term or "").lower()
-    for t in _term_catalog(core_root, os_root):
+    for t in terms:
         if t.get("id")==term: return term
     best = None; score_best=0
-    for t in _term_catalog(core_root, os_root):
+    for t in terms:
         sc=0
         for f in ("label","id"):
             v=(t.get(f) or "").lower()
@@ -167,13 +260,127 @@ def _intent_from_term(term: str, core_root: Path, os_root: Path) -> Optional[str
         if sc>score_best: score_best, best = sc, t.get("id")
     return best
 
-def _resolve_intent(intent: str, flow_root: Path) -> Optional[str]:
-    r = scan_router(flow_root)
-    if intent in r: return r[intent]
-    for e in scan_manifest(flow_root):
-        if e.get("intent")==intent:
-            return e.get("flow_ref")
-    return None
+# Recherche approchée (fautes de frappe) : index SymSpell (suppressions du préfixe de chaque clé) sur les
+# id/labels/aliases/tags repliés (minuscules, sans accents, ponctuation -> espace), clés entières et mots.
+# Distance OSA (transposition = 1) bornée par la longueur du mot ; nombre de vérifications borné (budget).
+_FIELD_RANK = {"id": 0, "label": 1, "alias": 2, "tag": 3}
+
+def _fold(s: Any) -> str:
+    import re, unicodedata
+    s = unicodedata.normalize("NFKD", str(s or ""))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", "".join(c for c in s if not unicodedata.combining(c)).lower()).split())
+
+def _osa(a: str, b: str, cap: int) -> int:
+    # Distance d'édition avec transpositions adjacentes, calculée dans la bande |i-j| <= cap ;
+    # cap+1 dès qu'elle dépasse cap
+    if abs(len(a) - len(b)) > cap: return cap + 1
+    if a == b: return 0
+    big = cap + 1; n = len(b)
+    prev2 = None; prev = [j if j <= cap else big for j in range(n + 1)]
+    for i in range(1, len(a) + 1):
+        lo = max(1, i - cap); hi = min(n, i + cap)
+        cur = [big]*(n + 1)
+        if i <= cap: cur[0] = i
+        ca = a[i-1]; row_min = cur[0]
+        for j in range(lo, hi + 1):
+            cb = b[j-1]
+            v = prev[j-1] + (ca != cb)
+            if prev[j] + 1 < v: v = prev[j] + 1
+            if cur[j-1] + 1 < v: v = cur[j-1] + 1
+            if prev2 is not None and j > 1 and ca == b[j-2] and a[i-2] == cb and prev2[j-2] + 1 < v: v = prev2[j-2] + 1
+            cur[j] = v if v < big else big
+            if v < row_min: row_min = v
+        if row_min > cap: return big
+        prev2, prev = prev, cur
+    return prev[n] if prev[n] <= cap else big
+
+class FuzzyIndex:
+    def __init__(self, entries: List[Tuple[str, str, str]], max_distance: int=2, prefix: int=7):
+        # entries : (term_id, champ, valeur) ; clé repliée -> {term_id: (rang, champ)} (meilleur champ)
+        self.max_distance = max_distance; self.prefix = prefix
+        self.keys: Dict[str, Dict[str, Tuple[int, str]]] = {}
+        for tid, field, val in entries:
+            k = _fold(val)
+            if not k: continue
+            for key in {k, *k.split()}:
+                if key != k and len(key) < 3: continue  # mots trop courts : seulement via la clé entière
+                rank = _FIELD_RANK[field] + (key != k)
+                d = self.keys.setdefault(key, {})
+                if rank < d.get(tid, (99,))[0]: d[tid] = (rank, field)
+        self.deletes: Dict[str, List[str]] = {}
+        for key in self.keys:
+            for v in self._variants(key, max_distance): self.deletes.setdefault(v, []).append(key)
+
+    def _variants(self, w: str, d: int) -> set:
+        seen = {w[:self.prefix]}; frontier = [w[:self.prefix]]
+        for _ in range(d):
+            nxt = []
+            for x in frontier:
+                for i in range(len(x)):
+                    y = x[:i] + x[i+1:]
+                    if y not in seen: seen.add(y); nxt.append(y)
+            frontier = nxt
+        return seen
+
+    @staticmethod
+    def budget_for(word: str, max_distance: int) -> int:
+        # 0 faute jusqu'à 3 lettres, 1 jusqu'à 5, puis max_distance
+        return 0 if len(word) <= 3 else min(1, max_distance) if len(word) <= 5 else max_distance
+
+    def _near(self, w: str, max_distance: int, budget: List[int]) -> Dict[str, int]:
+        cap = self.budget_for(w, max_distance); out: Dict[str, int] = {}
+        if w in self.keys: out[w] = 0
+        if not cap: return out
+        for v in self._variants(w, cap):
+            for key in self.deletes.get(v, ()):
+                if key in out: continue
+                if budget[0] <= 0: return out
+                budget[0] -= 1
+                dist = _osa(w, key, cap)
+                if dist <= cap: out[key] = dist
+        return out
+
+    def search(self, query: str, max_distance: Optional[int]=None, limit: int=5, budget: int=500) -> List[dict]:
+        q = _fold(query)
+        if not q: return []
+        md = self.max_distance if max_distance is None else min(int(max_distance), self.max_distance)
+        left = [budget]
+        best: Dict[str, list] = {}  # term_id -> [distance, -mots reconnus, nb de termes de la clé, rang, clé, champ]
+        def offer(tid, cand):
+            if tid not in best or cand < best[tid]: best[tid] = cand
+        for key, dist in self._near(q, md, left).items():
+            for tid, (rank, field) in self.keys[key].items(): offer(tid, [dist, 0, len(self.keys[key]), rank, key, field])
+        words = q.split()
+        if len(words) > 1:
+            per: Dict[str, list] = {}  # term_id -> [somme des distances, mots reconnus, spécificité, rang, clés, champ]
+            for w in words:
+                hits: Dict[str, tuple] = {}
+                for key, dist in self._near(w, md, left).items():
+                    for tid, (rank, field) in self.keys[key].items():
+                        c = (dist, len(self.keys[key]), rank, key, field)
+                        if tid not in hits or c < hits[tid]: hits[tid] = c
+                for tid, (dist, spec, rank, key, field) in hits.items():
+                    acc = per.setdefault(tid, [0, 0, 0, 9, [], field])
+                    acc[0] += dist; acc[1] += 1; acc[2] += spec; acc[4].append(key)
+                    if rank < acc[3]: acc[3] = rank; acc[5] = field
+            for tid, (dist, n, spec, rank, keys, field) in per.items():
+                dist += (len(words) - n) * (md + 1)  # mot sans correspondance : pénalité
+                offer(tid, [dist, -n, spec, rank, " ".join(keys), field])
+        ranked = sorted(best.items(), key=lambda kv: (kv[1], kv[0]))[:max(0, int(limit))]
+        return [{"id": tid, "distance": c[0], "match": c[4], "field": c[5]} for tid, c in ranked]
+
+def _fuzzy_entries(terms: List[dict], aliases: Dict[str, List[str]]) -> List[Tuple[str, str, str]]:
+    out = []
+    for t in terms:
+        tid = t.get("id")
+        if not tid: continue
+        out.append((tid, "id", tid))
+        if t.get("label"): out.append((tid, "label", t["label"]))
+        out += [(tid, "alias", a) for a in (t.get("aliases") or []) if a]
+        out += [(tid, "tag", g) for g in (t.get("tags") or []) if g]
+    for tid, al in (aliases or {}).items():
+        out += [(tid, "alias", a) for a in (al or []) if a]
+    return out
 
 def _first_step_roles(flow_root: Path, registry: dict, flow_ref: str, capamap: dict) -> List[str]:
     if not flow_ref or ":" not in flow_ref: return []
@@ -196,120 +403,1957 @@ def _first_step_roles(flow_root: Path, registry: dict, flow_ref: str, capamap: d
             roles.add(r)
     return sorted(list(roles))
 
-def _agents_for_roles(agent_root: Path, client: Optional[str], roles: List[str]) -> List[dict]:
+def _role_slug(role: str) -> str:
+    import re
+    return re.sub(r'[^a-z0-9]+','-', role.lower()).strip('-')
+
+def _agents_for_roles(ag_idx: dict, client: Optional[str], roles: List[str]) -> List[dict]:
     out=[]
-    exp = scan_agents(agent_root)
-    amap = (exp.get("clients") or {}).get(client, {}) if client else {}
+    amap = (ag_idx.get("clients") or {}).get(client, {}) if client else {}
     for role in roles:
-        rid = re.sub(r'[^a-z0-9]+','-', role.lower()).strip('-')
+        rid = _role_slug(role)
         for aid, ref in (amap or {}).items():
             if aid==rid:
                 out.append({"client": client, "role": role, "onboarding": ref})
     return out
 
+def _agents_with_deps(agent_root: Path, ignore: Optional[Tuple[str, ...]]=None) -> Tuple[dict, List[Path]]:
+    idx = scan_agents(agent_root, ignore)
+    deps = [agent_root/"experts", agent_root/"clients"] + [agent_root/"clients"/c for c in idx["clients"]]
+    for amap in idx["clients"].values():
+        for ref in amap.values():
+            ob = agent_root/ref
+            deps += [ob.parent, ob.parent.parent]
+    return idx, deps
+
+def _sig(p: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+# Cache de résultats lookup/resolve : LRU borné, clé = (version du snapshot, arguments normalisés).
+# Les résultats négatifs (terme inconnu -> intent None) sont mis en cache comme les autres ;
+# tout le cache est vidé d'un coup quand la version du snapshot change.
+class ResultCache:
+    def __init__(self, capacity: int):
+        from collections import OrderedDict
+        self.capacity = max(0, capacity)
+        self._d: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.negative_hits = self.purges = 0
+
+    def get_or(self, key: tuple, build, negative=lambda v: v is None) -> Any:
+        if not self.capacity: return build()
+        with self._lock:
+            if key in self._d:
+                self._d.move_to_end(key); v = self._d[key]
+                self.hits += 1
+                if negative(v): self.negative_hits += 1
+                return v
+            self.misses += 1
+        v = build()
+        with self._lock:
+            self._d[key] = v
+            if len(self._d) > self.capacity: self._d.popitem(last=False)
+        return v
+
+    def purge(self) -> None:
+        with self._lock:
+            if self._d: self.purges += 1
+            self._d.clear()
+
+    def stats(self) -> dict:
+        n = self.hits + self.misses
+        return {"size": len(self._d), "capacity": self.capacity, "hits": self.hits, "misses": self.misses,
+                "negative_hits": self.negative_hits, "hit_rate": round(self.hits / n, 4) if n else None, "purges": self.purges}
+
+# Journal des changements du catalogue (/changes) : chaque lot de changements détecté incrémente la version ;
+# une entrée par item (facette, id, added|removed|modified). Borné (change_log_size) : une version antérieure à
+# l'historique conservé (ou d'une autre époque = autre process) reçoit un marqueur de resync complet.
+# Les attentes (long-poll, SSE) dorment sur une condition ; la vérification des sources est espacée de
+# snapshot_check_ms quel que soit le nombre de consommateurs en attente.
+CHANGES_MAX_WAIT = 25.0  # s, sous le timeout du relais daemon
+
+class ChangeFeed:
+    def __init__(self, capacity: int, ttl: float):
+        import secrets
+        from collections import deque
+        self.capacity = max(1, capacity); self.ttl = ttl
+        self.epoch = secrets.token_hex(4)
+        self.version = 0; self.floor = 0
+        self.log: "deque[tuple]" = deque()  # (version, facette, id, op, item)
+        self._prints: Dict[str, Dict[str, bytes]] = {}  # facette -> {id: empreinte}
+        self._seen: Dict[str, Any] = {}                 # facette -> liste d'items comparée (identité)
+        self._at = 0.0
+        self.cond = threading.Condition()
+
+    @staticmethod
+    def _print(x: Any) -> bytes:
+        import hashlib
+        return hashlib.blake2b(json.dumps(x, sort_keys=True, default=_json_default).encode("utf-8"), digest_size=12).digest()
+
+    def refresh(self, reg: "Registry") -> int:
+        with self.cond:
+            now = time.monotonic()
+            if self.version and now - self._at < self.ttl: return self.version
+            self._at = now
+            batch = []
+            for fid in reg.facet_ids():
+                items = reg.facet(fid)
+                if self._seen.get(fid) is items: continue
+                self._seen[fid] = items
+                cur: Dict[str, bytes] = {}; by: Dict[str, Any] = {}
+                for x in items:
+                    k = next((k for k in FACET_KEYS[fid](reg, x) if k), None)
+                    if k is None or k in cur: continue
+                    cur[k] = self._print(x); by[k] = x
+                old = self._prints.get(fid)
+                self._prints[fid] = cur
+                if old is None: continue  # première lecture de la facette : état de référence
+                batch += [(fid, k, "removed", None) for k in old if k not in cur]
+                batch += [(fid, k, "added" if k not in old else "modified", by[k]) for k, fp in cur.items() if old.get(k)!=fp]
+            if not self.version:
+                self.version = self.floor = 1
+            elif batch:
+                self.version += 1
+                self.log.extend((self.version, *e) for e in batch)
+                while len(self.log) > self.capacity: self.floor = self.log.popleft()[0]
+                self.cond.notify_all()
+            return self.version
+
+    def since(self, version: Any, epoch: Optional[str]=None) -> dict:
+        with self.cond:
+            head = {"version": self.version, "epoch": self.epoch}
+            try:
+                v = int(version)
+            except (TypeError, ValueError):
+                v = -1
+            if (epoch and epoch!=self.epoch) or v < self.floor or v > self.version:
+                return {**head, "resync": True, "changes": []}
+            out = []
+            for e in reversed(self.log):
+                if e[0] <= v: break
+                out.append(e)
+            return {**head, "resync": False, "changes": [{"version": ver, "facet": f, "id": k, "op": op, **({"item": x} if x is not None else {})}
+                                                         for ver, f, k, op, x in reversed(out)]}
+
+    def wait(self, reg: "Registry", version: Any, epoch: Optional[str]=None, timeout: float=0.0) -> dict:
+        deadline = time.monotonic() + min(max(timeout, 0.0), CHANGES_MAX_WAIT)
+        while True:
+            self.refresh(reg)
+            res = self.since(version, epoch)
+            left = deadline - time.monotonic()
+            if res["resync"] or res["changes"] or left <= 0: return res
+            with self.cond:
+                if self.version==res["version"]: self.cond.wait(min(left, max(self.ttl, 0.05)))
+
+    def stats(self) -> dict:
+        return {"version": self.version, "epoch": self.epoch, "floor": self.floor, "log": len(self.log), "capacity": self.capacity}
+
+# Registre mémoire d'une racine ARKA_ROUTING, partagé par tous les transports (HTTP, socket, stdio)
+class Registry:
+    def __init__(self, root: Path):
+        self.root = root
+        paths = _paths(root)
+        self.os_root = Path(paths["os_root"])
+        self.core = Path(paths.get("core") or self.os_root/"ARKA_CORE")
+        self.flow = Path(paths.get("flow") or self.os_root/"ARKA_FLOW")
+        self.agents_root = Path(paths.get("agents") or self.os_root/"ARKA_AGENT")
+        self.profil = Path(paths.get("profil") or self.os_root/"ARKA_PROFIL")
+        self._memo: Dict[str, Tuple[List[Tuple[Path, Any]], Any]] = {}
+        self._keys: Dict[str, Tuple[List[dict], Dict[str, dict]]] = {}
+        self._gen: Dict[str, int] = {}  # nombre de reconstructions par valeur dérivée
+        self._snap: Tuple[Any, int] = (None, 0)  # (signature des sources, version)
+        self._snap_at = 0.0
+        self.results = ResultCache(int(self.opt("result_cache_size", 1024)))
+        self.materialize = bool(self.opt("resolve_table", False))
+        self._table: Tuple[int, Optional[Dict[Tuple[str, Optional[str]], dict]], dict] = (0, None, {})
+        self._table_state: Optional[dict] = None
+        self._table_lock: Any = None
+        self.feed = ChangeFeed(int(self.opt("change_log_size", 10000)), float(self.opt("snapshot_check_ms", 0) or 0) / 1000)
+
+    def derived(self, name: str, build, persist: Optional[Tuple[Path, Any, Any]]=None) -> Any:
+        # build() -> (valeur, chemins sources) ; valeur réutilisée tant que ses sources gardent mtime/taille
+        # persist=(fichier, encode, decode) : la valeur survit au process (rechargée si les sources n'ont pas bougé)
+        hit = self._memo.get(name)
+        if hit and all(_sig(p)==sg for p, sg in hit[0]): return hit[1]
+        if persist and not hit:
+            loaded = self._load_persisted(*persist)
+            if loaded:
+                self._memo[name] = loaded
+                return loaded[1]
+        val, deps = build()
+        self._gen[name] = self._gen.get(name, 0) + 1
+        self._memo[name] = ([(p, _sig(p)) for p in deps], val)
+        if persist: self._save_persisted(self._memo[name], persist[0], persist[1])
+        return val
+
+    def deps(self, name: str) -> List[Path]:
+        return [p for p, _ in (self._memo.get(name) or ([], None))[0]]
+
+    @staticmethod
+    def _load_persisted(path: Path, _enc, dec):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            deps = [(Path(p), tuple(sg) if sg else None) for p, sg in data["deps"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if not all(_sig(p)==sg for p, sg in deps): return None
+        try: return deps, dec(data["value"])
+        except (ValueError, KeyError, TypeError): return None
+
+    @staticmethod
+    def _save_persisted(entry, path: Path, enc) -> None:
+        deps, val = entry
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"deps": [[str(p), sg] for p, sg in deps], "value": enc(val)}, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass  # cache best-effort : le registre mémoire reste valide
+
+    def cache_path(self, key: str, default: str) -> Path:
+        return (self.root / self.opt(key, default)).resolve()
+
+    def opt(self, key: str, default: Any=None) -> Any:
+        return (_cfg(self.root).get("options") or {}).get(key, default)
+
+    def terms(self) -> List[dict]:
+        return self.derived("terms", lambda: (_term_catalog(self.core, self.os_root),
+            [self.core/"bricks"/"ARKA_NOMENCLATURE01.yaml", self.os_root/"wakeup-intents.matrix.yaml"]))
+
+    def router(self) -> Dict[str, str]:
+        return self.derived("router", lambda: (scan_router(self.flow), [self.flow/"router"/"routing.yaml"]))
+
+    def manifest(self) -> List[dict]:
+        return scan_manifest(self.flow)
+
+    def index(self) -> dict:
+        return scan_index(self.flow)
+
+    def capamap(self) -> dict:
+        return scan_capamap(self.flow)
+
+    def agents(self) -> dict:
+        return self.derived("agents", lambda: _agents_with_deps(self.agents_root, walk_ignore(self.root)))
+
+    def tree(self) -> Tuple[Dict[str, List[Path]], List[Path]]:
+        # Un parcours d'os_root pour tous les motifs de TREE_PATTERNS (docs, scanners CI), refait seulement
+        # quand un dossier parcouru (ajout/suppression) ou la config (walk_ignore) change
+        def build():
+            tree, dirs = walk_tree(self.os_root, TREE_PATTERNS, walk_ignore(self.root), self.opt("walk_jobs"))
+            return (tree, dirs), dirs + [_cfg_path(self.root)]
+        return self.derived("tree", build)
+
+    def facet_ids(self) -> List[str]:
+        # Ordre déclaré dans ARKAROUTING-01-FACETS ; facettes inconnues du brick ajoutées ensuite
+        decl = [f.get("id") for f in (_load_yaml(self.root/"bricks"/"ARKAROUTING-01-FACETS.yaml").get("facets") or []) if isinstance(f, dict)]
+        return [f for f in decl if f] + [f for f in FACET_PROVIDERS if f not in decl]
+
+    def facet(self, fid: str) -> List[dict]:
+        # Items d'une seule facette, construits à la demande et mis en cache indépendamment
+        prov = FACET_PROVIDERS.get(fid)
+        return self.derived("facet:"+fid, lambda: prov(self)) if prov else []
+
+    def by_key(self, fid: str) -> Dict[str, dict]:
+        # Index id -> item d'une facette, reconstruit seulement quand la liste d'items change
+        items = self.facet(fid)
+        hit = self._keys.get(fid)
+        if hit and hit[0] is items: return hit[1]
+        idx: Dict[str, dict] = {}
+        for x in items:
+            for k in FACET_KEYS[fid](self, x):
+                if k: idx.setdefault(k, x)
+        self._keys[fid] = (items, idx)
+        return idx
+
+    def term_by_id(self) -> Dict[str, dict]:
+        return self.derived("term_by_id", lambda: ({t.get("id"): t for t in self.terms()},
+            [self.core/"bricks"/"ARKA_NOMENCLATURE01.yaml", self.os_root/"wakeup-intents.matrix.yaml"]))
+
+    def refgraph(self) -> "RefGraph":
+        return self.derived("refgraph", lambda: build_refgraph(self),
+            persist=(self.cache_path("refgraph_cache", "./.cache/refgraph.json"), RefGraph.to_json, RefGraph.from_json))
+
+    def snapshot(self) -> int:
+        # Version des sources de lookup/resolve : change quand terms/router/agents sont reconstruits
+        # ou qu'un fichier FLOW lu directement (manifest, index, CAPAMAP, briques) bouge ; purge le cache.
+        # Option snapshot_check_ms : intervalle minimal entre deux vérifications (stat) des sources.
+        now = time.monotonic(); ttl = float(self.opt("snapshot_check_ms", 0) or 0) / 1000
+        if ttl and self._snap[0] is not None and now - self._snap_at < ttl: return self._snap[1]
+        self._snap_at = now
+        self.terms(); self.router(); self.agents()
+        files = [self.flow/"bricks"/"ARKFLOW-00-MANIFEST.yaml", self.flow/"ARKFLOW00-INDEX.yaml",
+                 self.flow/"bricks"/"ARKFLOW-CAPAMAP01-CAPABILITY-MATRIX.yaml"]
+        files += [self.flow/(meta or {}).get("file","MISSING") for meta in self.index().values()]
+        sig = (tuple(self._gen.get(n, 0) for n in ("terms", "router", "agents")), tuple(_sig(p) for p in files))
+        if sig != self._snap[0]:
+            self._snap = (sig, self._snap[1] + 1)
+            self.results.purge()
+        return self._snap[1]
+
+    def fuzzy(self) -> FuzzyIndex:
+        # Index approché sur la nomenclature (ou la matrice wakeup) + alias de la matrice wakeup
+        def build():
+            _, aliases = scan_wakeup(self.os_root)
+            idx = FuzzyIndex(_fuzzy_entries(self.terms(), aliases), int(self.opt("fuzzy_max_distance", 2)))
+            return idx, [self.core/"bricks"/"ARKA_NOMENCLATURE01.yaml", self.os_root/"wakeup-intents.matrix.yaml"]
+        return self.derived("fuzzy", build)
+
+    def suggest(self, term: Optional[str], max_distance: Any=None, limit: Any=None) -> List[dict]:
+        return self.fuzzy().search(term or "", max_distance, int(limit or self.opt("fuzzy_limit", 5)),
+                                   int(self.opt("fuzzy_budget", 500)))
+
+    def match(self, term: Optional[str]) -> Tuple[Optional[str], Optional[List[dict]]]:
+        # Correspondance exacte/sous-chaîne ; à défaut, meilleur candidat approché (+ classement)
+        hit = _intent_from_term(term, self.terms())
+        if hit or not term: return hit, None
+        cands = self.suggest(term)
+        return (cands[0]["id"] if cands else None), cands
+
+    def intent_for(self, term: str) -> Optional[str]:
+        return self.match(term)[0]
+
+    def cached_match(self, term: Optional[str], version: int) -> Tuple[Optional[str], Optional[List[dict]]]:
+        return self.results.get_or((version, "lookup", term), lambda: self.match(term), negative=lambda v: v[0] is None)
+
+    def cached_intent(self, term: Optional[str], version: int) -> Optional[str]:
+        return self.cached_match(term, version)[0]
+
+    def preconditions(self) -> Dict[str, dict]:
+        # DAG de préconditions par flow (compilés par ARKA_FLOW/arkaflow.py), recompilés si une brique FLOW bouge
+        af = _arkaflow(self.flow)
+        return self.derived("preconditions", lambda: af.compile_preconditions(self.flow))
+
+    def authz(self) -> Any:
+        # Décisions d'autorisation ARKA_PROFIL (compilées par ARKA_PROFIL/arkaprofil.py), recompilées si une brique ARKPR bouge
+        ap = _module(self.profil / "arkaprofil.py", "arkaprofil")
+        return self.derived("authz", lambda: ap.compile_authz(self.profil))
+
+    def flow_ref_for(self, intent: str) -> Optional[str]:
+        r = self.router()
+        if intent in r: return r[intent]
+        for e in self.manifest():
+            if e.get("intent")==intent:
+                return e.get("flow_ref")
+        return None
+
+    def resolve_table(self, version: int) -> Optional[Dict[Tuple[str, Optional[str]], dict]]:
+        # Table (intent, client) -> résultat de resolve, rafraîchie quand la version du snapshot change
+        if not self.materialize: return None
+        if self._table[0]==version and self._table[1] is not None: return self._table[1]
+        self._table_lock = self._table_lock or threading.Lock()
+        with self._table_lock:
+            if self._table[0]!=version or self._table[1] is None:
+                t0 = time.perf_counter()
+                rows, stats = materialize_resolve(self)
+                self._table = (version, rows, {**stats, "version": version, "ms": round((time.perf_counter() - t0) * 1000, 3)})
+        return self._table[1]
+
+    def table_stats(self) -> Optional[dict]:
+        return self._table[2] if self.materialize else None
+
+# Table de resolve matérialisée (option resolve_table, serve --warm) : domaine fini = intents du router et du
+# manifest x (clients de ARKA_AGENT/clients + sans client). Entrées d'une ligne : flow_ref, signature de la
+# brique du flow et de la CAPAMAP (rôles du 1er step), carte d'agents du client ; seules les lignes dont une
+# entrée a changé sont recalculées. Persistée à côté de l'index (resolve_table_cache) : un redémarrage
+# reprend les lignes encore valides.
+def _table_encode(state: dict) -> dict:
+    return {"intents": state["intents"], "clients": state["clients"],
+            "rows": [[i, c, r] for (i, c), r in state["rows"].items()]}
+
+def _table_decode(data: dict) -> dict:
+    return {"intents": data["intents"], "clients": data["clients"],
+            "rows": {(i, c): r for i, c, r in data["rows"]}}
+
+def materialize_resolve(reg: Registry) -> Tuple[Dict[Tuple[str, Optional[str]], dict], dict]:
+    path = reg.cache_path("resolve_table_cache", "./.cache/resolve-table.json")
+    old = reg._table_state
+    if old is None:
+        try:
+            old = _table_decode(json.loads(path.read_text(encoding="utf-8"))["value"])
+        except (OSError, ValueError, KeyError, TypeError):
+            old = {"intents": {}, "clients": {}, "rows": {}}
+    index, capamap = reg.index(), reg.capamap()
+    cap_sig = _sig(reg.flow/"bricks"/"ARKFLOW-CAPAMAP01-CAPABILITY-MATRIX.yaml")
+    sig = lambda p: list(p) if p else None
+    intents = list(reg.router()) + [e.get("intent") for e in reg.manifest() if isinstance(e, dict)]
+    clients = (reg.agents().get("clients") or {})
+    new = {"intents": {}, "clients": {c: dict(amap) for c, amap in clients.items()}, "rows": {}}
+    changed = set()
+    for it in dict.fromkeys(i for i in intents if i):
+        flow_ref = reg.flow_ref_for(it)
+        bid = flow_ref.split(":", 1)[0] if flow_ref and ":" in flow_ref else None
+        brick = reg.flow/(index.get(bid) or {}).get("file", "MISSING") if bid else None
+        inp = [flow_ref, sig(_sig(brick)) if brick else None, sig(cap_sig)]
+        prev = old["intents"].get(it)
+        if prev and prev["in"]==inp:
+            new["intents"][it] = prev
+        else:
+            new["intents"][it] = {"in": inp, "roles": _first_step_roles(reg.flow, index, flow_ref, capamap) if flow_ref else []}
+            if not prev or prev["roles"]!=new["intents"][it]["roles"] or prev["in"][0]!=flow_ref: changed.add(it)
+    rebuilt = 0
+    for it, ent in new["intents"].items():
+        for c in [None, *new["clients"]]:
+            prev = old["rows"].get((it, c))
+            if prev is not None and it not in changed and (c is None or old["clients"].get(c)==new["clients"][c]):
+                new["rows"][(it, c)] = prev; continue
+            roles = ent["roles"]; flow_ref = ent["in"][0]
+            new["rows"][(it, c)] = {"intent": it, "flow_ref": flow_ref, "recommended_roles": roles,
+                                    "candidate_agents": _agents_for_roles(reg.agents(), c, roles) if c and roles else []}
+            rebuilt += 1
+    if rebuilt or len(new["rows"])!=len(old["rows"]) or new["intents"]!=old["intents"]:
+        Registry._save_persisted(([], _table_encode(new)), path, lambda v: v)
+    reg._table_state = new
+    size = path.stat().st_size if path.exists() else None
+    return new["rows"], {"rows": len(new["rows"]), "intents": len(new["intents"]), "clients": len(new["clients"]),
+                         "rebuilt": rebuilt, "reused": len(new["rows"]) - rebuilt, "path": str(path), "bytes": size}
+
+# Items de catalogue : enregistrements à __slots__ (facet/kind portés par la classe), chaînes internées
+# (ids, rôles, clients, chemins) partagées entre items et entre facettes. Lecture façon dict (get, [], in) ;
+# un dict n'est matérialisé qu'à la frontière JSON (as_dict via _json_default).
+def _intern(v: Any) -> Any:
+    if isinstance(v, str): return sys.intern(v)
+    if isinstance(v, list): return tuple(_intern(s) for s in v)
+    return v
+
+class Item:
+    __slots__ = ()
+    facet = ""
+    _head: Tuple[str, ...] = ("facet",)
+    _fields: Tuple[str, ...] = ("facet",)
+
+    def __init_subclass__(cls, **kw):
+        super().__init_subclass__(**kw)
+        cls._fields = cls._head + cls.__slots__
+
+    def __init__(self, *vals):
+        for k, v in zip(self.__slots__, vals): setattr(self, k, _intern(v))
+
+    def get(self, k: str, default: Any=None) -> Any:
+        return getattr(self, k) if k in self._fields else default
+
+    def __getitem__(self, k: str) -> Any:
+        if k not in self._fields: raise KeyError(k)
+        return getattr(self, k)
+
+    def __contains__(self, k: str) -> bool:
+        return k in self._fields
+
+    def as_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self._fields}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+class _RefItem(Item):
+    # Champs libres (front-matter, services déclarés) : le dict source est partagé, pas recopié
+    __slots__ = ("ref",)
+
+    def __init__(self, ref: dict):
+        self.ref = ref
+
+    def get(self, k: str, default: Any=None) -> Any:
+        if k in self.ref: return self.ref[k]
+        return self.facet if k=="facet" else default
+
+    def __getitem__(self, k: str) -> Any:
+        v = self.get(k, KeyError)
+        if v is KeyError: raise KeyError(k)
+        return v
+
+    def __contains__(self, k: str) -> bool:
+        return k=="facet" or k in self.ref
+
+    def as_dict(self) -> dict:
+        return {"facet": self.facet, **self.ref}
+
+class TermItem(Item):
+    __slots__ = ("id", "label", "aliases", "tags", "owner"); facet = "term"
+
+class FlowItem(Item):
+    __slots__ = ("intent", "flow_ref", "family", "title"); facet = "flow"
+
+class DocItem(_RefItem):
+    __slots__ = ("_path",); facet = "doc"
+
+    def __init__(self, ref: dict, path: str):
+        super().__init__(ref); self._path = sys.intern(path)
+
+    def get(self, k: str, default: Any=None) -> Any:
+        return self._path if k=="_path" else super().get(k, default)
+
+    def __contains__(self, k: str) -> bool:
+        return k=="_path" or super().__contains__(k)
+
+    def as_dict(self) -> dict:
+        return {**super().as_dict(), "_path": self._path}
+
+class ExpertItem(Item):
+    __slots__ = ("role", "expert", "wakeup"); facet = "agent"; kind = "expert"; _head = ("facet", "kind")
+
+class ClientAgentItem(Item):
+    __slots__ = ("client", "agent_id", "onboarding"); facet = "agent"; kind = "client"; _head = ("facet", "kind")
+
+class CapabilityItem(Item):
+    __slots__ = ("id", "roles"); facet = "capability"
+
+class PolicyItem(Item):
+    __slots__ = ("id", "group", "ref", "version"); facet = "policy"
+
+class DatasetItem(Item):
+    __slots__ = ("id", "module", "file", "version", "exports"); facet = "dataset"
+
+class ServiceItem(Item):
+    __slots__ = ("id", "method", "http"); facet = "service"
+
+class DeclaredServiceItem(_RefItem):
+    __slots__ = (); facet = "service"
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, Item): return o.as_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+# Fournisseurs par facette : fn(reg) -> (items, chemins sources)
+# keys(reg, item) -> ids adressables par arka://<facet>/<id> ; links(reg, item) -> [(facet, id)] liés
+FACET_PROVIDERS: Dict[str, Any] = {}
+FACET_KEYS: Dict[str, Any] = {}
+FACET_LINKS: Dict[str, Any] = {}
+
+def facet_provider(fid: str, keys=None, links=None):
+    def deco(fn):
+        FACET_PROVIDERS[fid] = fn
+        FACET_KEYS[fid] = keys or (lambda reg, x: [x.get("id")])
+        FACET_LINKS[fid] = links or (lambda reg, x: [])
+        return fn
+    return deco
+
+
+# ── Parcours d'arborescence partagé ────────────────────────────────────────────
+# Un seul passage os.scandir répond à plusieurs motifs glob (sur le nom de fichier, ou sur le chemin
+# relatif si le motif contient "/") ; les dossiers ignorés (option walk_ignore, mêmes règles) sont
+# élagués avant descente ; les sous-arbres de premier niveau sont parcourus en parallèle (threads :
+# scandir relâche le GIL pendant les appels système). Liens symboliques vers dossiers non suivis.
+WALK_IGNORE = (".git", "node_modules", ".cache", ".logs", ".mem", "__pycache__", ".venv", ".audit",
+               "archive", "archives", "_archive*", ".archive*")
+
+def walk_ignore(root: Path) -> Tuple[str, ...]:
+    ign = (_cfg(root).get("options") or {}).get("walk_ignore")
+    return tuple(ign) if isinstance(ign, list) else WALK_IGNORE
+
+def _glob_rx(patterns) -> Optional[Any]:
+    import fnmatch, re
+    pats = list(patterns)
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in pats)).match if pats else None
+
+def _walk_sub(top: str, rel0: str, matchers, skip_name, skip_rel) -> Tuple[Dict[str, List[str]], List[str]]:
+    out: Dict[str, List[str]] = {pat: [] for pat, _, _ in matchers}; dirs: List[str] = []
+    stack = [(top, rel0)]
+    while stack:
+        d, rel = stack.pop()
+        dirs.append(d)
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                r = rel + "/" + e.name if rel else e.name
+                try:
+                    is_dir = e.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if not ((skip_name and skip_name(e.name)) or (skip_rel and skip_rel(r))): stack.append((e.path, r))
+                    continue
+                for pat, m, on_rel in matchers:
+                    if m(r if on_rel else e.name): out[pat].append(e.path)
+    return out, dirs
+
+def walk_tree(base: Path, patterns, ignore: Optional[Tuple[str, ...]]=None, jobs: Optional[int]=None) -> Tuple[Dict[str, List[Path]], List[Path]]:
+    # -> ({motif: fichiers triés}, dossiers parcourus) ; les dossiers servent à détecter ajouts/suppressions
+    ignore = WALK_IGNORE if ignore is None else ignore
+    matchers = [(p, _glob_rx([p]), "/" in p) for p in dict.fromkeys(patterns)]
+    skip_name = _glob_rx(i for i in ignore if "/" not in i); skip_rel = _glob_rx(i for i in ignore if "/" in i)
+    res: Dict[str, List[str]] = {pat: [] for pat, _, _ in matchers}; dirs: List[str] = [str(base)]
+    subs = []
+    try:
+        entries = list(os.scandir(base))
+    except OSError:
+        entries = []
+    for e in entries:
+        try:
+            is_dir = e.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir:
+            if not ((skip_name and skip_name(e.name)) or (skip_rel and skip_rel(e.name))): subs.append((e.path, e.name))
+            continue
+        for pat, m, _ in matchers:
+            if m(e.name): res[pat].append(e.path)
+    jobs = min(int(jobs or 8), len(subs))
+    if jobs > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=jobs) as ex:
+            parts = list(ex.map(lambda sd: _walk_sub(sd[0], sd[1], matchers, skip_name, skip_rel), subs))
+    else:
+        parts = [_walk_sub(d, r, matchers, skip_name, skip_rel) for d, r in subs]
+    for out, ds in parts:
+        dirs += ds
+        for pat, fs in out.items(): res[pat] += fs
+    return {pat: [Path(f) for f in sorted(fs)] for pat, fs in res.items()}, [Path(d) for d in dirs]
+
+def _term_links(reg: Registry, x: dict) -> List[Tuple[str, str]]:
+    t = reg.term_by_id().get(x.get("id")) or {}
+    out = [("flow", ref) for ref in (t.get("related_workflows") or [])]
+    if x.get("id") in reg.router(): out.append(("flow", reg.router()[x["id"]]))
+    if x.get("owner"): out.append(("agent", f"experts/{x['owner']}"))
+    return list(dict.fromkeys(out))
+
+def _flow_links(reg: Registry, x: dict) -> List[Tuple[str, str]]:
+    out = [("term", x.get("intent"))]
+    ref = x.get("flow_ref") or ""
+    if ":" in ref:
+        bid, export = ref.split(":",1)
+        out.append(("dataset", bid))
+        meta = reg.index().get(bid) or {}
+        flow = ((_load_yaml(reg.flow/meta.get("file","MISSING")).get("flows") or {}).get(export) or {})
+        for st in (flow.get("sequence") or []):
+            if isinstance(st, dict):
+                out += [("capability", c) for k in ("requires_caps","requires_caps_any") for c in (st.get(k) or [])]
+    return list(dict.fromkeys(out))
+
+def _agent_keys(reg: Registry, x: dict) -> List[str]:
+    if x.get("kind")=="expert":
+        # rôles déclarés dans AGENT00-INDEX (ex. SecurityComplianceArchitect) en plus du nom de dossier
+        roles = [r for r, ref in (_load_yaml(reg.agents_root/"AGENT00-INDEX.yaml").get("experts") or {}).items() if ref==x.get("expert")]
+        return [f"experts/{x.get('role')}", x.get("expert")] + [f"experts/{r}" for r in roles]
+    return [x.get("onboarding"), f"clients/{x.get('client')}/{x.get('agent_id')}"]
+
+def _agent_links(reg: Registry, x: dict) -> List[Tuple[str, str]]:
+    if x.get("kind")!="client": return []
+    ob = _load_yaml(reg.agents_root/(x.get("onboarding") or "MISSING"))
+    return [("agent", ob["expert_ref"])] if ob.get("expert_ref") else []
+
+@facet_provider("term", links=_term_links)
+def _facet_term(reg: Registry):
+    items = [TermItem(t.get("id"), t.get("label"), t.get("aliases",[]), t.get("tags",[]), t.get("owner")) for t in reg.terms()]
+    return items, [reg.core/"bricks"/"ARKA_NOMENCLATURE01.yaml", reg.os_root/"wakeup-intents.matrix.yaml"]
+
+@facet_provider("flow", keys=lambda reg, x: [x.get("flow_ref"), x.get("intent")], links=_flow_links)
+def _facet_flow(reg: Registry):
+    items = [FlowItem(e.get("intent"), e.get("flow_ref"), e.get("family"), e.get("title")) for e in reg.manifest()]
+    return items, [reg.flow/"bricks"/"ARKFLOW-00-MANIFEST.yaml"]
+
+@facet_provider("doc",
+    keys=lambda reg, x: [x["_path"].replace("/", ":", 1), x["_path"]],
+    links=lambda reg, x: [(f, x.get(k)) for f, k in (("term","nomenclature"), ("flow","workflow")) if x.get(k)])
+def _facet_doc(reg: Registry):
+    key = reg.opt("doc_frontmatter_key","arkaref")
+    tree, dirs = reg.tree()
+    mds = tree["*.md"]
+    items = []
+    for md in mds:
+        fm = _frontmatter(md)
+        if key in fm and isinstance(fm[key], dict):
+            items.append(DocItem(fm[key], md.relative_to(reg.os_root).as_posix()))
+    return items, mds + dirs
+
+@facet_provider("agent", keys=_agent_keys, links=_agent_links)
+def _facet_agent(reg: Registry):
+    # même index que Registry.agents() (walk_ignore appliqué), partagé plutôt que reparcouru
+    ag_idx = reg.agents(); deps = reg.deps("agents")
+    items = [ExpertItem(role, refs.get("expert"), refs.get("wakeup")) for role, refs in (ag_idx.get("experts") or {}).items()]
+    for cl, amap in (ag_idx.get("clients") or {}).items():
+        items += [ClientAgentItem(cl, aid, ref) for aid, ref in amap.items()]
+    return items, deps + [reg.agents_root/"AGENT00-INDEX.yaml"]
+
+@facet_provider("capability", links=lambda reg, x: [("agent", f"experts/{r}") for r in (x.get("roles") or [])])
+def _facet_capability(reg: Registry):
+    items = [CapabilityItem(capid, roles) for capid, roles in (reg.capamap().get("capabilities") or {}).items()]
+    return items, [reg.flow/"bricks"/"ARKFLOW-CAPAMAP01-CAPABILITY-MATRIX.yaml"]
+
+@facet_provider("policy", links=lambda reg, x: [("dataset", (x.get("ref") or "").split(":",1)[0])] if x.get("ref") else [])
+def _facet_policy(reg: Registry):
+    # Règles adressables de rules_index.yaml (ref brique:section + contrainte de version)
+    p = reg.core/"rules_index.yaml"
+    items = []
+    for group, rules in (_load_yaml(p).get("rules") or {}).items():
+        for name, r in (rules or {}).items():
+            if isinstance(r, dict):
+                items.append(PolicyItem(f"{group}.{name}", group, r.get("ref"), r.get("version")))
+    return items, [p]
+
+@facet_provider("dataset")
+def _facet_dataset(reg: Registry):
+    # Briques déclarées dans les index de module (*00-INDEX.yaml)
+    items, deps = [], [reg.os_root]
+    for idx in sorted(reg.os_root.glob("*/*00-INDEX.yaml")):
+        deps.append(idx)
+        y = _load_yaml(idx)
+        entries = y.get("registry") if isinstance(y.get("registry"), dict) else y
+        for bid, meta in entries.items():
+            if isinstance(meta, dict) and "file" in meta:
+                items.append(DatasetItem(bid, idx.parent.name, (idx.parent/meta["file"]).relative_to(reg.os_root).as_posix(), meta.get("version"), meta.get("exports",[])))
+    return items, deps
+
+@facet_provider("service")
+def _facet_service(reg: Registry):
+    # Endpoints exposés par ce module + services déclarés dans ARKAROUTING-03-CONFIG (clé services)
+    items = [ServiceItem(f"arkarouting:{m}", m, f"/{m}") for m in METHODS]
+    for sv in (_cfg(reg.root).get("services") or []):
+        if isinstance(sv, dict) and sv.get("id"): items.append(DeclaredServiceItem(sv))
+    return items, [_cfg_path(reg.root)]
+
+_REGISTRIES: Dict[Path, Registry] = {}
+
+def registry(root: Path) -> Registry:
+    reg = _REGISTRIES.get(root)
+    if reg is None:
+        reg = _REGISTRIES[root] = Registry(root)
+    return reg
+
+# Graphe de références : adjacence dans les deux sens, noeuds = URI arka://<facet>/<id>
+class RefGraph:
+    VERSION = 2  # à incrémenter quand build_refgraph change la forme des arêtes (invalide le cache persisté)
+
+    def __init__(self):
+        self.nodes: Dict[str, List[str]] = {}  # uri -> sources qui le définissent
+        self.out: Dict[str, List[Tuple[str, str]]] = {}  # uri -> [(kind, cible)]
+        self.inc: Dict[str, List[Tuple[str, str]]] = {}  # uri -> [(kind, source)]
+
+    def define(self, uri: str, src: str) -> None:
+        defs = self.nodes.setdefault(uri, [])
+        if src not in defs: defs.append(src)
+
+    def link(self, src: str, kind: str, dst: str) -> None:
+        self.out.setdefault(src, []).append((kind, dst))
+        self.inc.setdefault(dst, []).append((kind, src))
+
+    def defined(self, uri: str, *srcs: str) -> bool:
+        defs = self.nodes.get(uri) or []
+        return bool(defs) if not srcs else any(s in defs for s in srcs)
+
+    def edges(self, uri: str, kind: Optional[str]=None, incoming: bool=False) -> List[Tuple[str, str]]:
+        es = (self.inc if incoming else self.out).get(uri) or []
+        return es if kind is None else [e for e in es if e[0]==kind]
+
+    def dangling(self) -> List[dict]:
+        return [{"from": s, "kind": k, "to": d} for s, es in self.out.items() for k, d in es if d not in self.nodes]
+
+    def impact(self, uri: str) -> dict:
+        # Retirer/renommer uri casse ses référents directs ; "affected" = fermeture transitive des référents
+        breaks = [{"from": s, "kind": k} for k, s in self.edges(uri, incoming=True)]
+        seen = {uri}; todo = [uri]
+        while todo:
+            for _, s in self.edges(todo.pop(), incoming=True):
+                if s not in seen:
+                    seen.add(s); todo.append(s)
+        seen.discard(uri)
+        return {"breaks": breaks, "affected": sorted(seen)}
+
+    def to_json(self) -> dict:
+        return {"version": self.VERSION, "nodes": self.nodes, "edges": [[s, k, d] for s, es in self.out.items() for k, d in es]}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "RefGraph":
+        # cache écrit par une version antérieure de build_refgraph (arêtes différentes) : à reconstruire
+        if data.get("version") != cls.VERSION: raise ValueError("refgraph cache obsolète")
+        g = cls(); g.nodes = {u: list(d) for u, d in data["nodes"].items()}
+        for s, k, d in data["edges"]: g.link(s, k, d)
+        return g
+
+def _uri(facet: str, key: Any) -> str:
+    return f"arka://{facet}/{key}"
+
+def build_refgraph(reg: Registry) -> Tuple[RefGraph, List[Path]]:
+    g = RefGraph()
+    files = [reg.core/"bricks"/"ARKA_NOMENCLATURE01.yaml", reg.os_root/"wakeup-intents.matrix.yaml",
+             reg.flow/"router"/"routing.yaml", reg.flow/"bricks"/"ARKFLOW-00-MANIFEST.yaml", reg.flow/"ARKFLOW00-INDEX.yaml",
+             reg.flow/"bricks"/"ARKFLOW-CAPAMAP01-CAPABILITY-MATRIX.yaml", reg.agents_root/"AGENT00-INDEX.yaml"]
+    # termes / intents : une même clé arka://term/<ID>, définie par chaque source qui la déclare
+    for t in scan_nomenclature(reg.core):
+        if not t.get("id"): continue
+        u = _uri("term", t["id"]); g.define(u, "nomenclature")
+        for ref in (t.get("related_workflows") or []): g.link(u, "related_workflow", _uri("flow", ref))
+        if t.get("owner"): g.link(u, "owner", _uri("role", t["owner"]))
+    for it in scan_wakeup(reg.os_root)[0]: g.define(_uri("term", it), "wakeup")
+    for it, fr in reg.router().items():
+        g.define(_uri("term", it), "router")
+        if fr: g.link(_uri("term", it), "route", _uri("flow", fr))
+    for e in reg.manifest():
+        if not e.get("intent"): continue
+        g.define(_uri("term", e["intent"]), "manifest")
+        if e.get("flow_ref"): g.link(_uri("term", e["intent"]), "manifest", _uri("flow", e["flow_ref"]))
+    # briques FLOW : exports indexés, liens export -> brique et step -> capability
+    for bid, meta in reg.index().items():
+        g.define(_uri("dataset", bid), "index")
+        bfile = reg.flow/(meta or {}).get("file","MISSING"); files.append(bfile)
+        flows = _load_yaml(bfile).get("flows") or {}
+        for export in ((meta or {}).get("exports") or []):
+            u = _uri("flow", f"{bid}:{export}"); g.define(u, "index"); g.link(u, "brick", _uri("dataset", bid))
+            # un lien par capacité et par chaîne embarquée (dédoublonnés sur tout le flow, pas par step)
+            seq = [st for st in ((flows.get(export) or {}).get("sequence") or []) if isinstance(st, dict)]
+            for ch in dict.fromkeys(st["use_chain"] for st in seq if st.get("use_chain")):
+                g.link(u, "use_chain", _uri("flow", f"{bid}:{ch}"))
+            for c in dict.fromkeys(c for st in seq for k in ("requires_caps","requires_caps_any") for c in (st.get(k) or [])):
+                g.link(u, "requires_cap", _uri("capability", c))
+    # CAPAMAP : capability -> rôle ; rôle -> agents client (même correspondance que resolve)
+    ag_idx = reg.agents()
+    for r in (_load_yaml(reg.agents_root/"AGENT00-INDEX.yaml").get("experts") or {}): g.define(_uri("role", r), "experts")
+    for cl, amap in (ag_idx.get("clients") or {}).items():
+        for aid, ref in amap.items(): g.define(_uri("agent", ref), "agents")
+    roles = set()
+    for capid, rs in (reg.capamap().get("capabilities") or {}).items():
+        g.define(_uri("capability", capid), "capamap")
+        for r in (rs or []):
+            g.link(_uri("capability", capid), "role", _uri("role", r)); roles.add(r)
+    for r in sorted(roles):
+        for cl, amap in (ag_idx.get("clients") or {}).items():
+            ref = amap.get(_role_slug(r))
+            if ref: g.link(_uri("role", r), "agent", _uri("agent", ref))
+    # docs : front-matter arkaref -> terme / workflow
+    for d in reg.facet("doc"):
+        u = _uri("doc", d["_path"].replace("/", ":", 1)); g.define(u, "frontmatter")
+        if d.get("nomenclature"): g.link(u, "nomenclature", _uri("term", d["nomenclature"]))
+        if d.get("workflow"): g.link(u, "workflow", _uri("flow", d["workflow"]))
+    return g, files + reg.deps("facet:doc") + reg.deps("agents")
+
 # API
 def catalog(root: Path, facet: Optional[str], grep: Optional[str], client: Optional[str]) -> dict:
-    paths = _paths(root)
-    os_root = Path(paths["os_root"])
-    core = Path(paths.get("core") or os_root/"ARKA_CORE")
-    flow = Path(paths.get("flow") or os_root/"ARKA_FLOW")
-    agents = Path(paths.get("agents") or os_root/"ARKA_AGENT")
-    manifest = scan_manifest(flow)
-    idx = scan_index(flow)
-    terms = _term_catalog(core, os_root)
-    cap = scan_capamap(flow)
-    docs = scan_docs(os_root, _cfg(root).get("options",{}).get("doc_frontmatter_key","arkaref"))
-    ag_idx = scan_agents(agents)
-
+    reg = registry(root)
+    # Seules les facettes demandées sont construites (catalog --facet X ne scanne que X)
     items=[]
-    for t in terms: items.append({"facet":"term","id":t.get("id"),"label":t.get("label"),"aliases":t.get("aliases",[]),"tags":t.get("tags",[]),"owner":t.get("owner")})
-    for e in manifest: items.append({"facet":"flow","intent":e.get("intent"),"flow_ref":e.get("flow_ref"),"family":e.get("family"),"title":e.get("title")})
-    for d in docs: items.append({"facet":"doc", **d})
-    for role, refs in (ag_idx.get("experts") or {}).items(): items.append({"facet":"agent","kind":"expert","role":role, **refs})
-    for cl, amap in (ag_idx.get("clients") or {}).items():
-        for aid, ref in amap.items(): items.append({"facet":"agent","kind":"client","client":cl,"agent_id":aid,"onboarding":ref})
-    for capid, roles in (cap.get("capabilities") or {}).items(): items.append({"facet":"capability","id":capid,"roles":roles})
-    if facet: items=[x for x in items if x.get("facet")==facet]
+    for fid in ([facet] if facet else reg.facet_ids()): items += reg.facet(fid)
     if client and facet=="agent": items=[x for x in items if x.get("client")==client or x.get("kind")=="expert"]
     if grep:
+        import re
         rg=re.compile(re.escape(grep), re.I)
         def hit(x):
             for k in ("id","label","aliases","tags","intent","title","client","agent_id","role"):
                 v=x.get(k)
                 if isinstance(v, str) and rg.search(v): return True
-                if isinstance(v, list) and any(rg.search(s) for s in v if isinstance(s,str)): return True
+                if isinstance(v, (list, tuple)) and any(rg.search(s) for s in v if isinstance(s,str)): return True
             return False
         items=[x for x in items if hit(x)]
     return {"items": items, "counts": {"total": len(items)}}
 
 def lookup(root: Path, term: str) -> dict:
-    paths = _paths(root)
-    os_root = Path(paths["os_root"])
-    core = Path(paths.get("core") or os_root/"ARKA_CORE")
-    intent = _intent_from_term(term, core, os_root)
-    return {"term": term, "intent": intent}
+    # candidates : seulement quand le terme n'a pas de correspondance exacte/sous-chaîne (recherche approchée)
+    reg = registry(root)
+    intent, cands = reg.cached_match(term, reg.snapshot())
+    return {"term": term, "intent": intent, **({"candidates": cands} if cands is not None else {})}
+
+def suggest(root: Path, term: Optional[str], max_distance: Any=None, limit: Any=None) -> dict:
+    reg = registry(root); ver = reg.snapshot()
+    key = (ver, "suggest", term, max_distance, limit)
+    return {"term": term, "candidates": reg.results.get_or(key, lambda: reg.suggest(term, max_distance, limit), negative=lambda v: not v)}
 
 def resolve(root: Path, intent: Optional[str], term: Optional[str], client: Optional[str]) -> dict:
-    paths = _paths(root)
-    os_root = Path(paths["os_root"])
-    core = Path(paths.get("core") or os_root/"ARKA_CORE")
-    flow = Path(paths.get("flow") or os_root/"ARKA_FLOW")
-    agents = Path(paths.get("agents") or os_root/"ARKA_AGENT")
+    # Clé normalisée : "" == None ; le terme est ignoré quand l'intent est fourni
+    reg = registry(root); ver = reg.snapshot()
+    table = reg.resolve_table(ver)
+    if table is not None:
+        row = table.get((intent or (reg.cached_intent(term, ver) if term else None), client or None))
+        if row is not None: return row
+    key = (ver, "resolve", intent or None, None if intent else (term or None), client or None)
+    return reg.results.get_or(key, lambda: _resolve(reg, ver, intent, term, client), negative=lambda v: v["intent"] is None)
+
+def _resolve(reg: Registry, ver: int, intent: Optional[str], term: Optional[str], client: Optional[str]) -> dict:
     if not intent and term:
-        intent = _intent_from_term(term, core, os_root)
-    flow_ref = _resolve_intent(intent, flow) if intent else None
-    idx = scan_index(flow)
-    cap = scan_capamap(flow)
-    roles = _first_step_roles(flow, idx, flow_ref, cap) if flow_ref else []
-    onboard = _agents_for_roles(agents, client, roles) if client and roles else []
+        intent = reg.cached_intent(term, ver)
+    flow_ref = reg.flow_ref_for(intent) if intent else None
+    roles = _first_step_roles(reg.flow, reg.index(), flow_ref, reg.capamap()) if flow_ref else []
+    onboard = _agents_for_roles(reg.agents(), client, roles) if client and roles else []
     return {"intent": intent, "flow_ref": flow_ref, "recommended_roles": roles, "candidate_agents": onboard}
 
+_MODULES: Dict[str, Any] = {}
+
+def _module(path: Path, name: str):
+    # Module compagnon (arkaflow.py, arkaprofil.py) chargé une fois par chemin
+    p = str(path)
+    if p not in _MODULES:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(name, p)
+        if not spec or not os.path.exists(p): raise ValueError(f"{path.name} introuvable : {p}")
+        mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod)
+        _MODULES[p] = mod
+    return _MODULES[p]
+
+def _arkaflow(flow_root: Path):
+    return _module(flow_root / "arkaflow.py", "arkaflow")
+
+def can_advance(root: Path, flow: Optional[str], state: Any) -> dict:
+    # state : objet/liste JSON (POST, RPC) ou chaîne JSON (GET ?state=...)
+    reg = registry(root)
+    dag = reg.preconditions().get(flow or "")
+    if not dag: raise NotFound(f"flow inconnu : {flow}")
+    if isinstance(state, str): state = json.loads(state or "{}")
+    return _arkaflow(reg.flow).can_advance(dag, state if state is not None else {})
+
+def authz(root: Path, role: Optional[str], action: Optional[str], path: Any=None, checks: Any=None, explain: bool=False) -> dict:
+    # Une décision expliquée, ou checks=[{role,action,path}|[role,action,path], ...] (GET : chaîne JSON)
+    az = registry(root).authz()
+    if checks is None: return az.explain(role, action, path)
+    if isinstance(checks, str): checks = json.loads(checks)
+    if not isinstance(checks, list): raise ValueError("checks : liste de décisions attendue")
+    res = az.explain_many(checks) if explain else az.check_many(checks)
+    n_ok = sum(1 for r in res if (r["allowed"] if explain else r))
+    return {"results": res, "allowed": n_ok, "denied": len(res) - n_ok}
+
+def parse_uri(uri: str) -> Tuple[str, str]:
+    # arka://<facet>/<id> ; l'id peut contenir des "/" (chemins d'agents/docs)
+    if not isinstance(uri, str) or not uri.startswith("arka://"): raise ValueError(f"URI arka:// attendue : {uri!r}")
+    fid, _, key = uri[len("arka://"):].partition("/")
+    if not fid or not key: raise ValueError(f"URI incomplète (arka://<facet>/<id>) : {uri!r}")
+    return fid, key
+
+def get(root: Path, uris: Any, links: bool=True) -> dict:
+    # Déréférencement O(1) via l'index facet+id ; liens résolus sur un niveau
+    reg = registry(root)
+    uris = [uris] if isinstance(uris, str) else list(uris or [])
+    out = []; found = 0
+    for uri in uris:
+        try:
+            fid, key = parse_uri(uri)
+        except ValueError as e:
+            out.append({"uri": uri, "item": None, "error": str(e)}); continue
+        item = reg.by_key(fid).get(key) if fid in FACET_PROVIDERS else None
+        res: Dict[str, Any] = {"uri": uri, "item": item}
+        if item is not None:
+            found += 1
+            if links:
+                res["links"] = [{"uri": f"arka://{lf}/{lk}", "item": reg.by_key(lf).get(lk)}
+                                for lf, lk in FACET_LINKS[fid](reg, item) if lk]
+        out.append(res)
+    return {"items": out, "counts": {"total": len(out), "found": found}}
+
+def refs(root: Path, uri: Optional[str]=None, impact: bool=False, dangling: bool=False) -> dict:
+    # Qui référence uri (in), ce que uri référence (out) ; impact = ce qui casse si uri disparaît/est renommé
+    g = registry(root).refgraph()
+    res: Dict[str, Any] = {"nodes": len(g.nodes), "edges": sum(len(es) for es in g.out.values())}
+    if uri:
+        res.update({"uri": uri, "defined_by": g.nodes.get(uri, []),
+                    "out": [{"kind": k, "to": d} for k, d in g.edges(uri)],
+                    "in": [{"kind": k, "from": s} for k, s in g.edges(uri, incoming=True)]})
+        if impact: res["impact"] = g.impact(uri)
+    if dangling: res["dangling"] = g.dangling()
+    return res
+
+# Résolution de règles (refs "BRIQUE:section.chemin" de rules_index.yaml) : index d'offsets par brique
+# (plage d'octets de chaque clé de mapping bloc, RULE_INDEX_DEPTH niveaux), persisté ; seule la section
+# visée est lue (seek) et parsée. Les clés sous exports sont aussi adressables sans le préfixe.
+RULE_INDEX_DEPTH = 4
+_SECTIONS: Dict[str, Tuple[Any, Dict[Tuple[int, int], Any]]] = {}  # fichier -> (signature, {plage: valeur})
+
+def _satisfies(version: Any, constraint: Optional[str]) -> bool:
+    # ">=1.2.0", "^2.0.0", "~1.1.0", "<3" ; plusieurs contraintes séparées par virgule/espace (toutes requises)
+    import re
+    def ver(s):
+        xs = [int(x) for x in re.findall(r"\d+", str(s or ""))[:3]]
+        return tuple(xs + [0]*(3-len(xs)))
+    v = ver(version)
+    for c in re.split(r"[,\s]+", (constraint or "").strip()):
+        if not c: continue
+        m = re.match(r"^(>=|<=|==|=|>|<|\^|~)?\s*v?(\d+(?:\.\d+)*)$", c)
+        if not m: return False
+        op, ref = m.group(1) or "==", ver(m.group(2))
+        if op=="^": hi = (ref[0]+1, 0, 0) if ref[0] else (0, ref[1]+1, 0) if ref[1] else (0, 0, ref[2]+1)
+        elif op=="~": hi = (ref[0], ref[1]+1, 0)
+        if op in "^~": ok = ref <= v < hi
+        else: ok = {">=": v>=ref, "<=": v<=ref, ">": v>ref, "<": v<ref, "==": v==ref, "=": v==ref}[op]
+        if not ok: return False
+    return True
+
+def _section_offsets(p: Path) -> Tuple[dict, List[Path]]:
+    # {chemin pointé: [début, fin, colonne]} : de la ligne de la clé à la fin de sa valeur (octets)
+    import yaml
+    data = p.read_bytes(); text = data.decode("utf-8")
+    lines = text.split("\n"); starts = [0]
+    for ln in lines: starts.append(starts[-1] + len(ln.encode("utf-8")) + 1)
+    try:
+        node = yaml.compose(text, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    except yaml.YAMLError as e:
+        return {"error": f"YAML invalide : {str(e).splitlines()[0]}", "sections": {}}, [p]
+    sections: Dict[str, list] = {}
+    def walk(n, prefix, depth):
+        if not isinstance(n, yaml.MappingNode) or n.flow_style or depth > RULE_INDEX_DEPTH: return
+        for k, v in n.value:
+            if not isinstance(k, yaml.ScalarNode): continue
+            path = prefix + (str(k.value),)
+            end = starts[v.end_mark.line] + len(lines[v.end_mark.line][:v.end_mark.column].encode("utf-8")) if v.end_mark.line < len(lines) else len(data)
+            sections[".".join(path)] = [starts[k.start_mark.line], end, k.start_mark.column]
+            walk(v, path, depth + 1)
+    walk(node, (), 1)
+    return {"sections": sections}, [p]
+
+def _dig(obj: Any, parts: List[str]) -> Tuple[bool, Any]:
+    for k in parts:
+        if isinstance(obj, dict) and k in obj: obj = obj[k]
+        elif isinstance(obj, list) and k.isdigit() and int(k) < len(obj): obj = obj[int(k)]
+        else: return False, None
+    return True, obj
+
+def _read_section(p: Path, span: list) -> Any:
+    # Valeur de la clé couvrant span ; mémo par plage tant que le fichier garde mtime/taille
+    import yaml
+    sig = _sig(p); hit = _SECTIONS.get(str(p))
+    if not hit or hit[0]!=sig: hit = _SECTIONS[str(p)] = (sig, {})
+    s, e, col = span
+    if (s, e) in hit[1]: return hit[1][(s, e)]
+    with open(p, "rb") as f:
+        f.seek(s); chunk = f.read(e - s).decode("utf-8")
+    text = "\n".join(ln[col:] if not ln[:col].strip() else ln.lstrip(" ") for ln in chunk.split("\n")) if col else chunk
+    val = yaml.load(text, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    val = next(iter(val.values())) if isinstance(val, dict) and len(val)==1 else val
+    hit[1][(s, e)] = val
+    return val
+
+def _rule_one(reg: Registry, bricks: Dict[str, Any], sdir: Path, spec: str, rule_id: Optional[str]=None, cons: Optional[str]=None) -> dict:
+    ref, _, c = spec.partition("@")
+    cons = c or cons
+    bid, _, path = ref.partition(":")
+    res: Dict[str, Any] = {"ref": ref, "brick": bid, "path": path, "constraint": cons}
+    if rule_id: res["rule"] = rule_id
+    brick = bricks.get(bid)
+    if brick is None: return {**res, "ok": False, "error": "brique inconnue"}
+    res["version"] = brick.get("version")
+    if not _satisfies(brick.get("version"), cons):
+        return {**res, "ok": False, "error": f"version {brick.get('version')} ne satisfait pas {cons}"}
+    p = reg.os_root / brick.get("file")
+    idx = reg.derived("sections:" + bid, lambda: _section_offsets(p),
+                      persist=(sdir / f"{bid}.json", lambda v: v, lambda v: v))
+    if idx.get("error"): return {**res, "ok": False, "error": idx["error"]}
+    parts = path.split(".") if path else []
+    secs = idx["sections"]
+    for i in range(len(parts), 0, -1):
+        key = ".".join(parts[:i])
+        span = secs.get(key) or secs.get("exports." + key)
+        if span is None: continue
+        try:
+            ok, val = _dig(_read_section(p, span), parts[i:])
+        except Exception:
+            # section non autonome (ancre/alias ailleurs dans la brique) : lecture complète
+            ok, val = _dig(_load_yaml(p), (["exports"] if key not in secs else []) + parts)
+        if ok: return {**res, "ok": True, "value": val}
+        break
+    if not parts: return {**res, "ok": True, "value": _load_yaml(p)}
+    return {**res, "ok": False, "error": "section introuvable"}
+
+def rule(root: Path, refs: Any) -> dict:
+    # refs : "BRIQUE:section.chemin[@contrainte]", id de rules_index ("path_templates.feature_dir"),
+    # groupe entier ("path_templates") ou arka://policy/<id> ; plusieurs refs par appel
+    reg = registry(root)
+    refs = [refs] if isinstance(refs, str) else list(refs or [])
+    rules, bricks = reg.by_key("policy"), reg.by_key("dataset"); out = []
+    sdir = reg.cache_path("rule_offsets_cache", "./.cache/sections")
+    for r in refs:
+        r = r[len("arka://policy/"):] if r.startswith("arka://policy/") else r
+        if ":" in r.partition("@")[0]:
+            out.append(_rule_one(reg, bricks, sdir, r)); continue
+        rid, _, c = r.partition("@")
+        group = [k for k in rules if k.startswith(rid + ".")] if rid not in rules else [rid]
+        if not group: out.append({"ref": r, "rule": rid, "ok": False, "error": "règle inconnue"}); continue
+        out.extend(_rule_one(reg, bricks, sdir, rules[k].get("ref") or "", k, c or rules[k].get("version")) for k in group)
+    return {"rules": out, "counts": {"total": len(out), "found": sum(1 for x in out if x["ok"])}}
+
+def changes(root: Path, since: Any=None, wait: Any=None, epoch: Optional[str]=None) -> dict:
+    # Deltas du catalogue depuis la version since ; wait=N : bloque jusqu'au prochain changement (N s max)
+    reg = registry(root)
+    return reg.feed.wait(reg, since, epoch, float(wait or 0))
+
+def lookup_many(root: Path, terms: List[str]) -> List[dict]:
+    return [lookup(root, t) for t in (terms or [])]
+
+def resolve_many(root: Path, queries: List[dict]) -> List[dict]:
+    # queries: [{"intent"?, "term"?, "client"?}, ...] — un seul aller-retour pour N résolutions
+    return [resolve(root, q.get("intent"), q.get("term"), q.get("client")) for q in (queries or [])]
+
+# Export SQLite : registre compilé en tables indexées + table plein-texte (FTS5) pour les outils TS.
+# Reconstruction incrémentale : une section n'est réécrite que si l'une de ses sources a changé
+# (signatures mtime/taille stockées dans `sources`) ; les docs sont suivis fichier par fichier.
+EXPORT_SCHEMA = "1"
+_EXPORT_DDL = """
+CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sources(section TEXT PRIMARY KEY, deps TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS terms(id TEXT PRIMARY KEY, label TEXT, owner TEXT);
+CREATE TABLE IF NOT EXISTS term_aliases(term_id TEXT NOT NULL, kind TEXT NOT NULL, alias TEXT NOT NULL, alias_l TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS term_aliases_l ON term_aliases(alias_l);
+CREATE TABLE IF NOT EXISTS term_flows(term_id TEXT NOT NULL, flow_ref TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS term_flows_term ON term_flows(term_id);
+CREATE TABLE IF NOT EXISTS router(intent TEXT PRIMARY KEY, flow_ref TEXT);
+CREATE TABLE IF NOT EXISTS flows(intent TEXT, flow_ref TEXT, family TEXT, title TEXT);
+CREATE INDEX IF NOT EXISTS flows_intent ON flows(intent);
+CREATE INDEX IF NOT EXISTS flows_ref ON flows(flow_ref);
+CREATE TABLE IF NOT EXISTS flow_exports(flow_ref TEXT PRIMARY KEY, brick TEXT NOT NULL, export TEXT NOT NULL, file TEXT, version TEXT);
+CREATE TABLE IF NOT EXISTS flow_steps(flow_ref TEXT NOT NULL, pos INTEGER NOT NULL, step TEXT, action_key TEXT, use_chain TEXT, PRIMARY KEY(flow_ref, pos));
+CREATE TABLE IF NOT EXISTS step_caps(flow_ref TEXT NOT NULL, pos INTEGER NOT NULL, cap TEXT NOT NULL, mode TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS step_caps_cap ON step_caps(cap);
+CREATE INDEX IF NOT EXISTS step_caps_ref ON step_caps(flow_ref, pos);
+CREATE TABLE IF NOT EXISTS capabilities(cap TEXT NOT NULL, pos INTEGER NOT NULL, role TEXT NOT NULL, PRIMARY KEY(cap, pos));
+CREATE INDEX IF NOT EXISTS capabilities_role ON capabilities(role);
+CREATE TABLE IF NOT EXISTS experts(role TEXT PRIMARY KEY, expert TEXT, wakeup TEXT);
+CREATE TABLE IF NOT EXISTS agents(client TEXT NOT NULL, agent_id TEXT NOT NULL, onboarding TEXT, PRIMARY KEY(client, agent_id));
+CREATE TABLE IF NOT EXISTS doc_files(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER);
+CREATE TABLE IF NOT EXISTS docs(path TEXT PRIMARY KEY, id TEXT, nomenclature TEXT, workflow TEXT, ref TEXT);
+CREATE INDEX IF NOT EXISTS docs_nomenclature ON docs(nomenclature);
+CREATE INDEX IF NOT EXISTS docs_workflow ON docs(workflow);
+"""
+
+def _text(*parts: Any) -> str:
+    out = []
+    for p in parts:
+        if isinstance(p, (list, tuple)): out += [str(s) for s in p if s]
+        elif p: out.append(str(p))
+    return " ".join(out)
+
+def _export_terms(reg: Registry):
+    tb = reg.term_by_id(); tables: Dict[str, list] = {"terms": [], "term_aliases": [], "term_flows": []}; search = []
+    for x in reg.facet("term"):
+        tid = x.get("id")
+        if not tid: continue
+        tables["terms"].append((tid, x.get("label"), x.get("owner")))
+        for kind in ("aliases", "tags"):
+            tables["term_aliases"] += [(tid, kind[:-1] if kind=="tags" else "alias", a, a.lower()) for a in (x.get(kind) or []) if isinstance(a, str)]
+        tables["term_flows"] += [(tid, ref) for ref in ((tb.get(tid) or {}).get("related_workflows") or [])]
+        search.append(("term", tid, _text(tid, x.get("label"), x.get("aliases"), x.get("tags"))))
+    return tables, search, reg.deps("facet:term") + reg.deps("term_by_id")
+
+def _export_router(reg: Registry):
+    return {"router": list(reg.router().items())}, [], reg.deps("router")
+
+def _export_flows(reg: Registry):
+    tables: Dict[str, list] = {"flows": [], "flow_exports": [], "flow_steps": [], "step_caps": []}; search = []
+    deps = [reg.flow/"bricks"/"ARKFLOW-00-MANIFEST.yaml", reg.flow/"ARKFLOW00-INDEX.yaml"]
+    for e in reg.manifest():
+        tables["flows"].append((e.get("intent"), e.get("flow_ref"), e.get("family"), e.get("title")))
+        search.append(("flow", e.get("flow_ref") or e.get("intent"), _text(e.get("intent"), e.get("title"), e.get("family"), e.get("description"))))
+    for bid, meta in reg.index().items():
+        meta = meta or {}
+        bfile = reg.flow/meta.get("file","MISSING"); deps.append(bfile)
+        flows = _load_yaml(bfile).get("flows") or {}
+        for export in (meta.get("exports") or []):
+            ref = f"{bid}:{export}"
+            tables["flow_exports"].append((ref, bid, export, meta.get("file"), meta.get("version")))
+            for pos, st in enumerate((flows.get(export) or {}).get("sequence") or []):
+                if not isinstance(st, dict): continue
+                tables["flow_steps"].append((ref, pos, st.get("step"), st.get("action_key"), st.get("use_chain")))
+                for k, mode in (("requires_caps", "all"), ("requires_caps_any", "any")):
+                    tables["step_caps"] += [(ref, pos, c, mode) for c in (st.get(k) or [])]
+    return tables, search, deps
+
+def _export_capabilities(reg: Registry):
+    rows = []; search = []
+    for x in reg.facet("capability"):
+        rows += [(x.get("id"), i, r) for i, r in enumerate(x.get("roles") or [])]
+        search.append(("capability", x.get("id"), _text(x.get("id"), x.get("roles"))))
+    return {"capabilities": rows}, search, reg.deps("facet:capability")
+
+def _export_agents(reg: Registry):
+    tables: Dict[str, list] = {"experts": [], "agents": []}; search = []
+    for x in reg.facet("agent"):
+        if x.get("kind")=="expert":
+            tables["experts"].append((x.get("role"), x.get("expert"), x.get("wakeup")))
+            search.append(("agent", x.get("expert"), _text(x.get("role"))))
+        else:
+            tables["agents"].append((x.get("client"), x.get("agent_id"), x.get("onboarding")))
+            search.append(("agent", x.get("onboarding"), _text(x.get("client"), x.get("agent_id"))))
+    return tables, search, reg.deps("facet:agent")
+
+EXPORT_SECTIONS = {
+    "terms": (_export_terms, ("term",)),
+    "router": (_export_router, ()),
+    "flows": (_export_flows, ("flow",)),
+    "capabilities": (_export_capabilities, ("capability",)),
+    "agents": (_export_agents, ("agent",)),
+}
+
+def _export_docs(reg: Registry, con) -> dict:
+    # Suivi par fichier : seuls les .md nouveaux / modifiés sont relus (front-matter), les disparus supprimés
+    key = reg.opt("doc_frontmatter_key","arkaref")
+    row = con.execute("SELECT value FROM meta WHERE key='doc_frontmatter_key'").fetchone()
+    if not row or row[0]!=key:
+        con.execute("DELETE FROM doc_files"); con.execute("DELETE FROM docs"); con.execute("DELETE FROM search WHERE facet='doc'")
+        con.execute("INSERT OR REPLACE INTO meta VALUES('doc_frontmatter_key', ?)", (key,))
+    known = {p: (m, s) for p, m, s in con.execute("SELECT path, mtime_ns, size FROM doc_files")}
+    mds = reg.tree()[0]["*.md"]
+    seen = set(); updated = 0
+    for md in mds:
+        rel = md.relative_to(reg.os_root).as_posix(); seen.add(rel)
+        sig = _sig(md)
+        if sig is None or known.get(rel)==sig: continue
+        updated += 1
+        con.execute("DELETE FROM docs WHERE path=?", (rel,))
+        if rel in known: con.execute("DELETE FROM search WHERE facet='doc' AND key=?", (rel,))
+        con.execute("INSERT OR REPLACE INTO doc_files VALUES(?,?,?)", (rel, sig[0], sig[1]))
+        fm = _frontmatter(md).get(key)
+        if isinstance(fm, dict):
+            con.execute("INSERT INTO docs VALUES(?,?,?,?,?)", (rel, fm.get("id"), fm.get("nomenclature"), fm.get("workflow"),
+                                                              json.dumps(fm, ensure_ascii=False, default=str)))
+            con.execute("INSERT INTO search(facet, key, text) VALUES('doc',?,?)",
+                        (rel, _text(rel, *(v for v in fm.values() if isinstance(v, (str, list))))))
+    gone = [p for p in known if p not in seen]
+    for rel in gone:
+        con.execute("DELETE FROM doc_files WHERE path=?", (rel,)); con.execute("DELETE FROM docs WHERE path=?", (rel,))
+        con.execute("DELETE FROM search WHERE facet='doc' AND key=?", (rel,))
+    return {"scanned": len(mds), "updated": updated, "removed": len(gone)}
+
+def export_sqlite(root: Path, path: Optional[str]=None) -> dict:
+    import sqlite3
+    reg = registry(root)
+    db = Path(path).resolve() if path else reg.cache_path("sqlite_export", "./.cache/arkarouting.sqlite")
+    db.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(db))
+    try:
+        con.execute("PRAGMA journal_mode=WAL")  # lecteurs (outils TS) non bloqués pendant la mise à jour
+        con.execute("CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT)")
+        row = con.execute("SELECT value FROM meta WHERE key='schema'").fetchone()
+        if row and row[0]!=EXPORT_SCHEMA:
+            for (name,) in con.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE 'search_%'").fetchall():
+                con.execute(f'DROP TABLE IF EXISTS "{name}"')
+        con.executescript(_EXPORT_DDL)
+        try:
+            con.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(facet UNINDEXED, key UNINDEXED, text, tokenize='unicode61 remove_diacritics 2')")
+            fts = True
+        except sqlite3.OperationalError:  # SQLite compilé sans FTS5 : table simple (recherche LIKE)
+            con.execute("CREATE TABLE IF NOT EXISTS search(facet TEXT, key TEXT, text TEXT)")
+            fts = False
+        status: Dict[str, Any] = {}
+        with con:
+            con.execute("INSERT OR REPLACE INTO meta VALUES('schema', ?)", (EXPORT_SCHEMA,))
+            con.execute("INSERT OR REPLACE INTO meta VALUES('os_root', ?)", (str(reg.os_root),))
+            stored = {s: json.loads(d) for s, d in con.execute("SELECT section, deps FROM sources")}
+            for name, (build, facets) in EXPORT_SECTIONS.items():
+                old = stored.get(name)
+                if old and all(_sig(Path(p))==(tuple(sg) if sg else None) for p, sg in old):
+                    status[name] = "unchanged"; continue
+                tables, search, deps = build(reg)
+                for t, rows in tables.items():
+                    con.execute(f"DELETE FROM {t}")
+                    if rows: con.executemany(f"INSERT INTO {t} VALUES({','.join('?'*len(rows[0]))})", rows)
+                for f in facets: con.execute("DELETE FROM search WHERE facet=?", (f,))
+                con.executemany("INSERT INTO search(facet, key, text) VALUES(?,?,?)", search)
+                con.execute("INSERT OR REPLACE INTO sources VALUES(?,?)",
+                            (name, json.dumps([[str(p), _sig(p)] for p in dict.fromkeys(deps)])))
+                status[name] = "rebuilt"
+            status["docs"] = _export_docs(reg, con)
+        counts = {t: con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                  for t in ("terms","term_aliases","router","flows","flow_exports","flow_steps","step_caps","capabilities","experts","agents","docs","search")}
+    finally:
+        con.close()
+    return {"path": str(db), "fts5": fts, "sections": status, "counts": counts}
+
+# Multi-tenant (serve --tenant NOM=DIR) : plusieurs racines ARKA_ROUTING dans un même process, chacune
+# avec son registre (snapshot, cache de résultats) ; les fichiers identiques entre racines partagent
+# leur valeur parsée (_BY_DIGEST). Routage : préfixe /<tenant>/<méthode> ou paramètre `tenant`.
+# Snapshot compilé mappé en mémoire (serve --workers) : réponses JSON déjà encodées des requêtes chaudes
+# (resolve par intent x client, lookup des id/labels/alias, catalog par facette), dans un seul fichier trié
+# par clé. Les workers le mappent (mmap, lecture seule) : pages partagées, recherche dichotomique sur la table
+# d'entrées, aucun parsing ni encodage JSON. Hors snapshot : calcul habituel dans le worker.
+# Format : SNAP_MAGIC, en-tête <QQQ (génération, nb d'entrées, création en ns), puis n entrées <QIQI
+# (offset clé, long. clé, offset valeur, long. valeur) triées par clé, puis clés et valeurs.
+SNAP_MAGIC = b"ARKSNAP1"
+_SNAP_HEAD = "<QQQ"; _SNAP_ENT = "<QIQI"
+
+def _snap_key(*parts: Any) -> bytes:
+    return "\x1f".join("" if x is None else str(x) for x in parts).encode("utf-8")
+
+def build_snapshot(reg: Registry, path: Path, generation: int=0) -> dict:
+    import struct
+    t0 = time.perf_counter()
+    enc = lambda o: json.dumps(o, ensure_ascii=False, default=_json_default).encode("utf-8")
+    ent: Dict[bytes, bytes] = {}
+    rows, _ = materialize_resolve(reg)
+    for (it, c), r in rows.items(): ent[_snap_key("resolve", it, c)] = enc(r)
+    _, aliases = scan_wakeup(reg.os_root)
+    words = [v for t in reg.terms() for v in [t.get("id"), t.get("label"), *(t.get("aliases") or [])]]
+    words += [a for al in (aliases or {}).values() for a in (al or [])]
+    for w in dict.fromkeys(x for x in words if isinstance(x, str) and x):
+        intent, cands = reg.match(w)
+        ent[_snap_key("lookup", w)] = enc({"term": w, "intent": intent, **({"candidates": cands} if cands is not None else {})})
+        if intent: ent[_snap_key("intent", w)] = intent.encode("utf-8")
+    for fid in reg.facet_ids(): ent[_snap_key("catalog", fid)] = enc(catalog(reg.root, fid, None, None))
+    ent[_snap_key("catalog", None)] = enc(catalog(reg.root, None, None, None))
+    keys = sorted(ent)
+    hs, es = struct.calcsize(_SNAP_HEAD), struct.calcsize(_SNAP_ENT)
+    off = len(SNAP_MAGIC) + hs + es * len(keys)
+    table = []; blob = []
+    for k in keys:
+        v = ent[k]; table.append(struct.pack(_SNAP_ENT, off, len(k), off + len(k), len(v)))
+        blob += [k, v]; off += len(k) + len(v)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(SNAP_MAGIC + struct.pack(_SNAP_HEAD, generation, len(keys), time.time_ns()))
+        f.write(b"".join(table)); f.write(b"".join(blob))
+    os.replace(tmp, path)
+    return {"path": str(path), "generation": generation, "entries": len(keys), "bytes": off,
+            "ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+class MappedSnapshot:
+    def __init__(self, path: Path):
+        import mmap, struct
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(SNAP_MAGIC)] != SNAP_MAGIC: raise ValueError(f"snapshot invalide : {path}")
+        hs = struct.calcsize(_SNAP_HEAD)
+        self.generation, self.n, _ = struct.unpack_from(_SNAP_HEAD, self.mm, len(SNAP_MAGIC))
+        self._base = len(SNAP_MAGIC) + hs; self._es = struct.calcsize(_SNAP_ENT)
+        self._ent = struct.Struct(_SNAP_ENT).unpack_from
+
+    def get(self, *parts: Any) -> Optional[bytes]:
+        key = _snap_key(*parts); mm = self.mm
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            ko, kl, vo, vl = self._ent(mm, self._base + mid * self._es)
+            k = mm[ko:ko + kl]
+            if k == key: return mm[vo:vo + vl]
+            if k < key: lo = mid + 1
+            else: hi = mid
+        return None
+
+def _snap_answer(snap: MappedSnapshot, name: str, params: dict) -> Optional[bytes]:
+    # Réponse pré-encodée si la requête est couverte par le snapshot (mêmes normalisations que resolve/catalog)
+    if name=="resolve":
+        intent = params.get("intent") or None; client = params.get("client") or None
+        if not intent and params.get("term"):
+            iv = snap.get("intent", params["term"])
+            if iv is None: return None
+            intent = iv.decode("utf-8")
+        return snap.get("resolve", intent, client) if intent else None
+    if name=="lookup" and params.get("term"):
+        return snap.get("lookup", params["term"])
+    if name=="catalog" and not params.get("grep") and not (params.get("client") and params.get("facet")=="agent"):
+        return snap.get("catalog", params.get("facet") or None)
+    return None
+
+SNAPSHOT: Optional[Tuple[Path, MappedSnapshot]] = None  # (racine servie, snapshot) dans un worker
+BACKEND: Optional[Path] = None  # worker pré-fork : socket du registre unique du superviseur
+
+def _dispatch(name: str, root: Path, params: Any) -> Any:
+    # Dans un worker pré-fork, tout ce que le snapshot ne sert pas est relayé au superviseur (un seul
+    # registre parsé, pas de copie par worker) ; sinon appel direct de METHODS
+    if not BACKEND: return METHODS[name](root, params)
+    tenant = next((t for t, r in TENANTS.items() if r==root), None)
+    if tenant and isinstance(params, dict): params = {**params, "tenant": tenant}
+    resp = _daemon_call(BACKEND, name, params)
+    err = resp.get("error")
+    if err: raise Relayed(err.get("message") or "erreur", (err.get("data") or {}).get("status", 500))
+    return resp.get("result")
+
+TENANTS: Dict[str, Path] = {}
+
+def tenant_root(root: Path, params: Any) -> Path:
+    name = params.pop("tenant", None) if isinstance(params, dict) else None
+    if not name or name=="default": return root
+    if name not in TENANTS: raise NotFound(f"tenant inconnu : {name}")
+    return TENANTS[name]
+
+def tenants(root: Path) -> dict:
+    out = {}
+    for name, r in {"default": root, **TENANTS}.items():
+        reg = _REGISTRIES.get(r)
+        out[name] = {"root": str(r), "loaded": reg is not None, "snapshot": reg._snap[1] if reg else None,
+                     "result_cache": reg.results.stats() if reg else None, "resolve_table": reg.table_stats() if reg else None}
+    return {"tenants": out, "intern": intern_stats()}
+
+def _flag(v: Any) -> bool:
+    return v not in (None, False, "", "0", "false")
+
+def _first(v: Any) -> Any:
+    # GET ?uri=... arrive en liste (MULTI_PARAMS, pour get) ; refs n'en prend qu'une
+    return v[0] if isinstance(v, list) and v else v
+
+# Dispatch commun (HTTP, daemon socket Unix, CLI relayée) : params = dict JSON
+METHODS = {
+    "ping":    lambda root, p: {"ok": True, "root": str(root)},
+    "catalog": lambda root, p: catalog(root, p.get("facet"), p.get("grep"), p.get("client")),
+    "lookup":  lambda root, p: lookup(root, p.get("term")),
+    "suggest": lambda root, p: suggest(root, p.get("term"), p.get("max_distance"), p.get("limit")),
+    "resolve": lambda root, p: resolve(root, p.get("intent"), p.get("term"), p.get("client")),
+    "get":     lambda root, p: get(root, p.get("uri") or p.get("uris"), _flag(p.get("links", True))),
+    "refs":    lambda root, p: refs(root, _first(p.get("uri")), _flag(p.get("impact")), _flag(p.get("dangling"))),
+    "lookup_many":  lambda root, p: lookup_many(root, p.get("terms")),
+    "resolve_many": lambda root, p: resolve_many(root, p.get("queries")),
+    "can_advance": lambda root, p: can_advance(root, p.get("flow"), p.get("state")),
+    "rule":    lambda root, p: rule(root, p.get("ref") or p.get("refs")),
+    "authz":   lambda root, p: authz(root, p.get("role"), p.get("action"), p.get("path"), p.get("checks"), _flag(p.get("explain"))),
+    "changes": lambda root, p: changes(root, p.get("since"), p.get("wait"), p.get("epoch")),
+    "stats":   lambda root, p: {"snapshot": registry(root).snapshot(), "result_cache": registry(root).results.stats(),
+                                "resolve_table": registry(root).table_stats(), "changes": registry(root).feed.stats(), "intern": intern_stats()},
+    "tenants": lambda root, p: tenants(root),
+}
+# Options acceptées par le relais rapide (sinon : argparse + exécution locale)
+# Paramètres HTTP multi-valués (?uri=a&uri=b)
+MULTI_PARAMS = ("uri", "ref")
+
+# Capture de trafic (serve --capture FILE.jsonl) : le thread de requête ne fait qu'un put dans une file ;
+# empreinte de la réponse, sérialisation JSON et écriture se font dans un thread dédié.
+# Une ligne par requête : ts, transport (http|socket), verb, path, query, body, status, ms, bytes, digest.
+class Capture:
+    def __init__(self, path: Path):
+        import queue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.fh = open(path, "a", encoding="utf-8")
+        self.q: Any = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self.thread.start()
+
+    def record(self, transport: str, verb: str, path: str, body: bytes, t0: float, status: int, data: bytes) -> None:
+        self.q.put((time.time(), transport, verb, path, body, (time.perf_counter() - t0) * 1000, status, data))
+
+    def _run(self) -> None:
+        while True:
+            ev = self.q.get()
+            if ev is None: break
+            ts, transport, verb, path, body, ms, status, data = ev
+            p, _, qs = path.partition("?")
+            rec = {"ts": round(ts, 6), "transport": transport, "verb": verb, "path": p, "query": qs,
+                   "status": status, "ms": round(ms, 3), "bytes": len(data), "digest": _digest(data)}
+            if body: rec["body"] = body.decode("utf-8", "replace")
+            self.fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            if self.q.empty(): self.fh.flush()
+        self.fh.close()
+
+    def close(self) -> None:
+        self.q.put(None); self.thread.join(5)
+
+CAPTURE: Optional[Capture] = None
+
+def _digest(data: bytes) -> str:
+    import hashlib
+    return hashlib.blake2b(data.rstrip(b"\n"), digest_size=8).hexdigest()
+
 # HTTP server
-class Handler(BaseHTTPRequestHandler):
-    def _send(self, code, obj):
-        data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
-        self.send_response(code)
-        self.send_header("Content-Type","application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(data)))
-        self.end_headers()
-        self.wfile.write(data)
-    def do_GET(self):
-        root = Path(os.environ.get("ARKA_ROUTING_DIR") or Path(__file__).parent).resolve()
-        p = self.path.split("?",1)
-        path = p[0]; qs = (p[1] if len(p)>1 else "")
-        import urllib.parse as up
-        q = up.parse_qs(qs)
+def _http_handler():
+    from http.server import BaseHTTPRequestHandler
+    import urllib.parse as up
+    class Handler(BaseHTTPRequestHandler):
+        _resp: Optional[Tuple[int, bytes]] = None
+        _body = b""
+        def handle_one_request(self):
+            if not CAPTURE: return super().handle_one_request()
+            self._resp = None; self._body = b""; t0 = time.perf_counter()
+            super().handle_one_request()
+            if self._resp is not None: CAPTURE.record("http", self.command, self.path, self._body, t0, *self._resp)
+        def _send(self, code, obj):
+            self._send_raw(code, json.dumps(obj, ensure_ascii=False, default=_json_default).encode("utf-8"))
+        def _error(self, e: Exception):
+            self._send(_http_status(e), {"error": str(e)})
+        def _send_raw(self, code, data):
+            self.send_response(code)
+            self.send_header("Content-Type","application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            self._resp = (code, data)
+        def _stream_changes(self, root: Path, params: dict):
+            # SSE : un événement "changes" par lot (id = version), commentaire keepalive à chaque attente vide
+            since = params.get("since"); epoch = params.get("epoch")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.close_connection = True; self._resp = (200, b"")
+            try:
+                while True:
+                    res = _dispatch("changes", root, {"since": since, "epoch": epoch, "wait": CHANGES_MAX_WAIT})
+                    if res["resync"] or res["changes"]:
+                        data = json.dumps(res, ensure_ascii=False, default=_json_default)
+                        self.wfile.write(f"id: {res['version']}\nevent: changes\ndata: {data}\n\n".encode("utf-8"))
+                        since, epoch = res["version"], res["epoch"]
+                    else:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        def _route(self, path: str, params: dict):
+            # /<tenant>/<méthode> ou /<méthode>[?tenant=...] -> (racine, méthode)
+            root = Path(os.environ.get("ARKA_ROUTING_DIR") or Path(__file__).parent).resolve()
+            segs = path.strip("/").split("/", 1)
+            if len(segs)==2 and segs[0] in TENANTS: params["tenant"] = segs[0]; path = segs[1]
+            return tenant_root(root, params), path.lstrip("/")
+        def do_GET(self):
+            p = self.path.split("?",1)
+            path = p[0]; qs = (p[1] if len(p)>1 else "")
+            q = up.parse_qs(qs)
+            try:
+                params = {k: (v if k in MULTI_PARAMS else v[0]) for k, v in q.items()}
+                root, name = self._route(path, params)
+                if name=="debug/profile":
+                    if self.client_address[0] not in ("127.0.0.1", "::1"): return self._send(403, {"error": "loopback uniquement"})
+                    return self._send(200, debug_profile(root, params.get("seconds"), params.get("interval_ms"), params.get("idle")))
+                if name=="changes" and (_flag(params.get("stream")) or "text/event-stream" in (self.headers.get("Accept") or "")):
+                    return self._stream_changes(root, params)
+                snap = SNAPSHOT
+                if snap and root==snap[0]:
+                    data = _snap_answer(snap[1], name, params)
+                    if data is not None: return self._send_raw(200, data)
+                if name not in METHODS: return self._send(404, {"error":"not_found"})
+                return self._send(200, _dispatch(name, root, params))
+            except Exception as e:
+                return self._error(e)
+        def do_POST(self):
+            # POST /rpc : corps JSON-RPC 2.0 (requête unique ou batch) ; POST /<méthode> : corps = params JSON
+            path = self.path.split("?",1)[0]
+            body = self._body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            try:
+                root, name = self._route(path, {})
+            except Exception as e:
+                return self._error(e)
+            if name!="rpc":
+                if name not in METHODS: return self._send(404, {"error":"not_found"})
+                try:
+                    params = json.loads(body or b"{}")
+                    if not isinstance(params, dict): return self._send(400, {"error":"objet JSON attendu"})
+                    root = tenant_root(root, params)
+                    return self._send(200, _dispatch(name, root, params))
+                except Exception as e:
+                    return self._error(e)
+            data = _rpc_line(root, body)
+            if not data:
+                self.send_response(204); self.end_headers(); self._resp = (204, b""); return
+            self.send_response(200)
+            self.send_header("Content-Type","application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            self._resp = (200, data)
+    return Handler
+
+# Daemon socket Unix : JSON-RPC 2.0, une requête/réponse par ligne
+def _rpc_call(root: Path, req: Any) -> Optional[dict]:
+    if not isinstance(req, dict) or not isinstance(req.get("method"), str):
+        return {"jsonrpc":"2.0","id":None,"error":{"code":-32600,"message":"invalid request"}}
+    rid = req.get("id")
+    if req["method"] not in METHODS: resp = {"jsonrpc":"2.0","id":rid,"error":{"code":-32601,"message":"method not found"}}
+    else:
         try:
-            if path=="/ping": return self._send(200, {"ok": True, "root": str(root)})
-            if path=="/catalog": return self._send(200, catalog(root, q.get("facet",[None])[0], q.get("grep",[None])[0], q.get("client",[None])[0]))
-            if path=="/lookup":  return self._send(200, lookup(root, q.get("term",[None])[0]))
-            if path=="/resolve": return self._send(200, resolve(root, q.get("intent",[None])[0], q.get("term",[None])[0], q.get("client",[None])[0]))
-            return self._send(404, {"error":"not_found"})
+            params = req.get("params") or {}
+            resp = {"jsonrpc":"2.0","id":rid,"result": _dispatch(req["method"], tenant_root(root, params), params)}
         except Exception as e:
-            return self._send(500, {"error": str(e)})
+            resp = {"jsonrpc":"2.0","id":rid,"error":{"code":-32000,"message":str(e),"data":{"status": _http_status(e)}}}
+    return resp if "id" in req else None  # notification : pas de réponse
+
+def _rpc_line(root: Path, line: bytes) -> Optional[bytes]:
+    # Une ligne = une requête ou un batch (tableau) JSON-RPC 2.0 ; None si rien à répondre
+    try:
+        payload = json.loads(line)
+    except ValueError:
+        resp: Any = {"jsonrpc":"2.0","id":None,"error":{"code":-32700,"message":"parse error"}}
+    else:
+        if isinstance(payload, list):
+            resp = [r for r in (_rpc_call(root, q) for q in payload) if r is not None] or None
+            if not payload: resp = {"jsonrpc":"2.0","id":None,"error":{"code":-32600,"message":"invalid request"}}
+        else:
+            resp = _rpc_call(root, payload)
+    return None if resp is None else json.dumps(resp, ensure_ascii=False, default=_json_default).encode("utf-8") + b"\n"
+
+def serve_stdio(root: Path) -> None:
+    # Mode pipe longue durée : JSON-RPC délimité par des sauts de ligne sur stdin/stdout
+    out = sys.stdout.buffer
+    for line in sys.stdin.buffer:
+        if not line.strip(): continue
+        data = _rpc_line(root, line)
+        if data:
+            out.write(data); out.flush()
+
+def serve_socket(root: Path, sock: Path):
+    import socketserver
+    class Conn(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip(): continue
+                t0 = time.perf_counter()
+                data = _rpc_line(root, line)
+                if data:
+                    self.wfile.write(data); self.wfile.flush()
+                if CAPTURE: CAPTURE.record("socket", "RPC", "/rpc", line.rstrip(b"\n"), t0, 200 if data else 204, data or b"")
+    if sock.exists():
+        try:
+            _daemon_call(sock, "ping", {})
+        except (OSError, ValueError):
+            sock.unlink()  # socket orphelin d'un daemon arrêté
+        else:
+            raise SystemExit(f"[ERR] daemon déjà actif sur {sock}")
+    sock.parent.mkdir(parents=True, exist_ok=True)
+    srv = socketserver.ThreadingUnixStreamServer(str(sock), Conn)
+    srv.daemon_threads = True
+    os.chmod(sock, 0o600)
+    return srv
+
+# Pré-fork (serve --workers N) : N process HTTP sur le même port (SO_REUSEPORT : un socket d'écoute par worker,
+# répartition par le noyau ; à défaut, socket d'écoute unique hérité). Le superviseur compile le snapshot
+# mappé, le recompile quand les sources bougent (version du snapshot resolve ou du flux /changes) puis envoie
+# SIGHUP aux workers (remap), et relance un worker mort. Le superviseur garde le seul registre parsé : ce que
+# le snapshot ne couvre pas (grep, refs, authz, suggest, get, catalog agent+client, lookup sans correspondance,
+# tenants, /changes, /rpc) est relayé par le worker au socket interne du superviseur (JSON-RPC, thread par
+# requête), qui sert aussi le socket Unix public (--socket).
+def _http_server(port: int, listener: Any=None):
+    import socket
+    from http.server import ThreadingHTTPServer
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        def server_bind(self):
+            if listener is None and hasattr(socket, "SO_REUSEPORT"):
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            super().server_bind()
+        def service_actions(self):
+            if self.ppid and os.getppid()!=self.ppid: os._exit(0)  # superviseur disparu
+    if listener is None:
+        srv = Server(("0.0.0.0", port), _http_handler())
+    else:
+        srv = Server(("0.0.0.0", port), _http_handler(), bind_and_activate=False)
+        srv.socket.close(); srv.socket = listener; srv.server_address = listener.getsockname()
+    srv.ppid = None
+    return srv
+
+def _prefork_worker(root: Path, port: int, snap_path: Path, listener: Any, backend: Path) -> None:
+    import signal
+    global SNAPSHOT, BACKEND
+    BACKEND = backend
+    def remap(*_):
+        global SNAPSHOT
+        try:
+            SNAPSHOT = (root, MappedSnapshot(snap_path))
+        except (OSError, ValueError):
+            pass  # garde l'ancien mapping
+    signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, remap)
+    remap()
+    srv = _http_server(port, listener); srv.ppid = os.getppid()
+    srv.serve_forever()
+
+def serve_prefork(root: Path, port: int, workers: int, usrv: Any=None) -> None:
+    import gc, signal, socket
+    reg = registry(root)
+    snap_path = reg.cache_path("snapshot_file", "./.cache/snapshot.bin")
+    gen = 1
+    print(json.dumps({"snapshot": build_snapshot(reg, snap_path, gen), "workers": workers}, ensure_ascii=False), file=sys.stderr)
+    listener = None
+    if not hasattr(socket, "SO_REUSEPORT"):
+        listener = socket.create_server(("0.0.0.0", port), reuse_port=False); listener.listen(128)
+    backend_path = snap_path.with_name(f"prefork-{os.getpid()}.sock")
+    backend = serve_socket(root, backend_path)
+    for srv in (backend, usrv):
+        if srv: threading.Thread(target=srv.serve_forever, daemon=True).start()
+    pids: Dict[int, float] = {}
+    def spawn():
+        gc.freeze()  # objets hérités hors des passes du GC : les workers ne salissent pas les pages du registre
+        pid = os.fork()
+        if pid==0:
+            try:
+                _prefork_worker(root, port, snap_path, listener, backend_path)
+            finally:
+                os._exit(1)
+        pids[pid] = time.monotonic()
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(1))
+    signal.signal(signal.SIGINT, lambda *_: stop.append(1))
+    for _ in range(workers): spawn()
+    interval = max(float(reg.opt("snapshot_check_ms", 0) or 0) / 1000, 0.25)
+    seen = (reg.snapshot(), reg.feed.refresh(reg))
+    try:
+        while not stop:
+            time.sleep(interval)
+            while pids:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if not pid: break
+                started = pids.pop(pid, None)
+                if stop or started is None: continue
+                print(json.dumps({"worker_exit": pid, "status": status}), file=sys.stderr)
+                if time.monotonic() - started < 1.0: time.sleep(1.0)  # pas de boucle de relance serrée
+                spawn()
+            cur = (reg.snapshot(), reg.feed.refresh(reg))
+            if cur != seen:
+                seen = cur; gen += 1
+                print(json.dumps({"snapshot": build_snapshot(reg, snap_path, gen)}, ensure_ascii=False), file=sys.stderr)
+                for pid in pids: os.kill(pid, signal.SIGHUP)
+    finally:
+        backend.shutdown(); backend.server_close(); backend_path.unlink(missing_ok=True)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(pids):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+# Rejeu d'une capture contre un serveur HTTP : N workers, débit cible (req/s, 0 = au plus vite) ;
+# les requêtes socket (JSON-RPC) sont rejouées en POST /rpc. Compare statut et empreinte de réponse.
+def _pcts(xs: List[float]) -> dict:
+    xs = sorted(xs)
+    if not xs: return {"n": 0}
+    at = lambda q: round(xs[min(len(xs)-1, int(q*len(xs)))], 3)
+    return {"n": len(xs), "mean": round(sum(xs)/len(xs), 3), "p50": at(.5), "p90": at(.9), "p99": at(.99), "max": round(xs[-1], 3)}
+
+def replay(capture: str, target: str, concurrency: int=8, rate: float=0.0, limit: Optional[int]=None, timeout: float=10.0) -> dict:
+    import http.client, urllib.parse as up
+    recs = []
+    with open(capture, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(r, dict) and r.get("path"): recs.append(r)
+            if limit and len(recs) >= limit: break
+    u = up.urlsplit(target if "://" in target else "http://" + target)
+    n = len(recs); lat: List[Optional[float]] = [None] * n; got: List[Any] = [None] * n
+    lock = threading.Lock(); nxt = iter(range(n))
+    t_start = time.perf_counter()
+    def work():
+        conn = None
+        while True:
+            with lock:
+                i = next(nxt, None)
+            if i is None: break
+            r = recs[i]
+            if rate > 0:
+                delay = t_start + i / rate - time.perf_counter()
+                if delay > 0: time.sleep(delay)
+            url = r["path"] + ("?" + r["query"] if r.get("query") else "")
+            body = r.get("body")
+            verb = "POST" if body is not None or r.get("verb") in ("POST", "RPC") else "GET"
+            t0 = time.perf_counter()
+            try:
+                if conn is None: conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=timeout)
+                conn.request(verb, url, body=(body or "").encode("utf-8") if verb=="POST" else None,
+                             headers={"Content-Type": "application/json"} if verb=="POST" else {})
+                resp = conn.getresponse(); data = resp.read()
+                lat[i] = (time.perf_counter() - t0) * 1000; got[i] = (resp.status, len(data), _digest(data))
+                if resp.will_close: conn.close(); conn = None
+            except (OSError, http.client.HTTPException) as e:
+                lat[i] = (time.perf_counter() - t0) * 1000; got[i] = e
+                if conn: conn.close(); conn = None
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(max(1, min(concurrency, n or 1)))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t_start
+    errors, status_diff, body_diff, by_path = [], [], [], {}
+    for r, g, ms in zip(recs, got, lat):
+        by_path.setdefault(r["path"], []).append(ms)
+        if isinstance(g, Exception):
+            errors.append({"path": r["path"], "query": r.get("query"), "error": str(g) or type(g).__name__}); continue
+        if g[0] >= 500: errors.append({"path": r["path"], "query": r.get("query"), "status": g[0]})
+        if r.get("status") is not None and g[0] != r["status"]:
+            status_diff.append({"path": r["path"], "query": r.get("query"), "captured": r["status"], "replayed": g[0]})
+        elif r.get("digest") and g[2] != r["digest"]:
+            body_diff.append({"path": r["path"], "query": r.get("query"), "body": r.get("body"), "captured_bytes": r.get("bytes"), "replayed_bytes": g[1]})
+    return {"target": f"{u.hostname}:{u.port or 80}", "requests": n, "concurrency": len(threads), "rate": rate or None,
+            "elapsed_s": round(elapsed, 3), "throughput_rps": round(n / elapsed, 1) if elapsed else None,
+            "latency_ms": _pcts([x for x in lat if x is not None]),
+            "captured_latency_ms": _pcts([r["ms"] for r in recs if isinstance(r.get("ms"), (int, float))]),
+            "by_path": {p: _pcts(xs) for p, xs in sorted(by_path.items())},
+            "errors": len(errors), "status_mismatches": len(status_diff), "body_mismatches": len(body_diff),
+            "samples": {"errors": errors[:10], "status": status_diff[:10], "body": body_diff[:10]}}
+
+# Profilage à la demande. Sampler : pile Python de chaque thread toutes les `interval` s
+# (sys._current_frames), agrégée en piles repliées "racine;...;feuille N" (flamegraph.pl, speedscope).
+# Les threads au repos (select/accept/lecture socket/attente) sont écartés sauf idle=True.
+_IDLE_LEAVES = ("select (selectors.py", "accept (socket.py", "readinto (socket.py", "wait (threading.py",
+                "serve_forever (socketserver.py", "_run (arkarouting.py")
+
+def _frame_label(fr) -> str:
+    co = fr.f_code
+    return f"{co.co_name} ({os.path.basename(co.co_filename)}:{co.co_firstlineno})"
+
+class Sampler:
+    def __init__(self, interval: float=0.005, threads: Optional[set]=None, idle: bool=False):
+        self.interval = interval; self.threads = threads; self.idle = idle
+        self.counts: Dict[str, int] = {}; self.samples = 0
+        self._stop = threading.Event(); self._thread: Any = None
+
+    def _sample(self, skip: int) -> None:
+        for tid, fr in sys._current_frames().items():
+            if tid==skip or (self.threads is not None and tid not in self.threads): continue
+            stack = []
+            while fr is not None:
+                stack.append(_frame_label(fr)); fr = fr.f_back
+            if not self.idle and stack[0].startswith(_IDLE_LEAVES): continue
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+        self.samples += 1
 
-def main():
+    def run(self, seconds: float) -> "Sampler":
+        me = threading.get_ident(); end = time.monotonic() + seconds
+        while time.monotonic() < end and not self._stop.is_set():
+            self._sample(me); self._stop.wait(self.interval)
+        return self
+
+    def start(self) -> "Sampler":
+        self._thread = threading.Thread(target=self.run, args=(float("inf"),), name="sampler", daemon=True)
+        self._thread.start(); return self
+
+    def stop(self) -> "Sampler":
+        self._stop.set()
+        if self._thread: self._thread.join()
+        return self
+
+    def collapsed(self) -> str:
+        return "".join(f"{k} {n}\n" for k, n in sorted(self.counts.items(), key=lambda kv: -kv[1]))
+
+    def report(self, top: int=25) -> dict:
+        leaf: Dict[str, int] = {}; total: Dict[str, int] = {}
+        for k, n in self.counts.items():
+            frames = k.split(";")
+            leaf[frames[-1]] = leaf.get(frames[-1], 0) + n
+            for f in set(frames): total[f] = total.get(f, 0) + n
+        busy = sum(self.counts.values())
+        rank = lambda d: [{"frame": f, "samples": n, "pct": round(100*n/busy, 1)} for f, n in sorted(d.items(), key=lambda kv: -kv[1])[:top]]
+        return {"samples": self.samples, "stack_samples": busy, "interval_ms": self.interval*1000,
+                "top_self": rank(leaf), "top_total": rank(total), "collapsed": self.collapsed()}
+
+_PROFILE_LOCK = threading.Lock()
+
+def debug_profile(root: Path, seconds: Any=5, interval_ms: Any=5, idle: Any=None) -> dict:
+    # /debug/profile?seconds=N : échantillonne le trafic en cours (un profil à la fois, 60 s max)
+    if os.environ.get("ARKA_ROUTING_DEBUG_PROFILE")!="1": raise ProfileDisabled("profilage désactivé (serve --debug-profile)")
+    if not _PROFILE_LOCK.acquire(blocking=False): raise ProfileBusy("profil déjà en cours")
+    try:
+        secs = min(max(float(seconds or 5), 0.1), 60.0); iv = min(max(float(interval_ms or 5), 1.0), 1000.0) / 1000
+        return {"seconds": secs, **Sampler(iv, idle=_flag(idle)).run(secs).report()}
+    finally:
+        _PROFILE_LOCK.release()
+
+def _profile_arg(argv: List[str]) -> Optional[str]:
+    # --profile[=FICHIER] (option globale, retirée d'argv avant le relais daemon/argparse) ; "" = nom par défaut
+    for i, tok in enumerate(argv[1:], 1):
+        if tok=="--profile" or tok.startswith("--profile="):
+            del argv[i]
+            return tok.partition("=")[2]
+    return None
+
+def _profiled(fn, out: str, name: str) -> None:
+    # cProfile (FICHIER, pstats) + piles repliées du thread principal (FICHIER.collapsed) ; top 15 sur stderr
+    import cProfile, pstats
+    out_p = Path(out or f".cache/profile-{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+    out_p.parent.mkdir(parents=True, exist_ok=True)
+    sampler = Sampler(0.001, threads={threading.get_ident()}, idle=True).start()
+    prof = cProfile.Profile()
+    try:
+        prof.runcall(fn)
+    finally:
+        sampler.stop(); prof.create_stats()
+        prof.dump_stats(str(out_p))
+        out_p.with_name(out_p.name + ".collapsed").write_text(sampler.collapsed(), encoding="utf-8")
+        pstats.Stats(prof, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+        print(f"[profile] {out_p} (pstats) + {out_p.name}.collapsed ({sampler.samples} échantillons)", file=sys.stderr)
+
+def _print(cmd: str, res: Any) -> None:
+    _client._print(cmd, res, _json_default)
+
+def main(relay: bool=True):
+    # relay=False : appelé par arkaroute.py, qui a déjà tenté le relais daemon
+    prof = _profile_arg(sys.argv)
+    if prof is not None: return _profiled(lambda: _main(False), prof, "arkarouting")
+    _main(relay)
+
+def _main(relay: bool=True):
+    if relay and _forward(sys.argv[1:]): return
+    import argparse
     ap = argparse.ArgumentParser(prog="arkarouting", description="ARKA_ROUTING — registre/routeur (lookup/catalog/resolve)")
     ap.add_argument("--routing-dir", default=None, help="Racine du module ARKA_ROUTING (défaut: *dossier du script*)")
+    ap.add_argument("--no-daemon", action="store_true", help="Ne pas relayer la commande au daemon local (serve --socket)")
+    ap.add_argument("--tenant", default=None, help="Racine hébergée par le daemon multi-tenant (serve --tenant NOM=DIR)")
     sp = ap.add_subparsers(dest="cmd")
     sp.add_parser("ping")
+    sp.add_parser("stats", help="Version du snapshot + statistiques du cache de résultats (utile via le daemon)")
+    sp.add_parser("tenants", help="Racines hébergées par le daemon (snapshot, cache) + internement des fichiers parsés")
     p_cat = sp.add_parser("catalog"); p_cat.add_argument("--facet"); p_cat.add_argument("--grep"); p_cat.add_argument("--client")
     p_lk = sp.add_parser("lookup"); p_lk.add_argument("--term", required=True)
+    p_sg = sp.add_parser("suggest", help="Candidats approchés (fautes de frappe, accents) classés par distance")
+    p_sg.add_argument("--term", required=True); p_sg.add_argument("--max-distance", dest="max_distance", type=int); p_sg.add_argument("--limit", type=int)
+    p_ch = sp.add_parser("changes", help="Changements du catalogue depuis une version (deltas par facette/id, ou resync)")
+    p_ch.add_argument("--since", default=None); p_ch.add_argument("--wait", type=float, default=None, help="Attendre le prochain changement (s)")
+    p_ch.add_argument("--epoch", default=None)
     p_rs = sp.add_parser("resolve"); p_rs.add_argument("--intent"); p_rs.add_argument("--term"); p_rs.add_argument("--client")
-    p_srv= sp.add_parser("serve"); p_srv.add_argument("--port", type=int, default=8087)
+    p_refs = sp.add_parser("refs", help="Graphe de références : liens entrants/sortants, impact d'un retrait/renommage")
+    p_refs.add_argument("--uri"); p_refs.add_argument("--impact", action="store_true"); p_refs.add_argument("--dangling", action="store_true")
+    p_get = sp.add_parser("get", help="Déréférencer des URI arka://<facet>/<id> (+ éléments liés)"); p_get.add_argument("uri", nargs="+")
+    p_az = sp.add_parser("authz", help="Autorisation ARKA_PROFIL : une décision expliquée (--role/--action/--path) ou en masse (--checks JSON)")
+    p_az.add_argument("--role"); p_az.add_argument("--action"); p_az.add_argument("--path"); p_az.add_argument("--checks")
+    p_rule = sp.add_parser("rule", help="Extraire des règles (refs BRIQUE:section.chemin, ids/groupes de rules_index.yaml) avec contrôle de version")
+    p_rule.add_argument("ref", nargs="+")
+    p_exp = sp.add_parser("export", help="Exporter le registre compilé (SQLite + FTS5), mise à jour incrémentale")
+    p_exp.add_argument("--sqlite", metavar="PATH", default=None, help="Base cible (défaut: option sqlite_export ou .cache/arkarouting.sqlite)")
+    sp.add_parser("rpc", help="JSON-RPC 2.0 sur stdin/stdout (une requête ou un batch par ligne)")
+    p_rep = sp.add_parser("replay", help="Rejouer une capture (serve --capture) contre un serveur : latences, erreurs, écarts")
+    p_rep.add_argument("capture", help="Fichier JSONL produit par serve --capture")
+    p_rep.add_argument("--target", default="http://127.0.0.1:8087")
+    p_rep.add_argument("--concurrency", type=int, default=8)
+    p_rep.add_argument("--rate", type=float, default=0.0, help="Requêtes/s visées (0 = au plus vite)")
+    p_rep.add_argument("--limit", type=int, default=None, help="Rejouer seulement les N premières requêtes")
+    p_rep.add_argument("--timeout", type=float, default=10.0)
+    p_srv= sp.add_parser("serve"); p_srv.add_argument("--port", type=int, default=8087, help="Port HTTP (0 = pas d'HTTP)")
+    p_srv.add_argument("--tenant", dest="tenants", action="append", default=[], metavar="NOM=DIR",
+                       help="Héberger une autre racine ARKA_ROUTING (répétable) : /<NOM>/<méthode> ou param tenant")
+    p_srv.add_argument("--debug-profile", action="store_true", help="Activer /debug/profile?seconds=N (loopback uniquement)")
+    p_srv.add_argument("--capture", metavar="FILE.jsonl", default=None, help="Enregistrer chaque requête (chemin, params, durée, taille, empreinte)")
+    p_srv.add_argument("--socket", nargs="?", const="", default=None, help=f"Écoute aussi sur un socket Unix (défaut: ${SOCKET_ENV} ou .cache/arkarouting.sock)")
+    p_srv.add_argument("--workers", type=int, default=0, help="Pré-fork : N process HTTP (SO_REUSEPORT) sur un snapshot compilé mappé en mémoire")
+    p_srv.add_argument("--warm", action="store_true", help="Matérialiser la table (intent, client) -> resolve au démarrage (durée, taille sur stderr)")
     args = ap.parse_args()
     root = Path(args.routing_dir or Path(__file__).parent).resolve()
-    if args.cmd=="ping":
-        print(json.dumps({"ok": True, "root": str(root)}, ensure_ascii=False)); return
-    if args.cmd=="catalog":
-        print(json.dumps(catalog(root, args.facet, args.grep, args.client), ensure_ascii=False, indent=2)); return
-    if args.cmd=="lookup":
-        print(json.dumps(lookup(root, args.term), ensure_ascii=False, indent=2)); return
-    if args.cmd=="resolve":
-        print(json.dumps(resolve(root, args.intent, args.term, args.client), ensure_ascii=False, indent=2)); return
+    if args.tenant and args.tenant!="default" and args.cmd!="serve":
+        raise SystemExit(f"[ERR] --tenant {args.tenant} : daemon multi-tenant injoignable (serve --socket --tenant {args.tenant}=DIR)")
+    if args.cmd in METHODS:
+        params = {k: getattr(args, k) for k in DAEMON_ARGS[args.cmd] + ((DAEMON_POSITIONAL[args.cmd],) if args.cmd in DAEMON_POSITIONAL else ())}
+        _print(args.cmd, METHODS[args.cmd](root, params)); return
+    if args.cmd=="export":
+        _print(args.cmd, export_sqlite(root, args.sqlite)); return
+    if args.cmd=="rpc":
+        serve_stdio(root); return
+    if args.cmd=="replay":
+        if not Path(args.capture).exists(): raise SystemExit(f"[ERR] capture introuvable : {args.capture}")
+        res = replay(args.capture, args.target, args.concurrency, args.rate, args.limit, args.timeout)
+        _print(args.cmd, res)
+        if res["errors"]: sys.exit(1)
+        return
     if args.cmd=="serve":
         os.environ["ARKA_ROUTING_DIR"] = str(root)
-        HTTPServer(("0.0.0.0", args.port), Handler).serve_forever(); return
+        os.environ["ARKA_ROUTING_DEBUG_PROFILE"] = "1" if args.debug_profile else "0"
+        for t in args.tenants:
+            name, eq, d = t.partition("=")
+            if not eq or not name or "/" in name: raise SystemExit(f"[ERR] --tenant NOM=DIR attendu : {t}")
+            if not (Path(d) / "bricks").is_dir(): raise SystemExit(f"[ERR] racine ARKA_ROUTING introuvable : {d}")
+            TENANTS[name] = Path(d).resolve()
+        import signal
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # nettoyage du socket sur kill
+        if args.warm:
+            for name, r in {"default": root, **TENANTS}.items():
+                reg = registry(r); reg.materialize = True
+                reg.resolve_table(reg.snapshot())
+                print(json.dumps({"warm": name, **reg.table_stats()}, ensure_ascii=False), file=sys.stderr)
+        global CAPTURE
+        if args.capture: CAPTURE = Capture(Path(args.capture))
+        if args.workers > 1 and (not args.port or args.capture):
+            raise SystemExit("[ERR] --workers : HTTP requis (--port), sans --capture")
+        usrv = serve_socket(root, Path(_socket_path(root, args.socket or None))) if args.socket is not None else None
+        try:
+            if args.workers > 1:
+                serve_prefork(root, args.port, args.workers, usrv); return
+            if usrv and args.port:
+                threading.Thread(target=usrv.serve_forever, daemon=True).start()
+            elif usrv:
+                usrv.serve_forever(); return
+            from http.server import ThreadingHTTPServer
+            srv = ThreadingHTTPServer(("0.0.0.0", args.port), _http_handler())
+            srv.daemon_threads = True
+            srv.serve_forever()
+        finally:
+            if usrv:
+                usrv.server_close(); Path(usrv.server_address).unlink(missing_ok=True)
+            if CAPTURE: CAPTURE.close()
+        return
     ap.print_help()
 
 if __name__ == "__main__":
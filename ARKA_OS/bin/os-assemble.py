@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# os-assemble.py — Assemblage des profils (master-assembly.yaml / master-profiles.yaml) :
+# contraintes de version résolues contre l'index, overrides en chemin pointé, cache par profil
+# (clé = empreintes des briques d'entrée), profils reconstruits en parallèle.
+import os, re, sys, json, time, hashlib, argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+# master -> (document maître, index de ses briques)
+MASTERS = {
+    "core":   ("ARKA_CORE/master-assembly.yaml", "ARKA_CORE/ARKORE00-INDEX.yaml"),
+    "profil": ("ARKA_PROFIL/master-profiles.yaml", "ARKA_PROFIL/PROFILES00-INDEX.yaml"),
+}
+MANIFEST = ".cache/assembly.json"
+_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+SPEC_RX = re.compile(r"^\s*([A-Za-z0-9_.-]+?)\s*(?:@\s*(.+?))?\s*$")
+CONS_RX = re.compile(r"^(>=|<=|==|=|>|<|\^|~)?\s*v?(\d+(?:\.\d+)*)$")
+
+def _load(p: Path):
+    return yaml.load(p.read_text(encoding="utf-8"), Loader=_LOADER) or {}
+
+def _ver(s) -> tuple:
+    parts = [int(x) for x in re.findall(r"\d+", str(s or ""))[:3]]
+    return tuple(parts + [0]*(3-len(parts)))
+
+def parse_spec(spec: str):
+    # "ARKORE08-PATHS-GOVERNANCE@>=3.0.0" -> (id, ">=3.0.0") ; nom nu -> (id, None)
+    m = SPEC_RX.match(str(spec))
+    return (m.group(1), m.group(2)) if m else (str(spec), None)
+
+def satisfies(version, constraint) -> bool:
+    # Contraintes séparées par des virgules ou des espaces (toutes requises) ; ^ et ~ façon semver
+    if not constraint: return True
+    v = _ver(version)
+    for c in re.split(r"[,\s]+", constraint.strip()):
+        if not c: continue
+        m = CONS_RX.match(c)
+        if not m: return False
+        op, ref = m.group(1) or "==", _ver(m.group(2))
+        if op=="^":
+            hi = (ref[0]+1, 0, 0) if ref[0] else (0, ref[1]+1, 0) if ref[1] else (0, 0, ref[2]+1)
+            ok = ref <= v < hi
+        elif op=="~":
+            ok = ref <= v < (ref[0], ref[1]+1, 0)
+        else:
+            ok = {">=": v>=ref, "<=": v<=ref, ">": v>ref, "<": v<ref, "==": v==ref, "=": v==ref}[op]
+        if not ok: return False
+    return True
+
+def _registry(index: dict) -> dict:
+    # ARKORE00-INDEX : {registry: {...}} ; PROFILES00-INDEX : entrées à la racine
+    reg = index.get("registry") if isinstance(index.get("registry"), dict) else index
+    return {k: v for k, v in reg.items() if isinstance(v, dict) and v.get("file")}
+
+# --- empreintes (validées par mtime/taille, persistées dans le manifeste) ---
+def _sha(p: Path, hashes: dict):
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    key = str(p.relative_to(ROOT)); sig = [st.st_mtime_ns, st.st_size]
+    hit = hashes.get(key)
+    if hit and hit[:2]==sig: return hit[2]
+    h = hashlib.sha256(p.read_bytes()).hexdigest()
+    hashes[key] = sig + [h]
+    return h
+
+def _order_key(order: list, ids: list):
+    # assembly.order : numéros (01, 8…) du préfixe dominant ou noms/préfixes (CAPAMAP01)
+    pre = {}
+    for b in ids:
+        m = re.match(r"[A-Za-z]+", b)
+        if m: pre[m.group(0)] = pre.get(m.group(0), 0) + 1
+    main = max(pre, key=pre.get) if pre else ""
+    rank = {}
+    for i, tok in enumerate(order or []):
+        t = str(tok)
+        for b in ids:
+            if b in rank: continue
+            if t.isdigit():
+                if re.match(rf"^{main}0*{int(t)}(?:[-_]|$)", b): rank[b] = i
+            elif b==t or b.startswith(t + "-"):
+                rank[b] = i
+    return lambda b: (rank.get(b, len(order or [])), ids.index(b))
+
+def plan(master: str, profile: str, doc: dict, reg: dict, base: Path, hashes: dict, others: dict) -> dict:
+    # Entrées d'un profil (résolution des contraintes) + clé de cache ; pas de lecture du contenu des briques
+    spec = (doc.get("profiles") or {}).get(profile) or {}
+    issues, bricks = [], {}
+    for s in spec.get("enable") or []:
+        if isinstance(s, dict): continue  # include: (packs ARKA_EXT) hors périmètre
+        bid, cons = parse_spec(s)
+        meta = reg.get(bid)
+        if not meta:
+            issues.append({"level": "error", "brick": bid, "msg": "brique absente de l'index"}); continue
+        if not satisfies(meta.get("version"), cons):
+            issues.append({"level": "error", "brick": bid, "msg": f"version {meta.get('version')} ne satisfait pas {cons}"}); continue
+        p = base / meta["file"]
+        h = _sha(p, hashes)
+        if h is None:
+            issues.append({"level": "error", "brick": bid, "msg": f"fichier introuvable: {meta['file']}"}); continue
+        bricks[bid] = {"version": str(meta.get("version")), "file": str(p.relative_to(ROOT)), "sha256": h}
+    # requires du master (ex. ARKA_PROFIL -> ARKORE) résolus contre les autres index
+    for s in doc.get("requires") or []:
+        bid, cons = parse_spec(s)
+        v = others.get(bid)
+        if v is None:
+            issues.append({"level": "error", "brick": bid, "msg": "requires du master: brique absente des index"})
+        elif not satisfies(v, cons):
+            issues.append({"level": "error", "brick": bid, "msg": f"requires du master: version {v} ne satisfait pas {cons}"})
+    ids = sorted(bricks, key=_order_key((doc.get("assembly") or {}).get("order"), list(bricks)))
+    inputs = {"master": master, "profile": profile, "spec": spec, "order": ids,
+              "bricks": {b: [bricks[b]["version"], bricks[b]["sha256"]] for b in ids},
+              "requires": {s: others.get(parse_spec(s)[0]) for s in doc.get("requires") or []},
+              "contracts": doc.get("contracts"), "issues": issues}
+    key = hashlib.sha256(json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+    return {"master": master, "profile": profile, "key": key, "order": ids, "bricks": bricks,
+            "override": spec.get("override") or {}, "contracts": doc.get("contracts"), "issues": issues}
+
+def _set_path(data: dict, path: list, value):
+    # Clé absente à la racine mais présente sous exports : l'override vise l'export (cf. ref "BRICK:export.path")
+    if path[0] not in data and isinstance(data.get("exports"), dict) and path[0] in data["exports"]:
+        data = data["exports"]
+    for k in path[:-1]:
+        nxt = data.get(k)
+        if not isinstance(nxt, dict):
+            nxt = data[k] = {}
+        data = nxt
+    data[path[-1]] = value
+
+def build(job: dict) -> dict:
+    # Exécuté dans un worker : charge les briques, vérifie leurs requires, applique les overrides
+    issues = list(job["issues"]); data = {}
+    for bid in job["order"]:
+        p = ROOT / job["bricks"][bid]["file"]
+        try:
+            data[bid] = _load(p)
+        except Exception as e:
+            issues.append({"level": "error", "brick": bid, "msg": f"YAML invalide: {str(e).splitlines()[0]}"})
+    for bid, d in data.items():
+        for s in (d.get("requires") if isinstance(d, dict) else None) or []:
+            rid, cons = parse_spec(s)
+            if rid in job["bricks"] and not satisfies(job["bricks"][rid]["version"], cons):
+                issues.append({"level": "warning", "brick": bid, "msg": f"requires {s}: version activée {job['bricks'][rid]['version']}"})
+    for dotted, value in job["override"].items():
+        bid, _, rest = str(dotted).partition(".")
+        if bid not in data or not rest:
+            issues.append({"level": "warning", "brick": bid, "msg": f"override ignoré (brique non activée): {dotted}"}); continue
+        _set_path(data[bid], rest.split("."), value)
+    out = {"master": job["master"], "profile": job["profile"], "key": job["key"],
+           "bricks": {b: {k: job["bricks"][b][k] for k in ("version", "file")} for b in job["order"]},
+           "contracts": job["contracts"], "assembled": data}
+    dest = Path(job["out"]); dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(dest.suffix + ".tmp")
+    if job["format"]=="json":
+        tmp.write_text(json.dumps(out, ensure_ascii=False, indent=1, default=str), encoding="utf-8")
+    else:
+        tmp.write_text(yaml.dump(out, Dumper=_DUMPER, sort_keys=False, allow_unicode=True), encoding="utf-8")
+    os.replace(tmp, dest)
+    return {"issues": issues}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Assemble les profils ARKA_CORE / ARKA_PROFIL (cache par empreintes de briques)")
+    ap.add_argument("--master", choices=list(MASTERS) + ["all"], default="all")
+    ap.add_argument("--profile", action="append", default=None, help="Profil à assembler (répétable ; défaut: tous)")
+    ap.add_argument("--out", default="build/assembly", help="Répertoire de sortie (<master>.<profil>.yaml)")
+    ap.add_argument("--format", choices=("yaml", "json"), default="yaml")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Profils assemblés en parallèle")
+    ap.add_argument("--force", action="store_true", help="Ignore le cache")
+    a = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    man_p = ROOT / MANIFEST
+    try:
+        man = json.loads(man_p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        man = {}
+    hashes, keys = man.get("files") or {}, man.get("profiles") or {}
+    masters = list(MASTERS) if a.master=="all" else [a.master]
+    docs, regs = {}, {}
+    for m, (doc_f, idx_f) in MASTERS.items():
+        docs[m] = _load(ROOT / doc_f); regs[m] = _registry(_load(ROOT / idx_f))
+    report, jobs = [], []
+    for m in masters:
+        others = {b: str(v.get("version")) for o in MASTERS if o!=m for b, v in regs[o].items()}
+        base = (ROOT / MASTERS[m][1]).parent
+        names = list((docs[m].get("profiles") or {}))
+        for name in a.profile or names:
+            if name not in names:
+                if a.profile and a.master=="all": continue
+                report.append({"master": m, "profile": name, "status": "error",
+                               "issues": [{"level": "error", "msg": "profil inconnu"}]}); continue
+            job = plan(m, name, docs[m], regs[m], base, hashes, others)
+            out = ROOT / a.out / f"{m}.{name}.{a.format}"
+            job.update(out=str(out), format=a.format)
+            # relpath et non relative_to : --out peut être un chemin absolu hors d'ARKA_OS
+            rel = os.path.relpath(out, ROOT); prev = keys.get(f"{m}:{name}") or {}
+            entry = {"master": m, "profile": name, "out": rel, "bricks": len(job["order"])}
+            if not a.force and prev.get("key")==job["key"] and prev.get("out")==rel and out.exists():
+                entry.update(status="cached", issues=prev.get("issues") or [])
+            else:
+                jobs.append((entry, job))
+            report.append(entry)
+    if jobs:
+        if len(jobs)>1 and a.jobs>1:
+            with ProcessPoolExecutor(max_workers=min(a.jobs, len(jobs))) as ex:
+                results = list(ex.map(build, [j for _, j in jobs]))
+        else:
+            results = [build(j) for _, j in jobs]
+        for (entry, job), res in zip(jobs, results):
+            entry.update(status="built", issues=res["issues"])
+            keys[f"{job['master']}:{job['profile']}"] = {"key": job["key"], "out": entry["out"], "issues": res["issues"]}
+    man_p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = man_p.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"files": hashes, "profiles": keys}, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, man_p)
+    errors = sum(1 for e in report for x in e.get("issues") or [] if x.get("level")=="error")
+    print(json.dumps({"profiles": report, "built": len(jobs), "cached": sum(e.get("status")=="cached" for e in report),
+                      "errors": errors, "ms": round((time.perf_counter()-t0)*1000, 1), "ok": not errors},
+                     ensure_ascii=False, indent=2))
+    if errors: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# bench_routing_memory.py — RSS du registre ARKA_ROUTING sur un arbre synthétique multi-clients
+# Usage : python bench_routing_memory.py [--clients 60] [--roles 40] [--terms 3000] [--docs 4000]
+#                                        [--module arkarouting.py ...] [--keep DIR] [--tenants N]
+# Chaque --module est mesuré dans un process neuf (comparer deux révisions :
+#   git show <rev>:ARKA_OS/ARKA_ROUTING/arkarouting.py > /tmp/old.py ; ... --module /tmp/old.py --module ARKA_ROUTING/arkarouting.py)
+# --tenants N : N copies identiques de l'arbre chargées dans un seul process (serve multi-tenant),
+#   comparées à N process d'une racine chacun (rss_kb x N)
+import sys, json, shutil, argparse, tempfile, subprocess
+from pathlib import Path
+from typing import List
+
+HERE = Path(__file__).resolve().parent
+OS_ROOT = HERE.parent.parent
+DEFAULT_MODULE = OS_ROOT / "ARKA_ROUTING" / "arkarouting.py"
+FAMILIES = ["AUDIT", "DELIVERY", "DOC", "OPS", "MKT", "PEOPLE"]
+
+def _dump(p: Path, obj) -> None:
+    import yaml
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(yaml.safe_dump(obj, allow_unicode=True, sort_keys=False), encoding="utf-8")
+
+def generate(base: Path, clients: int, roles: int, terms: int, docs: int) -> Path:
+    os_root = base / "ARKA_OS"
+    role_names = [f"Role{r:03d}Expert" for r in range(roles)]
+    caps = {f"cap{c:03d}.run": [role_names[(c + k) % roles] for k in range(3)] for c in range(roles * 2)}
+    capnames = list(caps)
+    # FLOW : une brique par famille, un export par intent
+    intents = [f"{FAMILIES[i % len(FAMILIES)]}:T{i:05d}" for i in range(terms)]
+    registry, manifest, strategies = {}, [], []
+    for fam in FAMILIES:
+        bid = f"ARKFLOW-04{fam[0]}-WORKFLOWS-{fam}"
+        mine = [it for it in intents if it.startswith(fam + ":")]
+        flows = {}
+        for j, it in enumerate(mine):
+            chain = it.replace(":", "_") + "_CHAIN"
+            flows[chain] = {"sequence": [{"step": f"S{k}", "action_key": "DO_WORK",
+                                          "requires_caps": [capnames[(j * 7 + k) % len(capnames)]]} for k in range(3)]}
+            manifest.append({"intent": it, "title": f"Workflow {it}", "family": fam, "flow_ref": f"{bid}:{chain}"})
+            strategies.append({"match": {"by": "intent", "value": it}, "route": {"flow": f"{bid}:{chain}"}})
+        _dump(os_root / "ARKA_FLOW" / "bricks" / f"{bid}.yaml", {"id": bid, "version": "1.0.0", "exports": list(flows), "flows": flows})
+        registry[bid] = {"file": f"bricks/{bid}.yaml", "version": "1.0.0", "exports": list(flows)}
+    _dump(os_root / "ARKA_FLOW" / "ARKFLOW00-INDEX.yaml", {"id": "ARKFLOW00-INDEX", "version": "1.0.0", "registry": registry})
+    _dump(os_root / "ARKA_FLOW" / "bricks" / "ARKFLOW-00-MANIFEST.yaml", {"id": "ARKFLOW-00-MANIFEST", "version": "1.0.0", "workflows_catalog": manifest})
+    _dump(os_root / "ARKA_FLOW" / "router" / "routing.yaml", {"version": 1, "strategies": strategies})
+    _dump(os_root / "ARKA_FLOW" / "bricks" / "ARKFLOW-CAPAMAP01-CAPABILITY-MATRIX.yaml",
+          {"id": "ARKFLOW-CAPAMAP01-CAPABILITY-MATRIX", "version": "1.0.0", "capabilities": caps})
+    # CORE : nomenclature (labels / alias / tags / owner)
+    _dump(os_root / "ARKA_CORE" / "bricks" / "ARKA_NOMENCLATURE01.yaml", {"id": "ARKA_NOMENCLATURE01", "version": "1.0.0", "terms": [
+        {"id": it, "label": f"Libellé {it}", "aliases": [it.lower(), it.split(":")[1].lower()],
+         "tags": [it.split(":")[0].lower(), "synthetic"], "owner": role_names[i % roles],
+         "related_workflows": [manifest[i]["flow_ref"]]} for i, it in enumerate(intents)]})
+    # AGENT : experts + onboarding par client et par rôle
+    agents = os_root / "ARKA_AGENT"
+    for r in role_names:
+        _dump(agents / "experts" / r / "expert.yaml", {"id": r.lower(), "version": "1.0.0", "role": r})
+    for c in range(clients):
+        cl = f"CLIENT{c:03d}"
+        for r in role_names:
+            slug = r.lower()
+            _dump(agents / "clients" / cl / "agents" / slug / "onboarding.yaml",
+                  {"id": f"ONBOARDING-{cl}-{slug}", "version": "1.0.0", "client": cl, "agent_id": slug, "role": r,
+                   "expert_ref": f"experts/{r}/expert.yaml"})
+    _dump(agents / "AGENT00-INDEX.yaml", {"id": "AGENT00-INDEX", "version": "1.0.0",
+                                          "experts": {r: f"experts/{r}/expert.yaml" for r in role_names}})
+    # DOCS : front-matter arkaref réparti sur les modules
+    for d in range(docs):
+        it = intents[d % terms]
+        p = os_root / ("ARKA_CORE", "ARKA_FLOW", "ARKA_AGENT")[d % 3] / "docs" / f"d{d // 500:02d}" / f"DOC{d:05d}.md"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(f"---\narkaref:\n  id: DOC{d:05d}\n  nomenclature: {it}\n  workflow: {manifest[d % terms]['flow_ref']}\n  owner: {role_names[d % roles]}\n---\n# Doc {d}\n", encoding="utf-8")
+    # ROUTING : briques de facettes réelles + config pointant sur l'arbre synthétique
+    routing = base / "ARKA_ROUTING"
+    shutil.copytree(OS_ROOT / "ARKA_ROUTING" / "bricks", routing / "bricks")
+    _dump(routing / "bricks" / "ARKAROUTING-03-CONFIG.yaml", {"id": "ARKAROUTING-03-CONFIG", "version": "1.0.0",
+          "paths": {"os_root": str(os_root)}, "options": {"doc_frontmatter_key": "arkaref", "refgraph_cache": str(base / "refgraph.json")}})
+    return routing
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"): return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def add_tenants(base: Path, n: int) -> List[Path]:
+    # Copies de l'arbre généré, config pointant chacune sur son propre ARKA_OS
+    import yaml
+    roots = [base / "ARKA_ROUTING"]
+    for t in range(1, n):
+        tb = base / f"tenant{t:02d}"
+        if not tb.exists():
+            shutil.copytree(base / "ARKA_OS", tb / "ARKA_OS"); shutil.copytree(base / "ARKA_ROUTING", tb / "ARKA_ROUTING")
+        cfg_p = tb / "ARKA_ROUTING" / "bricks" / "ARKAROUTING-03-CONFIG.yaml"
+        cfg = yaml.safe_load(cfg_p.read_text(encoding="utf-8"))
+        cfg["paths"]["os_root"] = str(tb / "ARKA_OS"); cfg["options"]["refgraph_cache"] = str(tb / "refgraph.json")
+        _dump(cfg_p, cfg)
+        roots.append(tb / "ARKA_ROUTING")
+    return roots
+
+def child(module: str, *routings: str) -> dict:
+    import gc, time, importlib.util
+    spec = importlib.util.spec_from_file_location("arkarouting_bench", module)
+    ar = importlib.util.module_from_spec(spec); spec.loader.exec_module(ar)
+    import yaml  # noqa: F401  (chargé avant la mesure de référence)
+    gc.collect(); rss_boot = _rss_kb()
+    regs = [ar.registry(Path(r)) for r in routings]
+    # Sources parsées d'abord : la différence mesure les items et index, pas le YAML
+    for reg in regs:
+        for fid in reg.facet_ids():
+            ar.FACET_PROVIDERS[fid](reg)
+        reg._memo.clear()
+    gc.collect()
+    rss0 = _rss_kb(); t0 = time.perf_counter()
+    n = 0
+    for reg in regs:
+        for fid in reg.facet_ids():
+            n += len(reg.facet(fid)); reg.by_key(fid)
+    ms = (time.perf_counter() - t0) * 1000
+    gc.collect(); rss1 = _rss_kb()
+    out = {"module": module, "tenants": len(regs), "items": n, "rss_base_kb": rss0, "rss_kb": rss1,
+           "parsed_kb": rss0 - rss_boot, "items_kb": rss1 - rss0, "build_ms": round(ms, 1)}
+    if hasattr(ar, "intern_stats"): out["intern"] = ar.intern_stats()
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark mémoire du registre ARKA_ROUTING (arbre synthétique)")
+    ap.add_argument("--clients", type=int, default=60)
+    ap.add_argument("--roles", type=int, default=40)
+    ap.add_argument("--terms", type=int, default=3000)
+    ap.add_argument("--docs", type=int, default=4000)
+    ap.add_argument("--module", action="append", help="arkarouting.py à mesurer (répétable)")
+    ap.add_argument("--keep", help="Générer l'arbre dans ce dossier et le conserver")
+    ap.add_argument("--tenants", type=int, default=1, help="Racines identiques hébergées par un même process")
+    ap.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        print(json.dumps(child(*args.child))); return
+    base = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="arka-bench-"))
+    try:
+        routing = generate(base, args.clients, args.roles, args.terms, args.docs)
+        roots = add_tenants(base, args.tenants) if args.tenants > 1 else [routing]
+        runs = []
+        for mod in (args.module or [str(DEFAULT_MODULE)]):
+            for rs in ([roots[:1], roots] if len(roots) > 1 else [roots]):
+                out = subprocess.run([sys.executable, __file__, "--child", str(Path(mod).resolve())] + [str(r) for r in rs],
+                                     check=True, capture_output=True, text=True).stdout
+                runs.append(json.loads(out))
+        print(json.dumps({"tree": {"clients": args.clients, "roles": args.roles, "terms": args.terms, "docs": args.docs},
+                          "runs": runs}, ensure_ascii=False, indent=2))
+    finally:
+        if not args.keep: shutil.rmtree(base, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
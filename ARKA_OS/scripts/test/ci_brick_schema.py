@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# ci_brick_schema.py — validation structurelle de toutes les briques / onboardings (NDJSON)
+# Un schéma par famille (préfixe d'id), compilé une fois en fonctions v(x, path, errs).
+# Sortie : une ligne JSON par erreur {"file","path","error"} puis une ligne de synthèse.
+import os, re, sys, json, time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+BASE = Path(sys.argv[1]) if len(sys.argv)>1 else Path(".")
+JOBS = int(os.environ.get("ARKA_CI_JOBS") or 0) or os.cpu_count() or 1
+sys.path.insert(0, str((BASE / "ARKA_OS/ARKA_ROUTING").resolve()))
+import arkarouting as ar
+
+# Baseline : fichiers déjà invalides dans l'arbre livré (fiches experts en markdown sous extension .yaml).
+# Leurs erreurs sont listées ("baseline": true) sans faire échouer la CI ; une entrée qui ne produit
+# plus d'erreur est signalée comme obsolète, à retirer.
+BASELINE = frozenset({
+    "ARKA_OS/ARKA_AGENT/client/acme/experts/ARKA_AGENT00-archivist.yaml",
+    "ARKA_OS/ARKA_AGENT/client/acme/experts/ARKA_AGENT02-arka-scribe.yaml",
+    "ARKA_OS/ARKA_AGENT/client/acme/experts/ARKA_AGENT03-agent-creator-client.yaml",
+})
+
+# ── DSL de schéma ───────────────────────────────────────────────────────────
+# type Python          → isinstance
+# "any"                → tout
+# "semver"             → "X.Y.Z"
+# ("re", motif)        → str qui matche
+# ("enum", *valeurs)   → valeur parmi
+# ("list", s)          → liste d'éléments s
+# ("map", s)           → dict {str: s}
+# ("one_of", s1, s2..) → au moins un schéma sans erreur
+# dict                 → clés requises ; suffixe "?" = optionnelle ; clés en plus tolérées
+
+def _tname(x):
+    return type(x).__name__
+
+def compile_schema(s):
+    if s == "any":
+        return lambda x, p, e: None
+    if s == "semver":
+        s = ("re", r"\d+\.\d+\.\d+")
+    if isinstance(s, type):
+        def v(x, p, e, t=s):
+            if not isinstance(x, t) or (t is int and isinstance(x, bool)):
+                e.append((p, f"type attendu {t.__name__}, reçu {_tname(x)}"))
+        return v
+    if isinstance(s, tuple):
+        op, args = s[0], s[1:]
+        if op == "re":
+            rx = re.compile(args[0])
+            def v(x, p, e):
+                if not isinstance(x, str):
+                    e.append((p, f"type attendu str, reçu {_tname(x)}"))
+                elif not rx.fullmatch(x):
+                    e.append((p, f"format invalide '{x}' (attendu /{args[0]}/)"))
+            return v
+        if op == "enum":
+            allowed = frozenset(args)
+            def v(x, p, e):
+                if x not in allowed:
+                    e.append((p, f"valeur '{x}' hors {sorted(allowed)}"))
+            return v
+        if op == "list":
+            item = compile_schema(args[0])
+            def v(x, p, e):
+                if not isinstance(x, list):
+                    e.append((p, f"type attendu list, reçu {_tname(x)}")); return
+                for i, y in enumerate(x):
+                    item(y, f"{p}[{i}]", e)
+            return v
+        if op == "map":
+            val = compile_schema(args[0])
+            def v(x, p, e):
+                if not isinstance(x, dict):
+                    e.append((p, f"type attendu dict, reçu {_tname(x)}")); return
+                for k, y in x.items():
+                    val(y, f"{p}.{k}", e)
+            return v
+        if op == "one_of":
+            alts = [compile_schema(a) for a in args]
+            def v(x, p, e):
+                first = None
+                for a in alts:
+                    sub = []
+                    a(x, p, sub)
+                    if not sub: return
+                    first = first or sub
+                e.extend(first)
+            return v
+        raise ValueError(f"opérateur de schéma inconnu: {op}")
+    if isinstance(s, dict):
+        req = [(k, compile_schema(t)) for k, t in s.items() if not k.endswith("?")]
+        opt = [(k[:-1], compile_schema(t)) for k, t in s.items() if k.endswith("?")]
+        def v(x, p, e):
+            if not isinstance(x, dict):
+                e.append((p, f"type attendu dict, reçu {_tname(x)}")); return
+            for k, f in req:
+                if k in x: f(x[k], f"{p}.{k}", e)
+                else: e.append((p, f"champ '{k}' manquant"))
+            for k, f in opt:
+                if k in x: f(x[k], f"{p}.{k}", e)
+        return v
+    raise ValueError(f"schéma invalide: {s!r}")
+
+def _with(base, extra):
+    d = dict(base); d.update(extra)
+    return d
+
+# ── Schémas par famille ─────────────────────────────────────────────────────
+STRS = ("list", str)
+CAP = ("re", r"[a-z]+(\.[a-z_]+)+")
+FLOW_REF = ("re", r"ARKFLOW-[\w-]+:[A-Z0-9_]+")
+
+BRICK = {
+    "id": str, "version": "semver",
+    "title?": str, "summary?": str,
+    "exports?": ("one_of", STRS, dict),
+    "requires?": STRS, "provides?": STRS, "maintainers?": STRS, "sources?": STRS,
+    "contracts?": {"invariants?": STRS, "schema?": str},
+    "change_policy?": {"compatibility?": str, "breaking_change_requires?": STRS, "stable_keys?": STRS},
+}
+
+STEP = {
+    "step": str,
+    "action_key": ("re", r"[A-Z][A-Z0-9_]*"),
+    "requires_caps?": ("list", CAP),
+    "select_actor?": {"use": str, "required_caps?": ("list", CAP), "required_caps_any?": ("list", CAP)},
+    "requires?": ("list", {"prev_step": str, "type": ("enum", "RESULT")}),
+    "use_chain?": str,
+    "gate_select?": dict,
+}
+
+MESSAGING = {"general_ref": str, "inbox_ref": str, "outbox_ref": str, "ack_policy": str}
+MEMORY = {"dir": str, "index": str}
+
+SCHEMAS = [
+    # (motif d'id, nom, schéma) — le premier motif qui matche gagne
+    (r"[A-Z_]+00-INDEX", "INDEX", _with(BRICK, {"registry?": ("map", "any")})),
+    (r"ARKFLOW-00-", "ARKFLOW-00", _with(BRICK, {"workflows_catalog": ("list", {
+        "intent": ("re", r"[A-Z_]+:[A-Z_]+"), "title": str, "flow_ref": FLOW_REF,
+        "family?": str, "description?": str})})),
+    (r"ARKFLOW-04", "ARKFLOW-04", _with(BRICK, {"exports": STRS,
+        "common": {"policy": {"single_thread": bool, "require_result_to_advance": bool, "timeout_sec": int},
+                   "refs?": ("map", str)},
+        "flows": ("map", {"sequence": ("list", STEP)})})),
+    (r"ARKFLOW-12-", "ARKFLOW-12", _with(BRICK, {"keys": ("map", {
+        "kind": ("enum", "work", "check", "gate", "send"), "desc": str})})),
+    (r"ARKFLOW-17-", "ARKFLOW-17", _with(BRICK, {"actor_selector": {"inputs": dict, "policy": dict, "output?": dict},
+        "chain_locks": {"single_active_step": bool, "result_required_to_advance?": bool}})),
+    (r"ARKFLOW-19-", "ARKFLOW-19", _with(BRICK, {"preconditions": ("map", ("list", {
+        "prev_step": ("re", r"\w+(\|\w+)*"), "require": ("enum", "RESULT")}))})),
+    (r"ARKFLOW-CAPAMAP", "CAPAMAP", _with(BRICK, {"domains": ("map", {"tags": STRS}),
+        "capabilities": ("map", STRS)})),
+    (r"ARKAROUTING-01-", "ARKAROUTING-01", _with(BRICK, {"facets": ("list", {"id": str, "label": str, "description?": str})})),
+    (r"ARKAROUTING", "ARKAROUTING", BRICK),
+    (r"ARKORE", "ARKORE", BRICK),
+    (r"ARKPR", "ARKPR", BRICK),
+    (r"ARKAA", "ARKAA", _with(BRICK, {"memory?": MEMORY, "messaging?": MESSAGING,
+        "startup?": {"sequence": list, "default_intent": str, "dispatch_mode?": str},
+        "context_refs?": ("map", str), "available_intents?": STRS})),
+    (r"ONBOARDING-", "ONBOARDING", {
+        "id": str, "version": "semver",
+        "client": str, "agent_id": str, "role": str,
+        "profile_ref": str, "capabilities_ref": str, "expert_ref": str, "wakeup_ref": str,
+        "supported_intents": STRS,
+        "runtime": {"startup": dict},
+        "messaging": MESSAGING, "memory": MEMORY,
+        "policy": {"ack_policy": str, "dispatch_mode?": str},
+        "context_refs?": ("map", str), "source_wakeup?": str, "mission_context?": dict,
+    }),
+]
+
+_SELECT = re.compile("|".join(f"(?P<k{i}>{rx})" for i, (rx, _, _) in enumerate(SCHEMAS)))
+VALIDATORS = [(name, compile_schema(s)) for _, name, s in SCHEMAS]
+
+def schema_for(bid: str):
+    m = _SELECT.match(bid)
+    return VALIDATORS[int(m.lastgroup[1:])] if m else (None, None)
+
+def check(path: str):
+    try:
+        with open(path, "rb") as fh:
+            y = yaml.load(fh, Loader=_Loader)
+    except yaml.YAMLError as exc:
+        mark = getattr(exc, "problem_mark", None)
+        where = f" (ligne {mark.line + 1}, colonne {mark.column + 1})" if mark else ""
+        return path, None, [("$", f"YAML invalide: {getattr(exc, 'problem', None) or exc}{where}")]
+    bid = y.get("id") if isinstance(y, dict) else None
+    if not isinstance(bid, str):
+        return path, None, []
+    name, v = schema_for(bid)
+    if v is None:
+        return path, None, []
+    errs = []
+    v(y, "$", errs)
+    return path, name, errs
+
+def yaml_files(root: Path):
+    # parcours partagé du registre ARKA_ROUTING (dossiers ignorés : option walk_ignore)
+    tree, _ = ar.registry((BASE / "ARKA_OS/ARKA_ROUTING").resolve()).tree()
+    return sorted(str(p) for p in tree["*.yaml"] + tree["*.yml"] if root in p.parents)
+
+def main():
+    t0 = time.perf_counter()
+    files = yaml_files((BASE / "ARKA_OS").resolve())
+    out = sys.stdout
+    nerr = nval = nbase = 0
+    kinds = {}
+    chunk = max(1, len(files) // (JOBS * 4))
+    with ProcessPoolExecutor(max_workers=JOBS) as ex:
+        for path, name, errs in ex.map(check, files, chunksize=chunk):
+            rel = os.path.relpath(path, BASE).replace(os.sep, "/")
+            if name:
+                nval += 1
+                kinds[name] = kinds.get(name, 0) + 1
+            if rel in BASELINE:
+                if not errs:
+                    nerr += 1
+                    out.write(json.dumps({"file": rel, "kind": name, "path": "$", "error": "entrée de baseline obsolète (fichier valide)"}, ensure_ascii=False) + "\n")
+                nbase += len(errs)
+            else:
+                nerr += len(errs)
+            for p, msg in errs:
+                out.write(json.dumps({"file": rel, "kind": name, "path": p, "error": msg, **({"baseline": True} if rel in BASELINE else {})}, ensure_ascii=False) + "\n")
+            out.flush()
+    out.write(json.dumps({"summary": True, "files": len(files), "validated": nval, "kinds": kinds,
+                          "errors": nerr, "baselined": nbase, "ok": nerr == 0,
+                          "elapsed_ms": round((time.perf_counter() - t0) * 1000)}, ensure_ascii=False) + "\n")
+    if nerr: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,61 @@
 #!/usr/bin/env python3
 # ci_discoverability.py — Garantit la découvrabilité complète intents/flows/docs/agents
-import sys, json, yaml
+# (s'appuie sur le graphe de références compilé d'ARKA_ROUTING)
+import sys, json
+from collections import Counter
 from pathlib import Path
 
 BASE = Path(sys.argv[1]) if len(sys.argv)>1 else Path(".")
 os_root = (BASE / "ARKA_OS").resolve()
-flow_root = os_root / "ARKA_FLOW"
-core_root = os_root / "ARKA_CORE"
+sys.path.insert(0, str(os_root / "ARKA_ROUTING"))
+import arkarouting as ar
 
-def load_yaml(p):
-    return yaml.safe_load(p.read_text(encoding="utf-8")) or {}
+reg = ar.registry(os_root / "ARKA_ROUTING")
+g = reg.refgraph()
+index = reg.index()
 
-manifest = load_yaml(flow_root/"bricks"/"ARKFLOW-00-MANIFEST.yaml")
-router   = load_yaml(flow_root/"router"/"routing.yaml")
-index    = load_yaml(flow_root/"ARKFLOW00-INDEX.yaml")
-nom      = load_yaml(core_root/"bricks"/"ARKA_NOMENCLATURE01.yaml")
-wakeup   = load_yaml(os_root/"wakeup-intents.matrix.yaml")
-
-intents = [e.get("intent") for e in (manifest.get("workflows_catalog") or []) if e.get("intent")]
+intents = [e.get("intent") for e in reg.manifest() if e.get("intent")]
 
 # checks
 errors = []
 # 1) router covers all manifest intents
-router_map = {}
-for s in (router.get("strategies") or []):
-    m = s.get("match",{})
-    if m.get("by")=="intent":
-        router_map[m.get("value")] = s.get("route",{}).get("flow")
-
 for it in intents:
-    if it not in router_map:
+    term = ar._uri("term", it)
+    if not g.defined(term, "router"):
         errors.append({"intent": it, "error": "intent absent du router"})
+        continue
+    routes = g.edges(term, "route")
+    fr = routes[0][1][len("arka://flow/"):] if routes else None
+    if not fr or ":" not in fr:
+        errors.append({"intent": it, "error": "flow_ref invalide", "flow_ref": fr})
     else:
-        fr = router_map[it]
-        if not fr or ":" not in fr:
-            errors.append({"intent": it, "error": "flow_ref invalide", "flow_ref": fr})
-        else:
-            bid, exp = fr.split(":",1)
-            reg = (index.get("registry") or {}).get(bid)
-            if not reg:
-                errors.append({"intent": it, "error": f"brique {bid} absente de l'index"})
-            elif exp not in (reg.get("exports") or []):
-                errors.append({"intent": it, "error": f"export {exp} absent des exports", "exports": reg.get("exports")})
+        bid, exp = fr.split(":",1)
+        if not g.defined(ar._uri("dataset", bid)):
+            errors.append({"intent": it, "error": f"brique {bid} absente de l'index"})
+        elif not g.defined(routes[0][1]):
+            errors.append({"intent": it, "error": f"export {exp} absent des exports", "exports": (index.get(bid) or {}).get("exports")})
 
 # 2) nomenclature + wakeup coverage
-term_ids = [t.get("id") for t in (nom.get("terms") or []) if t.get("id")]
-wu_intents = (wakeup.get("intents") or [])
-missing_nom = [it for it in intents if it not in term_ids]
-missing_wu  = [it for it in intents if it not in wu_intents]
+missing_nom = [it for it in intents if not g.defined(ar._uri("term", it), "nomenclature")]
+missing_wu  = [it for it in intents if not g.defined(ar._uri("term", it), "wakeup")]
 if missing_nom: errors.append({"nomenclature_missing": missing_nom})
 if missing_wu:  errors.append({"wakeup_missing": missing_wu})
 
-print(json.dumps({"checked_intents": len(intents), "errors": errors, "ok": len(errors)==0}, ensure_ascii=False, indent=2))
+# 3) flows chaînés : chaque use_chain est une arête vers un export indexé, sans arête dupliquée
+chains = 0
+for bid, meta in index.items():
+    flows = ar._load_yaml(reg.flow / (meta or {}).get("file", "MISSING")).get("flows") or {}
+    for exp in ((meta or {}).get("exports") or []):
+        u = ar._uri("flow", f"{bid}:{exp}")
+        for st in ((flows.get(exp) or {}).get("sequence") or []):
+            if not isinstance(st, dict) or not st.get("use_chain"): continue
+            chains += 1; dst = ar._uri("flow", f"{bid}:{st['use_chain']}")
+            if not g.defined(dst):
+                errors.append({"flow": u, "error": "use_chain vers un export non indexé", "chain": dst})
+            elif ("use_chain", u) not in g.edges(dst, "use_chain", incoming=True):
+                errors.append({"flow": u, "error": "use_chain absent du graphe de références", "chain": dst})
+dups = [{"from": s, "kind": k, "to": d} for s, es in g.out.items() for (k, d), n in Counter(es).items() if n > 1]
+if dups: errors.append({"duplicate_edges": dups})
+
+print(json.dumps({"checked_intents": len(intents), "checked_chains": chains, "errors": errors, "ok": len(errors)==0}, ensure_ascii=False, indent=2))
 if errors: sys.exit(1)
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# ci_flow_preconditions.py — Préconditions FLOW (requires + ARKFLOW-19) : cycles, steps inatteignables,
+# prev_step / use_chain inconnus (s'appuie sur les DAG compilés par arkaflow.py)
+import sys, json
+from pathlib import Path
+
+BASE = Path(sys.argv[1]) if len(sys.argv)>1 else Path(".")
+flow_root = (BASE / "ARKA_OS" / "ARKA_FLOW").resolve()
+sys.path.insert(0, str(flow_root))
+import arkaflow as af
+
+dags, _ = af.compile_preconditions(flow_root)
+_, pre, _, _ = af._precond_sources(flow_root)
+keys = set(af._load_yaml(flow_root / "bricks" / "ARKFLOW-12-ACTION-KEYS.yaml").get("keys") or {})
+issues = af.validate_preconditions(dags, pre, keys)
+errors = [x for x in issues if x["level"]=="error"]
+
+print(json.dumps({"flows": len(dags), "issues": issues, "ok": not errors}, ensure_ascii=False, indent=2))
+if errors: sys.exit(1)
@@ -1,18 +1,22 @@
 
 #!/usr/bin/env python3
 # ci_nomenclature_lint.py — unicité IDs, owners présents, related_workflows existants
+# (existence des workflows vérifiée sur le graphe de références compilé d'ARKA_ROUTING)
 import sys, json, yaml
 from pathlib import Path
 
 BASE = Path(sys.argv[1]) if len(sys.argv)>1 else Path(".")
 nom_p = BASE / "ARKA_OS/ARKA_CORE/bricks/ARKA_NOMENCLATURE01.yaml"
-index_p  = BASE / "ARKA_OS/ARKA_FLOW/ARKFLOW00-INDEX.yaml"
+sys.path.insert(0, str((BASE / "ARKA_OS/ARKA_ROUTING").resolve()))
+import arkarouting as ar
 
 def load_yaml(p):
     return yaml.safe_load(p.read_text(encoding="utf-8")) or {}
 
 nom = load_yaml(nom_p)
-index = load_yaml(index_p).get("registry", {})
+reg = ar.registry((BASE / "ARKA_OS/ARKA_ROUTING").resolve())
+g = reg.refgraph()
+index = reg.index()
 
 ids = set()
 errors = []
@@ -29,11 +33,10 @@ for t in nom.get("terms", []):
         if ":" not in ref:
             errors.append({"id": _id, "error": "related_workflow invalide", "ref": ref}); continue
         bid, export = ref.split(":",1)
-        meta = index.get(bid)
-        if not meta:
+        if not g.defined(ar._uri("dataset", bid)):
             errors.append({"id": _id, "error": f"brique {bid} absente de l'index", "ref": ref}); continue
-        if export not in (meta.get("exports") or []):
-            errors.append({"id": _id, "error": f"export '{export}' absent des exports indexés", "ref": ref, "exports_index": meta.get("exports")})
+        if not g.defined(ar._uri("flow", ref)):
+            errors.append({"id": _id, "error": f"export '{export}' absent des exports indexés", "ref": ref, "exports_index": (index.get(bid) or {}).get("exports")})
 
 print(json.dumps({"checked_terms": len(ids), "errors": errors, "ok": len(errors)==0}, ensure_ascii=False, indent=2))
 if errors: sys.exit(1)
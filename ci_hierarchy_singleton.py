@@ -5,7 +5,9 @@ import sys, yaml
 from pathlib import Path
 
 BASE = Path(sys.argv[1]) if len(sys.argv)>1 else Path(".")
-candidates = list((BASE / "ARKA_OS/ARKA_CORE").rglob("*HIERARCHY*.yaml"))
+sys.path.insert(0, str((BASE / "ARKA_OS/ARKA_ROUTING").resolve()))
+import arkarouting as ar
+candidates = ar.walk_tree(BASE / "ARKA_OS/ARKA_CORE", ("*HIERARCHY*.yaml",), ar.walk_ignore((BASE / "ARKA_OS/ARKA_ROUTING").resolve()))[0]["*HIERARCHY*.yaml"]
 ids = []
 for p in candidates:
     try:
@@ -5,14 +5,14 @@ import sys, yaml
 from pathlib import Path
 
 BASE = Path(sys.argv[1]) if len(sys.argv)>1 else Path(".")
+sys.path.insert(0, str((BASE / "ARKA_OS/ARKA_ROUTING").resolve()))
+import arkarouting as ar
+
 meta = BASE / "ARKA_OS/ARKA_META"
 bad = []
 if meta.exists():
-    for p in meta.rglob("*.yml"):
-        y = yaml.safe_load(p.read_text(encoding="utf-8")) or {}
-        if isinstance(y, dict) and "id" in y:
-            bad.append(str(p))
-    for p in meta.rglob("*.yaml"):
+    found, _ = ar.walk_tree(meta, ("*.yml", "*.yaml"), ar.walk_ignore((BASE / "ARKA_OS/ARKA_ROUTING").resolve()))
+    for p in found["*.yml"] + found["*.yaml"]:
         y = yaml.safe_load(p.read_text(encoding="utf-8")) or {}
         if isinstance(y, dict) and "id" in y:
             bad.append(str(p))
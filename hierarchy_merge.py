@@ -5,13 +5,15 @@ import sys, yaml
 from pathlib import Path
 
 BASE = Path(sys.argv[1]) if len(sys.argv)>1 else Path(".")
+sys.path.insert(0, str((BASE / "ARKA_OS/ARKA_ROUTING").resolve()))
+import arkarouting as ar
 patch_p = BASE / "ARKA_OS.ARKA_CORE.bricks.ARKORE01-HIERARCHY.patch.yaml"
 
 def load_yaml(p): 
     return yaml.safe_load(p.read_text(encoding="utf-8")) or {}
 
 # Locate a single ARKORE01-HIERARCHY.yaml under ARKA_OS/ARKA_CORE
-candidates = list((BASE / "ARKA_OS/ARKA_CORE").rglob("*HIERARCHY*.yaml"))
+candidates = ar.walk_tree(BASE / "ARKA_OS/ARKA_CORE", ("*HIERARCHY*.yaml",), ar.walk_ignore((BASE / "ARKA_OS/ARKA_ROUTING").resolve()))[0]["*HIERARCHY*.yaml"]
 target = None
 for p in candidates:
     y = load_yaml(p)